@@ -0,0 +1,690 @@
+#!/usr/bin/env python3
+"""DAGGER - headless command line entry point.
+
+Runs IOC scenarios without Tk so DAGGER can be driven from GUI-less lab VMs
+and orchestration scripts. The GUI lives in ``main.py``. Simulator modules
+are imported by the command that needs them, so short runs (and ``submit``
+to a running daemon) start quickly.
+"""
+import sys
+import json
+import argparse
+import functools
+
+
+def _log_sink(args):
+    from sim.eventlog import safe_append_log
+
+    if args.log:
+        return functools.partial(safe_append_log, path=args.log)
+    return safe_append_log
+
+
+def cmd_run(args):
+    from sim.scenario import load_scenario, ScenarioEngine
+
+    scenario = load_scenario(args.scenario)
+    if args.processes:
+        from sim.shard import ShardedRunner
+
+        runner = ShardedRunner(
+            scenario,
+            processes=args.processes,
+            workers=args.workers,
+            log_path=args.log,
+            format=args.log_format,
+            allow_external=True if args.allow_external else None,
+        )
+        summary = runner.run()
+        print(json.dumps(summary))
+        return 0 if summary["failed"] == 0 or not args.strict else 1
+    engine = ScenarioEngine(
+        scenario,
+        log=_log_sink(args),
+        workers=args.workers,
+        allow_external=True if args.allow_external else None,
+    )
+    summary = engine.run()
+    print(json.dumps(summary))
+    return 0 if summary["failed"] == 0 or not args.strict else 1
+
+
+def _dns_concurrency(value: str) -> int:
+    from sim.dnsburst import check_concurrency
+
+    try:
+        return check_concurrency(int(value))
+    except ValueError as e:
+        raise argparse.ArgumentTypeError(str(e))
+
+
+def cmd_dns_burst(args):
+    from sim.dnsburst import iter_domains, run_dns_burst
+
+    names = iter_domains(domains=args.domain, pattern=args.pattern, count=args.count, seed=args.seed)
+    result = run_dns_burst(
+        names,
+        rate=args.rate,
+        concurrency=args.concurrency,
+        nameserver=args.nameserver,
+        port=args.port,
+        timeout=args.timeout,
+        log=None if args.no_log else _log_sink(args),
+        allow_external=args.allow_external,
+    )
+    print(json.dumps(result))
+    return 0
+
+
+def cmd_tcp_sweep(args):
+    from sim.sweep import run_tcp_sweep
+
+    result = run_tcp_sweep(
+        args.targets,
+        args.ports,
+        concurrency=args.concurrency,
+        timeout=args.timeout,
+        rate=args.rate,
+        log=None if args.no_log else _log_sink(args),
+        allow_external=args.allow_external,
+    )
+    print(json.dumps(result))
+    return 0
+
+
+def cmd_beacon(args):
+    from sim.beacon import BeaconSimulator
+
+    sim = BeaconSimulator(
+        args.url,
+        beacons=args.beacons,
+        interval=args.interval,
+        jitter=args.jitter,
+        uris=args.uri,
+        user_agents=args.user_agent,
+        checkins=args.checkins,
+        duration=args.duration,
+        workers=args.workers,
+        log=None if args.no_log else _log_sink(args),
+        allow_external=args.allow_external,
+    )
+    try:
+        result = sim.run()
+    except KeyboardInterrupt:
+        sim.stop()
+        return 130
+    print(json.dumps(result))
+    return 0
+
+
+def cmd_files(args):
+    from sim.filegen import PRESETS, FileGenerator
+
+    name, content = PRESETS[args.preset] if args.preset else (None, "")
+    gen = FileGenerator(
+        args.folder,
+        args.name or name,
+        content if args.content is None else args.content,
+        count=args.count,
+        workers=args.workers,
+        seed=args.seed,
+        log=None if args.no_log else _log_sink(args),
+    )
+    try:
+        result = gen.run()
+    except KeyboardInterrupt:
+        gen.stop()
+        return 130
+    print(json.dumps(result))
+    return 0
+
+
+def cmd_bigfile(args):
+    from sim.bigfile import LargeFileWriter
+
+    def progress(written, total):
+        print(f"{written / 1e6:.0f}/{total / 1e6:.0f} MB", file=sys.stderr)
+
+    writer = LargeFileWriter(
+        args.path,
+        args.size,
+        profile=args.profile,
+        entropy=args.entropy,
+        block_size=args.block_size,
+        algorithms=() if args.no_hash else ("sha256",),
+        preallocate=not args.no_preallocate,
+        seed=args.seed,
+        progress=None if args.quiet else progress,
+    )
+    try:
+        ok, event, result = writer.run()
+    except KeyboardInterrupt:
+        writer.stop()
+        return 130
+    if not args.no_log:
+        _log_sink(args)(event)
+    if not ok:
+        raise OSError(event.fields["error"])
+    print(json.dumps(result))
+    return 0
+
+
+def cmd_hash(args):
+    import os
+    from concurrent.futures import ThreadPoolExecutor
+    from sim.actions import hash_artifact
+    from sim.hashing import DEFAULT_ALGORITHMS, HashCache
+
+    def walk():
+        for root in args.paths:
+            if os.path.isdir(root):
+                for folder, _, names in os.walk(root):
+                    for name in names:
+                        yield os.path.join(folder, name)
+            else:
+                yield root
+
+    algorithms = tuple(args.algorithm or DEFAULT_ALGORITHMS)
+    cache = False if args.no_cache else HashCache(args.cache) if args.cache else None
+    log = None if args.no_log else _log_sink(args)
+    failed = 0
+    with ThreadPoolExecutor(max_workers=args.workers) as pool:
+        for ok, event in pool.map(lambda p: hash_artifact(p, algorithms, cache), walk()):
+            failed += not ok
+            if log:
+                log(event)
+            print(json.dumps(event.fields))
+    if cache:
+        cache.close()
+    return 1 if failed else 0
+
+
+def cmd_registry(args):
+    from sim import actions
+    from sim.registry import open_store
+
+    if args.op == "import":
+        print(json.dumps({"imported": open_store(args.store).import_reg(args.file)}))
+        return 0
+    if args.op == "compact":
+        store = open_store(args.store)
+        store.compact()
+        print(json.dumps({"keys": store.key_count()}))
+        return 0
+    if args.op == "set":
+        data = int(args.data, 0) if args.type in ("REG_DWORD", "REG_QWORD") else args.data
+        ok, event = actions.set_registry(args.key, args.name, data, args.type, store_path=args.store)
+    elif args.op == "enum":
+        ok, event = actions.enum_registry(args.key, args.recursive, store_path=args.store)
+    else:
+        ok, event = actions.query_registry(args.key, args.name, store_path=args.store)
+    if not args.no_log:
+        _log_sink(args)(event)
+    print(event)
+    return 0 if ok else 1
+
+
+def cmd_mutex(args):
+    import time
+    from sim import mutexes
+
+    log = None if args.no_log else _log_sink(args)
+    if args.op == "churn":
+        print(json.dumps(mutexes.churn(args.iterations, workers=args.workers, log=log)))
+        return 0
+    names = list(args.names)
+    if args.file:
+        names += mutexes.load_names(args.file)
+    if args.known:
+        names += mutexes.KNOWN_MUTEXES
+    if not names:
+        raise ValueError("no mutex names given (NAME..., --file or --known)")
+    with mutexes.MutexTable(default_ttl=args.ttl, log=log) as table:
+        result = table.acquire_many(mutexes.expand_names(names, args.count))
+        result["held"] = len(table)
+        print(json.dumps(result), flush=True)
+        try:
+            # with a TTL, wait for the reaper to release everything
+            deadline = time.monotonic() + args.hold_for if args.hold_for is not None else None
+            while len(table) and (deadline is None or time.monotonic() < deadline):
+                time.sleep(0.1 if deadline is None else max(0.0, min(0.1, deadline - time.monotonic())))
+        except KeyboardInterrupt:
+            pass
+        result = {"released": len(table), "expired": table.expired}
+    print(json.dumps(result))
+    return 0
+
+
+def cmd_replay(args):
+    from sim.eventlog import LOG_PATH, flush_logs, segments
+    from sim.replay import Replayer
+
+    flush_logs()
+    sources = []
+    for path in args.sources or [args.log or LOG_PATH]:
+        sources += segments(path) + [path] if args.all_segments else [path]
+    replayer = Replayer(
+        sources,
+        speed=args.speed,
+        workers=args.workers,
+        log=(lambda line: None) if args.no_log else _log_sink(args),
+        allow_external=args.allow_external,
+        store_path=args.store,
+        types=args.type,
+        dry_run=args.dry_run,
+    )
+    try:
+        result = replayer.run()
+    except KeyboardInterrupt:
+        replayer.stop()
+        return 130
+    print(json.dumps(result))
+    return 0
+
+
+def cmd_bench(args):
+    import os
+    from sim.bench import compare, format_table, run_benchmarks
+
+    report = run_benchmarks(args.names, count=args.count, workers=args.workers,
+                            progress=lambda name, n: print(f"{name}: {n} ops", file=sys.stderr))
+    print(format_table(report), file=sys.stderr)
+    print(json.dumps(report))
+    if args.output:
+        if os.path.dirname(args.output):
+            os.makedirs(os.path.dirname(args.output), exist_ok=True)
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+    if args.compare:
+        with open(args.compare, "r", encoding="utf-8") as f:
+            regressions = compare(json.load(f), report, args.threshold)
+        for line in regressions:
+            print(f"regression: {line}", file=sys.stderr)
+        return 1 if regressions else 0
+    return 0
+
+
+def cmd_ingest(args):
+    import os
+    from sim.ingest import IngestHarness, format_table
+
+    harness = IngestHarness(
+        rates=args.rate or (100, 500, 1000, 2000),
+        duration=args.duration,
+        drain=args.drain,
+        kinds=args.kind or None,
+        workers=args.workers,
+        collector=args.collector,
+        listen=args.listen,
+        target=args.target,
+        format=args.format,
+        batch_size=args.batch_size,
+        flush_interval=args.flush_interval,
+        allow_external=args.allow_external,
+        progress=lambda n, rate: print(f"step {n + 1}: {rate:g} events/s", file=sys.stderr),
+    )
+    try:
+        report = harness.run()
+    except KeyboardInterrupt:
+        harness.stop()
+        return 130
+    print(format_table(report), file=sys.stderr)
+    print(json.dumps(report))
+    if args.output:
+        if os.path.dirname(args.output):
+            os.makedirs(os.path.dirname(args.output), exist_ok=True)
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+    return 0
+
+
+def cmd_search(args):
+    from sim.eventlog import LOG_PATH, flush_logs, segments
+    from sim.logindex import search
+
+    flush_logs()
+    path = args.log or LOG_PATH
+    files = segments(path) + [path] if args.all_segments else [path]
+    remaining = args.limit
+    for f in files:
+        for line in search(f, types=args.type, since=args.since, until=args.until, text=args.grep, limit=remaining):
+            sys.stdout.write(line)
+            if remaining:
+                remaining -= 1
+        if args.limit and not remaining:
+            break
+    return 0
+
+
+def cmd_index(args):
+    from sim.eventlog import LOG_PATH, segments
+    from sim.logindex import build_index
+
+    path = args.log or LOG_PATH
+    for f in segments(path) + [path]:
+        print(f"{f}: indexed {build_index(f)} new lines")
+    return 0
+
+
+# global options that configure process-wide state: log writers, the forwarder sink, the metrics endpoint
+_PROCESS_OPTIONS = ("log_max_bytes", "log_rotate_interval", "log_backups", "log_compress", "log_flush_interval",
+                    "log_fsync", "log_format", "forward", "forward_format", "forward_spool", "forward_allow_external",
+                    "metrics_port")
+
+
+def _run_job(argv, daemon_args):
+    """Run one daemon job in the daemon's log, forwarder and metrics setup."""
+    from sim.eventlog import flush_logs
+
+    parser = build_parser()
+    # options a job leaves out are the daemon's, not the parser defaults
+    parser.set_defaults(**{name: getattr(daemon_args, name) for name in _PROCESS_OPTIONS})
+    args = parser.parse_args(argv)
+    differing = [name for name in _PROCESS_OPTIONS if getattr(args, name) != getattr(daemon_args, name)]
+    if differing:
+        names = ", ".join("--" + name.replace("_", "-") for name in differing)
+        print(f"dagger: error: {names} must match the daemon's; start a daemon with them instead", file=sys.stderr)
+        return 2
+    try:
+        return args.func(args)
+    except (OSError, ValueError) as e:
+        print(f"dagger: error: {e}", file=sys.stderr)
+        return 2
+    finally:
+        # the job's lines are on disk before the client gets its exit code
+        flush_logs()
+
+
+def cmd_daemon(args):
+    from sim.daemon import JobServer
+
+    server = JobServer(lambda argv: _run_job(argv, args), address=args.address, jobs=args.jobs)
+    server.warm()
+    print(f"dagger: daemon {server.status()['pid']} listening on {server.address}", file=sys.stderr, flush=True)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        server.close()
+    return 0
+
+
+def cmd_submit(args):
+    from sim.daemon import submit
+
+    job = args.job[1:] if args.job[:1] == ["--"] else args.job
+    if not job:
+        raise ValueError("no command to submit")
+    return submit(job, address=args.address)
+
+
+def cmd_ping(args):
+    from sim.daemon import request
+
+    frame = request({"op": "shutdown" if args.shutdown else "ping"}, address=args.address)
+    print(json.dumps(frame))
+    return 0
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog="dagger", description="DAGGER headless IOC simulator")
+    parser.add_argument("--log", help="event log path (default: logs/ioc_sim.log)")
+    parser.add_argument("--log-max-bytes", type=int, help="rotate the log when it reaches this size")
+    parser.add_argument("--log-rotate-interval", type=float, help="rotate the log every N seconds")
+    parser.add_argument("--log-backups", type=int, default=10, help="rotated log segments to keep (0 = all)")
+    parser.add_argument("--log-compress", choices=("gzip", "none"), default="gzip",
+                        help="compress rotated segments in the background into seekable .gz archives")
+    parser.add_argument("--log-flush-interval", type=float, default=0.2, help="max seconds a line stays buffered")
+    parser.add_argument("--log-fsync", action="store_true", help="fsync the log on every flush")
+    parser.add_argument("--log-format", choices=("text", "jsonl", "ecs", "cef"), default="text",
+                        help="event line format")
+    parser.add_argument("--forward", metavar="URL",
+                        help="also send events to a SIEM: udp://host:514, tcp://host:601 or http(s)://host/path")
+    parser.add_argument("--forward-format", choices=("text", "jsonl", "ecs", "cef"),
+                        help="forwarded event format (default: cef for syslog, jsonl for http)")
+    parser.add_argument("--forward-spool", help="spool directory for undeliverable events (default: logs/spool)")
+    parser.add_argument("--forward-allow-external", action="store_true",
+                        help="allow a non-loopback forward target")
+    parser.add_argument("--metrics-port", type=int,
+                        help="serve Prometheus metrics on http://127.0.0.1:PORT/metrics while the command runs")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    p = sub.add_parser("run", help="run a JSON/YAML scenario file")
+    p.add_argument("scenario")
+    p.add_argument("-w", "--workers", type=int, help="worker threads (overrides scenario)")
+    p.add_argument("-P", "--processes", type=int, help="shard the scenario over this many processes, "
+                                                       "merging their events in timestamp order")
+    p.add_argument("--allow-external", action="store_true", help="allow external network targets (dangerous)")
+    p.add_argument("--strict", action="store_true", help="exit non-zero if any action failed")
+    p.set_defaults(func=cmd_run)
+
+    p = sub.add_parser("dns-burst", help="high-rate concurrent DNS lookups")
+    src = p.add_mutually_exclusive_group(required=True)
+    src.add_argument("-d", "--domain", action="append", help="domain to query (repeatable, cycled)")
+    src.add_argument("-p", "--pattern", help="name pattern, e.g. '{rand:14}.dga.test' or '{hex:32}.t.test'")
+    p.add_argument("-n", "--count", type=int, help="number of queries (default: 1000 for patterns)")
+    p.add_argument("-r", "--rate", type=float, default=0, help="target queries/sec (0 = unthrottled)")
+    p.add_argument("-c", "--concurrency", type=_dns_concurrency, default=100,
+                   help="max queries in flight (1-65535; one resolver thread each without --nameserver)")
+    p.add_argument("--nameserver", help="send raw UDP queries to this server instead of the system resolver")
+    p.add_argument("--port", type=int, default=53)
+    p.add_argument("--timeout", type=float, default=2.0)
+    p.add_argument("--seed", type=int, help="random seed for pattern expansion")
+    p.add_argument("--no-log", action="store_true", help="do not write one log line per query")
+    p.add_argument("--allow-external", action="store_true", help="allow an external nameserver (dangerous)")
+    p.set_defaults(func=cmd_dns_burst)
+
+    p = sub.add_parser("tcp-sweep", help="bounded-concurrency TCP connect sweep")
+    p.add_argument("targets", nargs="+", help="IPs or CIDR ranges, e.g. 127.0.0.0/24")
+    p.add_argument("-p", "--ports", required=True, help="port list, e.g. '22,80,445,8000-8100'")
+    p.add_argument("-c", "--concurrency", type=int, default=200, help="max connection attempts in flight")
+    p.add_argument("--timeout", type=float, default=1.0, help="per-attempt timeout in seconds")
+    p.add_argument("-r", "--rate", type=float, default=0, help="max new attempts/sec (0 = unthrottled)")
+    p.add_argument("--no-log", action="store_true", help="do not write one log line per attempt")
+    p.add_argument("--allow-external", action="store_true", help="allow non-loopback targets (dangerous)")
+    p.set_defaults(func=cmd_tcp_sweep)
+
+    p = sub.add_parser("beacon", help="jittered HTTP C2 beacon simulation over pooled keep-alive connections")
+    p.add_argument("url", help="C2 base URL, e.g. http://127.0.0.1:8080/")
+    p.add_argument("-b", "--beacons", type=int, default=10, help="number of simulated implants")
+    p.add_argument("-i", "--interval", type=float, default=30.0, help="check-in interval in seconds")
+    p.add_argument("-j", "--jitter", type=float, default=0.2, help="jitter as a fraction of the interval")
+    p.add_argument("-u", "--uri", action="append", help="URI to rotate through (repeatable; {id}, {seq})")
+    p.add_argument("-A", "--user-agent", action="append", help="User-Agent to rotate through (repeatable)")
+    p.add_argument("-n", "--checkins", type=int, help="check-ins per beacon")
+    p.add_argument("-t", "--duration", type=float, help="stop after this many seconds")
+    p.add_argument("-w", "--workers", type=int, help="request worker threads / pooled connections")
+    p.add_argument("--no-log", action="store_true", help="do not write one log line per check-in")
+    p.add_argument("--allow-external", action="store_true", help="allow an external C2 host (dangerous)")
+    p.set_defaults(func=cmd_beacon)
+
+    p = sub.add_parser("files", help="bulk file-artifact creation from name/content templates")
+    p.add_argument("folder", help="target folder (created if missing)")
+    p.add_argument("--preset", choices=("ransom-note", "encrypted", "dropper"), help="built-in name/content templates")
+    p.add_argument("-N", "--name", help="file name template ({i}, {rand:N}, {hex:N}, {choice:a|b})")
+    p.add_argument("-C", "--content", help="content template (also {name})")
+    p.add_argument("-n", "--count", type=int, default=1000, help="number of files")
+    p.add_argument("-w", "--workers", type=int, default=8, help="writer threads")
+    p.add_argument("--seed", help="random seed, makes names and contents reproducible")
+    p.add_argument("--no-log", action="store_true", help="do not write one log line per file")
+    p.set_defaults(func=cmd_files)
+
+    p = sub.add_parser("bigfile", help="stream one large file with a chosen entropy profile")
+    p.add_argument("path", help="file to create")
+    p.add_argument("-s", "--size", default="256M", help="size, e.g. 512M or 2G (default: 256M)")
+    p.add_argument("--profile", choices=("encrypted", "archive", "packed", "text", "zero"), default="encrypted",
+                   help="entropy profile; zero makes a sparse file")
+    p.add_argument("--entropy", type=float, help="bits per byte (0-8), overrides --profile")
+    p.add_argument("--block-size", type=int, default=1 << 20, help="write size in bytes")
+    p.add_argument("--seed", type=int, help="random seed, makes the content reproducible")
+    p.add_argument("--no-hash", action="store_true", help="skip hashing the data while writing")
+    p.add_argument("--no-preallocate", action="store_true", help="do not reserve the space with fallocate")
+    p.add_argument("-q", "--quiet", action="store_true", help="no progress output")
+    p.add_argument("--no-log", action="store_true", help="do not log the file creation")
+    p.set_defaults(func=cmd_bigfile)
+
+    p = sub.add_parser("hash", help="multi-digest hashing of files/folders, cached by (path, size, mtime, inode)")
+    p.add_argument("paths", nargs="+", help="files or folders (walked recursively)")
+    p.add_argument("-a", "--algorithm", action="append",
+                   help="md5, sha1, sha256, ... or ssdeep/imphash (repeatable; default: md5, sha1, sha256)")
+    p.add_argument("-w", "--workers", type=int, default=4, help="hashing threads")
+    p.add_argument("--cache", help="hash cache database (default: logs/hash_cache.sqlite)")
+    p.add_argument("--no-cache", action="store_true", help="always read the files")
+    p.add_argument("--no-log", action="store_true", help="do not write one log line per file")
+    p.set_defaults(func=cmd_hash)
+
+    p = sub.add_parser("registry", help="query, write, enumerate or bulk-load the simulated registry")
+    p.add_argument("--store", help="registry store (default: sim_registry.json)")
+    p.add_argument("--no-log", action="store_true", help="do not log the operation")
+    ops = p.add_subparsers(dest="op", required=True)
+    op = ops.add_parser("query", help="read a key's values or one value")
+    op.add_argument("key")
+    op.add_argument("-v", "--name", help="value name")
+    op = ops.add_parser("set", help="write a value (simulated store only)")
+    op.add_argument("key")
+    op.add_argument("name", help="value name ('' for the default value)")
+    op.add_argument("data")
+    op.add_argument("--type", choices=("REG_SZ", "REG_EXPAND_SZ", "REG_DWORD", "REG_QWORD"), default="REG_SZ")
+    op = ops.add_parser("enum", help="list subkeys")
+    op.add_argument("key")
+    op.add_argument("-r", "--recursive", action="store_true", help="every key below, not just direct subkeys")
+    op = ops.add_parser("import", help="bulk-load a regedit .reg export")
+    op.add_argument("file")
+    ops.add_parser("compact", help="fold the change journal into the snapshot")
+    p.set_defaults(func=cmd_registry)
+
+    p = sub.add_parser("mutex", help="hold many named mutexes with leases, or benchmark create/release churn")
+    p.add_argument("--no-log", action="store_true", help="do not write one log line per create/release")
+    ops = p.add_subparsers(dest="op", required=True)
+    op = ops.add_parser("hold", help="create and hold named mutexes")
+    op.add_argument("names", nargs="*", help="mutex names; {i} expands to 0..count-1")
+    op.add_argument("-f", "--file", help="file with one mutex name per line")
+    op.add_argument("--known", action="store_true", help="add well-known malware mutex names")
+    op.add_argument("-n", "--count", type=int, default=1, help="expansions per {i} name")
+    op.add_argument("--ttl", type=float, help="lease seconds; expired mutexes are released automatically")
+    op.add_argument("--hold-for", type=float, help="release everything after this many seconds "
+                                                  "(default: until leases expire or Ctrl-C)")
+    op = ops.add_parser("churn", help="create/release benchmark")
+    op.add_argument("-n", "--iterations", type=int, default=10000)
+    op.add_argument("-w", "--workers", type=int, default=4)
+    p.set_defaults(func=cmd_mutex)
+
+    p = sub.add_parser("replay", help="re-run a recorded log or timed scenario at its original pace")
+    p.add_argument("sources", nargs="*", help="log files (any --log-format) and/or scenario files with 'at' "
+                                              "offsets (default: the event log)")
+    p.add_argument("-x", "--speed", type=float, default=1.0, help="time multiplier, 0.1 to 1000 (default: 1)")
+    p.add_argument("-t", "--type", action="append", help="only replay this event type (repeatable)")
+    p.add_argument("-w", "--workers", type=int, default=16, help="worker threads executing the actions")
+    p.add_argument("--store", help="simulated registry store for registry steps")
+    p.add_argument("--all-segments", action="store_true", help="include rotated segments of each log")
+    p.add_argument("--dry-run", action="store_true", help="walk the schedule without executing anything")
+    p.add_argument("--no-log", action="store_true", help="do not log the replayed events")
+    p.add_argument("--allow-external", action="store_true", help="allow external network targets (dangerous)")
+    p.set_defaults(func=cmd_replay)
+
+    p = sub.add_parser("bench", help="benchmark each simulator primitive against local stubs")
+    p.add_argument("names", nargs="*", help="dns, tcp, http, file, hash, registry, mutex, log (default: all)")
+    p.add_argument("-n", "--count", type=int, help="operations per benchmark (default: per benchmark)")
+    p.add_argument("-w", "--workers", type=int, default=4, help="worker threads")
+    p.add_argument("-o", "--output", help="save the JSON report here")
+    p.add_argument("--compare", metavar="BASELINE", help="exit non-zero if a saved report was faster")
+    p.add_argument("--threshold", type=float, default=0.2,
+                   help="allowed rate drop / p99 growth before --compare fails (default: 0.2)")
+    p.set_defaults(func=cmd_bench)
+
+    p = sub.add_parser("ingest", help="SIEM ingestion latency and loss at increasing event rates")
+    p.add_argument("-r", "--rate", type=float, action="append",
+                   help="events per second for one step (repeatable; default: 100, 500, 1000, 2000)")
+    p.add_argument("-d", "--duration", type=float, default=5.0, help="seconds per step")
+    p.add_argument("--drain", type=float, default=5.0, help="seconds after a step before missing events count as lost")
+    p.add_argument("-k", "--kind", action="append", help="tcp, http, dns, file, registry, mutex (repeatable; default: all)")
+    p.add_argument("-w", "--workers", type=int, default=8, help="generator threads")
+    p.add_argument("--collector", choices=("udp", "tcp", "http"), default="udp", help="local collector protocol")
+    p.add_argument("--listen", metavar="HOST:PORT", help="collector address (default: 127.0.0.1 on a free port)")
+    p.add_argument("--target", metavar="URL",
+                   help="forward here instead of straight to the collector, e.g. a pipeline input relaying to --listen")
+    p.add_argument("--format", choices=("text", "jsonl", "ecs", "cef"),
+                   help="forwarded event format (default: cef for syslog, jsonl for http)")
+    p.add_argument("--batch-size", type=int, default=500, help="forwarder batch size")
+    p.add_argument("--flush-interval", type=float, default=0.5, help="forwarder flush interval in seconds")
+    p.add_argument("--allow-external", action="store_true", help="allow a non-loopback --target")
+    p.add_argument("-o", "--output", help="save the JSON report here")
+    p.set_defaults(func=cmd_ingest)
+
+    p = sub.add_parser("daemon", help="stay resident and run jobs sent with 'submit' over a local socket")
+    p.add_argument("--address", help="Unix socket path or 127.0.0.1:PORT (default: logs/dagger.sock)")
+    p.add_argument("-j", "--jobs", type=int, default=4, help="jobs run at once")
+    p.set_defaults(func=cmd_daemon)
+
+    p = sub.add_parser("submit", help="run a command in a running daemon, e.g. 'submit files /tmp/x -n 100'")
+    p.add_argument("--address", help="daemon address (default: logs/dagger.sock)")
+    p.add_argument("job", nargs=argparse.REMAINDER, help="command line to run; put '--' before global options like --log")
+    p.set_defaults(func=cmd_submit)
+
+    p = sub.add_parser("ping", help="show a running daemon's status")
+    p.add_argument("--address", help="daemon address (default: logs/dagger.sock)")
+    p.add_argument("--shutdown", action="store_true", help="stop the daemon")
+    p.set_defaults(func=cmd_ping)
+
+    p = sub.add_parser("search", help="filtered query over the event log using its sidecar index")
+    p.add_argument("-t", "--type", action="append", help="event type: dns, tcp, http, file, registry, mutex, other (repeatable)")
+    p.add_argument("--since", help="ISO-8601 start time (UTC if no offset)")
+    p.add_argument("--until", help="ISO-8601 end time (UTC if no offset)")
+    p.add_argument("-g", "--grep", help="substring the line must contain")
+    p.add_argument("-n", "--limit", type=int, help="stop after this many matches")
+    p.add_argument("-a", "--all-segments", action="store_true", help="also search rotated log segments")
+    p.set_defaults(func=cmd_search)
+
+    p = sub.add_parser("index", help="build or catch up the sidecar index for existing logs")
+    p.set_defaults(func=cmd_index)
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    if args.command in ("submit", "ping"):
+        # thin clients: no log, forwarder or simulator imports
+        try:
+            return args.func(args)
+        except (OSError, ValueError) as e:
+            print(f"dagger: error: {e}", file=sys.stderr)
+            return 2
+    from sim.eventlog import add_sink, configure_log, remove_sink
+
+    configure_log(
+        max_bytes=args.log_max_bytes,
+        rotate_interval=args.log_rotate_interval,
+        backup_count=args.log_backups,
+        compress=args.log_compress,
+        flush_interval=args.log_flush_interval,
+        fsync=args.log_fsync,
+        format=args.log_format,
+    )
+    forwarder = metrics_server = None
+    try:
+        if args.metrics_port is not None:
+            from sim.metrics import MetricsServer
+
+            metrics_server = MetricsServer(port=args.metrics_port).start()
+            print(f"dagger: serving metrics on {metrics_server.url}", file=sys.stderr)
+        if args.forward:
+            from sim.forward import Forwarder
+
+            forwarder = Forwarder(args.forward, format=args.forward_format, spool_dir=args.forward_spool,
+                                  allow_external=args.forward_allow_external)
+            add_sink(forwarder)
+        return args.func(args)
+    except (OSError, ValueError) as e:
+        print(f"dagger: error: {e}", file=sys.stderr)
+        return 2
+    finally:
+        if metrics_server is not None:
+            metrics_server.stop()
+        if forwarder is not None:
+            remove_sink(forwarder)
+            forwarder.close()
+            if forwarder.stats["spooled"]:
+                print(f"dagger: {forwarder.stats['spooled']} events spooled for later delivery", file=sys.stderr)
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -9,35 +9,26 @@ Features:
 - Registry tab: read-only queries on Windows; simulated JSON store on non-Windows
 - Files tab: create files with IOC-like names and content, compute SHA256
 - Mutex tab: create/release a named mutex (Windows) or file-lock (cross-platform)
-- Logs tab: view and save generated events for SIEM ingestion
+- Logs tab: view, search and save generated events, including compressed rotated segments
+- Stats tab: live rates, errors and latency percentiles; optional Prometheus endpoint
+
+Headless use (no Tk): see ``cli.py``, e.g. ``python cli.py run scenarios/example.json``.
 
 Safety: by default external network operations are blocked; user must explicitly
 allow external network usage. Run inside isolated lab VM.
 """
 import os
 import sys
-import json
-import socket
-import threading
-import hashlib
-import datetime
-import urllib.request
 import tkinter as tk
 from tkinter import ttk, messagebox, filedialog
 
+from sim.eventlog import LOG_DIR, LOG_PATH, safe_append_log
+
 IS_WINDOWS = sys.platform.startswith("win")
 
-LOG_DIR = os.path.join(os.path.dirname(__file__), "logs")
 os.makedirs(LOG_DIR, exist_ok=True)
-LOG_PATH = os.path.join(LOG_DIR, "ioc_sim.log")
-
-from tabs import NetworkTab, RegistryTab, FilesTab, MutexTab, LogsTab
 
-
-def safe_append_log(line: str):
-    ts = datetime.datetime.now(datetime.timezone.utc).isoformat()
-    with open(LOG_PATH, "a", encoding="utf-8") as f:
-        f.write(f"{ts} {line}\n")
+from tabs import NetworkTab, RegistryTab, FilesTab, MutexTab, LogsTab, StatsTab, UIEventBus
 
 
 class IOCSimulatorApp(tk.Tk):
@@ -47,6 +38,8 @@ class IOCSimulatorApp(tk.Tk):
         self.geometry("900x600")
 
         self.allow_external = tk.BooleanVar(value=False)
+        # worker threads never touch Tk directly; their output is drained on the main loop
+        self.ui = UIEventBus(self)
 
         self._build_ui()
         self._log("App started")
@@ -84,6 +77,9 @@ class IOCSimulatorApp(tk.Tk):
         self.logs_tab = LogsTab(nb, self, log_path=LOG_PATH)
         nb.add(self.logs_tab, text="Logs")
 
+        self.stats_tab = StatsTab(nb, self)
+        nb.add(self.stats_tab, text="Stats")
+
     def _open_log_folder(self):
         path = os.path.abspath(LOG_DIR)
         if IS_WINDOWS:
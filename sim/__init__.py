@@ -0,0 +1 @@
+"""Tk-free simulation logic shared by the GUI tabs and the headless CLI."""
@@ -0,0 +1,288 @@
+"""Single IOC actions used by both the GUI tabs and the scenario engine.
+
+Every action returns an ``(ok, event)`` tuple; ``event`` is the
+:class:`~sim.events.Event` that gets logged (``str(event)`` is the familiar
+message line). Failures are reported, never raised, so a bulk run keeps going
+when individual actions fail.
+"""
+import os
+import json
+import socket
+import urllib.parse
+
+from .events import Event
+from .hashing import DEFAULT_ALGORITHMS, get_cache, hash_data, hash_file
+from .metrics import timed
+from .registry import open_store
+
+IS_WINDOWS = os.name == 'nt'
+
+LOCAL_HOSTS = ("localhost", "127.0.0.1", "::1")
+
+
+def is_local_host(host: str) -> bool:
+    return bool(host) and (host in LOCAL_HOSTS or host.startswith("127."))
+
+
+def is_allowed(host: str, allow_external: bool) -> bool:
+    return allow_external or is_local_host(host)
+
+
+@timed("dns.resolve")
+def resolve_dns(host: str):
+    try:
+        ip = socket.gethostbyname(host)
+        return True, Event("dns", "resolve", "success", f"DNS resolved {host} -> {ip}", host=host, ip=ip)
+    except Exception as e:
+        return False, Event("dns", "resolve", "failure", f"DNS resolve error for {host}: {e}", host=host, error=str(e))
+
+
+@timed("tcp.connect")
+def tcp_connect(ip: str, port: int, timeout: float = 5, allow_external: bool = False):
+    if not is_allowed(ip, allow_external):
+        return False, Event("tcp", "connect", "failure", f"TCP connect blocked to {ip}:{port} - external network not allowed",
+                            ip=ip, port=port, error="blocked")
+    try:
+        with socket.create_connection((ip, port), timeout=timeout):
+            return True, Event("tcp", "connect", "success", f"TCP connect success to {ip}:{port}", ip=ip, port=port)
+    except Exception as e:
+        return False, Event("tcp", "connect", "failure", f"TCP connect failed to {ip}:{port} - {e}",
+                            ip=ip, port=port, error=str(e))
+
+
+@timed("http.get")
+def http_get(url: str, timeout: float = 8, allow_external: bool = False):
+    host = urllib.parse.urlparse(url).hostname
+    if host and not is_allowed(host, allow_external):
+        return False, Event("http", "get", "failure", f"HTTP GET blocked {url} - external network not allowed",
+                            url=url, error="blocked")
+    try:
+        # imported here so a plain 'import urllib.request' does not shadow the module-level urllib
+        from urllib.request import urlopen
+
+        with urlopen(url, timeout=timeout) as r:
+            info = r.read(512)
+            return True, Event("http", "get", "success", f"HTTP GET {url} status={r.status} len={len(info)}",
+                               url=url, status=r.status, length=len(info))
+    except Exception as e:
+        return False, Event("http", "get", "failure", f"HTTP GET failed {url} - {e}", url=url, error=str(e))
+
+
+def sha256_file(path: str) -> str:
+    return hash_file(path, ("sha256",))["sha256"]
+
+
+@timed("file.hash")
+def hash_artifact(path: str, algorithms=DEFAULT_ALGORITHMS, cache=None):
+    """Hash an existing file; ``cache`` defaults to the shared on-disk cache (pass False to always read).
+
+    A cache that is busy or unusable falls back to reading the file.
+    """
+    try:
+        if cache is None:
+            cache = get_cache()
+        digests = cache.hash(path, algorithms) if cache else hash_file(path, algorithms)
+        summary = " ".join(f"{k}={v}" for k, v in digests.items())
+        return True, Event("file", "hash", "success", f"Hashed file {path} {summary}", path=path, **digests)
+    except Exception as e:
+        return False, Event("file", "hash", "failure", f"File hash error for {path}: {e}", path=path, error=str(e))
+
+
+@timed("file.create")
+def create_file(folder: str, name: str, content: str = ""):
+    try:
+        os.makedirs(folder, exist_ok=True)
+        path = os.path.join(folder, name)
+        # same bytes text mode would write, hashed from memory instead of re-reading the file
+        data = content.replace("\n", os.linesep).encode("utf-8")
+        with open(path, "wb") as f:
+            f.write(data)
+        digests = hash_data(data)
+        return True, Event("file", "create", "success", f"Created file {path} sha256={digests['sha256']}", path=path,
+                           **digests)
+    except Exception as e:
+        return False, Event("file", "create", "failure", f"File create error: {e}", path=os.path.join(folder, name),
+                            error=str(e))
+
+
+@timed("registry.query")
+def query_registry(key: str, name: str = None, store_path: str = None):
+    try:
+        if IS_WINDOWS:
+            import winreg
+
+            parts = key.split("\\\\", 1)
+            hive_name = parts[0]
+            sub = parts[1] if len(parts) > 1 else ""
+            hive = getattr(winreg, hive_name)
+            with winreg.OpenKey(hive, sub) as k:
+                if name:
+                    value, _ = winreg.QueryValueEx(k, name)
+                    msg = f"Registry {key} {name} = {value}"
+                else:
+                    vals = []
+                    try:
+                        i = 0
+                        while True:
+                            v = winreg.EnumValue(k, i)
+                            vals.append(f"{v[0]}={v[1]}")
+                            i += 1
+                    except OSError:
+                        pass
+                    value = ";".join(vals)
+                    msg = f"Registry {key} values: {value}"
+        else:
+            store = open_store(store_path)
+            if name:
+                value = store.get_value(key, name, "<not present>")
+                msg = f"Simulated registry {key} {name} = {value}"
+            else:
+                value = json.dumps({n: d for n, (_, d) in store.values(key).items()}, default=_hex)
+                msg = f"Simulated registry {key} = {value}"
+        return True, Event("registry", "query", "success", msg, key=key, name=name, value=value)
+    except Exception as e:
+        return False, Event("registry", "query", "failure", f"Registry query error: {e}", key=key, name=name,
+                            error=str(e))
+
+
+def _hex(data):
+    return data.hex() if isinstance(data, (bytes, bytearray)) else str(data)
+
+
+@timed("registry.set")
+def set_registry(key: str, name: str, value, value_type: str = None, store_path: str = None):
+    """Write a value to the simulated registry (on every platform; the real registry is never modified)."""
+    try:
+        open_store(store_path).set_value(key, name, value, value_type)
+        return True, Event("registry", "set", "success", f"Simulated registry set {key} {name} = {value}",
+                           key=key, name=name, value=value)
+    except Exception as e:
+        return False, Event("registry", "set", "failure", f"Registry set error: {e}", key=key, name=name,
+                            error=str(e))
+
+
+@timed("registry.enum")
+def enum_registry(key: str, recursive: bool = False, store_path: str = None):
+    """List the subkeys of ``key`` in the simulated registry (every key below it with ``recursive``)."""
+    try:
+        store = open_store(store_path)
+        if recursive:
+            keys = [k for k, _ in store.walk(key)][1:]
+        else:
+            keys = store.subkeys(key)
+        return True, Event("registry", "enum", "success", f"Simulated registry {key} subkeys ({len(keys)}): "
+                           f"{', '.join(keys[:50])}{' ...' if len(keys) > 50 else ''}", key=key, count=len(keys))
+    except Exception as e:
+        return False, Event("registry", "enum", "failure", f"Registry enumerate error: {e}", key=key, error=str(e))
+
+
+_kernel32 = None
+
+
+def _win32():
+    global _kernel32
+    if _kernel32 is None:
+        import ctypes
+        from ctypes import wintypes
+
+        kernel32 = ctypes.WinDLL('kernel32', use_last_error=True)
+        kernel32.CreateMutexW.argtypes = [wintypes.LPVOID, wintypes.BOOL, wintypes.LPCWSTR]
+        kernel32.CreateMutexW.restype = wintypes.HANDLE
+        kernel32.CloseHandle.argtypes = [wintypes.HANDLE]
+        _kernel32 = kernel32
+    return _kernel32
+
+
+ERROR_ALREADY_EXISTS = 183
+
+LOCK_DIR = '/tmp'
+
+
+class LockHandle:
+    """A held lockfile: the open descriptor carries an exclusive ``flock``."""
+
+    __slots__ = ("path", "fd")
+
+    def __init__(self, path: str, fd: int):
+        self.path = path
+        self.fd = fd
+
+    def __str__(self):
+        return self.path
+
+
+def lock_path(name: str) -> str:
+    return os.path.join(LOCK_DIR, f"dagger_mutex_{name.replace(os.sep, '_')}.lock")
+
+
+@timed("mutex.create", ok=lambda r: r[1])
+def create_mutex(name: str):
+    """Create a named mutex (Windows) or an flock-held lockfile; returns ``(token, ok, event)``.
+
+    ``token`` is the handle or :class:`LockHandle` to hand to
+    :func:`release_mutex`, or ``None`` when creation failed. As with
+    ``CreateMutex`` returning ``ERROR_ALREADY_EXISTS``, a name that is
+    already held (by this or any other process) is reported as existing.
+    """
+    try:
+        if IS_WINDOWS:
+            import ctypes
+
+            kernel32 = _win32()
+            handle = kernel32.CreateMutexW(None, False, name)
+            if not handle:
+                raise OSError("CreateMutex failed")
+            if ctypes.get_last_error() == ERROR_ALREADY_EXISTS:
+                kernel32.CloseHandle(handle)
+                raise FileExistsError(name)
+            return handle, True, Event("mutex", "create", "success", f"Created Windows mutex '{name}'", name=name)
+        import fcntl
+
+        lockpath = lock_path(name)
+        while True:
+            fd = os.open(lockpath, os.O_RDWR | os.O_CREAT, 0o644)
+            try:
+                fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                st = os.fstat(fd)
+                try:
+                    current = os.stat(lockpath)
+                except FileNotFoundError:
+                    current = None
+            except BlockingIOError:
+                os.close(fd)
+                raise FileExistsError(lockpath)
+            except BaseException:
+                os.close(fd)
+                raise
+            if current is not None and (current.st_dev, current.st_ino) == (st.st_dev, st.st_ino):
+                break
+            # the holder released (and unlinked) it between our open and flock; lock the new file instead
+            os.close(fd)
+        if st.st_size:
+            os.ftruncate(fd, 0)
+        os.write(fd, str(os.getpid()).encode())
+        return LockHandle(lockpath, fd), True, Event("mutex", "create", "success", f"Created lockfile '{lockpath}'",
+                                                      name=name, path=lockpath)
+    except FileExistsError:
+        return None, False, Event("mutex", "create", "failure", f"Mutex/lock '{name}' already exists",
+                                  name=name, error="already exists")
+    except Exception as e:
+        return None, False, Event("mutex", "create", "failure", f"Mutex create error: {e}", name=name, error=str(e))
+
+
+@timed("mutex.release")
+def release_mutex(token):
+    try:
+        if token is None:
+            return False, Event("mutex", "release", "failure", "No mutex/lock to release", error="nothing held")
+        if IS_WINDOWS:
+            _win32().CloseHandle(token)
+            return True, Event("mutex", "release", "success", "Released Windows mutex")
+        # unlink while still holding the lock; create_mutex re-checks the inode after locking
+        try:
+            os.remove(token.path)
+        finally:
+            os.close(token.fd)
+        return True, Event("mutex", "release", "success", f"Removed lockfile {token.path}", path=token.path)
+    except Exception as e:
+        return False, Event("mutex", "release", "failure", f"Mutex release error: {e}", error=str(e))
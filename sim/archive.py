@@ -0,0 +1,266 @@
+"""Block-framed gzip archives of rotated log segments.
+
+A compressed segment ``<segment>.gz`` is a series of independent gzip
+members, each holding up to ``BLOCK`` bytes of whole log lines. Like BGZF,
+every member header carries an extra field (subfield ``DG``) with the
+member's compressed and uncompressed size, so a reader finds any byte
+offset by hopping from header to header and inflates a single block
+instead of the whole file. The result is still a plain gzip file: ``zcat``
+and :mod:`gzip` read it as usual.
+
+:func:`open_segment` returns a seekable binary file over the uncompressed
+lines of a plain or compressed segment, so the search index (whose offsets
+stay uncompressed offsets), the Logs tab and replay read archives in
+place. :class:`Compressor` compresses segments on a background thread.
+
+Several processes may write the same log. Each writer holds a shared lock
+on the file it appends to, so a segment is only compressed once no writer
+has it open any more, and the final swap of plain segment for archive
+happens under the log's rotation lock (see :class:`~sim.eventlog.LogWriter`).
+"""
+import io
+import os
+import gzip
+import zlib
+import queue
+import bisect
+import struct
+import tempfile
+import contextlib
+import threading
+
+from .filelock import lock, locked
+
+SUFFIX = ".gz"
+BLOCK = 1 << 16
+
+# gzip member header with FEXTRA set and one "DG" subfield: member size, uncompressed size
+_HEADER = struct.Struct("<4sIBBH2sHII")
+_MAGIC = b"\x1f\x8b\x08\x04"
+_TRAILER = struct.Struct("<II")
+
+
+def is_compressed(path: str) -> bool:
+    return path.endswith(SUFFIX)
+
+
+def _member(data: bytes, level: int) -> bytes:
+    z = zlib.compressobj(level, zlib.DEFLATED, -zlib.MAX_WBITS)
+    body = z.compress(data) + z.flush()
+    size = _HEADER.size + len(body) + _TRAILER.size
+    header = _HEADER.pack(_MAGIC, 0, 0, 255, 12, b"DG", 8, size, len(data))
+    return header + body + _TRAILER.pack(zlib.crc32(data), len(data) & 0xFFFFFFFF)
+
+
+def _blocks(f, block: int):
+    """Chunks of about ``block`` bytes that end on a line boundary."""
+    pending = b""
+    while True:
+        data = f.read(block)
+        if not data:
+            break
+        data = pending + data
+        end = data.rfind(b"\n") + 1
+        if not end:
+            # a single line longer than one block goes into one oversized block
+            pending = data
+            continue
+        yield data[:end]
+        pending = data[end:]
+    if pending:
+        yield pending
+
+
+def compress_segment(path: str, level: int = 6, block: int = BLOCK, lock_path: str = None) -> str:
+    """Compress ``path`` to ``path.gz`` (and move its index along); returns the new path.
+
+    The archive is written under a temporary name and only replaces the
+    plain segment once complete, so readers always see one whole copy.
+    Raises ``BlockingIOError`` while a writer still has the segment open;
+    returns ``None`` if the segment disappeared (pruned, or compressed by
+    another process). ``lock_path`` is the log's rotation lock, held for
+    the final swap.
+    """
+    from .logindex import index_path
+
+    target = path + SUFFIX
+    with open(path, "rb") as src:
+        lock(src.fileno(), blocking=False)
+        try:
+            current = os.stat(path)
+        except FileNotFoundError:
+            return None
+        if current.st_ino != os.fstat(src.fileno()).st_ino:
+            return None
+        # a private name, so two compressors racing on one segment cannot write into each other's file
+        fd, tmp = tempfile.mkstemp(prefix=os.path.basename(target) + ".", suffix=".tmp",
+                                   dir=os.path.dirname(target) or ".")
+        try:
+            with open(fd, "wb") as dst:
+                # mkstemp creates it 0600; the archive keeps the segment's permissions
+                os.chmod(tmp, current.st_mode & 0o777)
+                for data in _blocks(src, block):
+                    dst.write(_member(data, level))
+                dst.flush()
+                os.fsync(dst.fileno())
+            # the segment stays locked until it is gone, so no other compressor can start on it meanwhile
+            with locked(lock_path) if lock_path else contextlib.nullcontext():
+                if not os.path.exists(path):
+                    # pruned while we were compressing it
+                    return None
+                if os.path.exists(index_path(path)):
+                    os.replace(index_path(path), index_path(target))
+                os.replace(tmp, target)
+                tmp = None
+                os.remove(path)
+        finally:
+            if tmp is not None:
+                os.remove(tmp)
+    return target
+
+
+class BlockGzipReader(io.RawIOBase):
+    """Seekable reader over the uncompressed bytes of a block-framed archive."""
+
+    def __init__(self, path: str):
+        self._file = open(path, "rb")
+        self._starts = []  # uncompressed offset of each member
+        self._offsets = []  # compressed offset of each member
+        self._sizes = []
+        self.size = 0
+        self._pos = 0
+        self._cached = -1
+        self._data = b""
+        try:
+            self._scan()
+        except Exception:
+            self._file.close()
+            raise
+
+    def _scan(self):
+        f = self._file
+        end = os.fstat(f.fileno()).st_size
+        offset = 0
+        while offset < end:
+            f.seek(offset)
+            raw = f.read(_HEADER.size)
+            if len(raw) < _HEADER.size:
+                raise ValueError(f"{f.name}: truncated archive")
+            magic, _, _, _, xlen, sub, slen, size, usize = _HEADER.unpack(raw)
+            if magic != _MAGIC or xlen != 12 or sub != b"DG" or slen != 8:
+                raise ValueError(f"{f.name}: not a block-framed archive")
+            self._starts.append(self.size)
+            self._offsets.append(offset)
+            self._sizes.append(size)
+            self.size += usize
+            offset += size
+
+    def _block(self, i: int) -> bytes:
+        if i != self._cached:
+            self._file.seek(self._offsets[i] + _HEADER.size)
+            body = self._file.read(self._sizes[i] - _HEADER.size - _TRAILER.size)
+            self._data = zlib.decompress(body, -zlib.MAX_WBITS)
+            self._cached = i
+        return self._data
+
+    def readable(self):
+        return True
+
+    def seekable(self):
+        return True
+
+    def tell(self):
+        return self._pos
+
+    def seek(self, offset, whence=io.SEEK_SET):
+        if whence == io.SEEK_CUR:
+            offset += self._pos
+        elif whence == io.SEEK_END:
+            offset += self.size
+        if offset < 0:
+            raise ValueError("negative seek position")
+        self._pos = offset
+        return offset
+
+    def readinto(self, b):
+        if self._pos >= self.size or not len(b):
+            return 0
+        i = bisect.bisect_right(self._starts, self._pos) - 1
+        data = self._block(i)
+        skip = self._pos - self._starts[i]
+        n = min(len(b), len(data) - skip)
+        b[:n] = data[skip:skip + n]
+        self._pos += n
+        return n
+
+    def close(self):
+        self._file.close()
+        super().close()
+
+
+def open_segment(path: str):
+    """Binary, seekable file over the uncompressed content of a plain or compressed segment."""
+    if not is_compressed(path):
+        return open(path, "rb")
+    try:
+        return io.BufferedReader(BlockGzipReader(path), buffer_size=BLOCK)
+    except ValueError:
+        # an ordinary gzip file: readable, but seeking inflates from the start
+        return gzip.open(path, "rb")
+
+
+def segment_size(path: str) -> int:
+    """Uncompressed size of a plain or compressed segment."""
+    if not is_compressed(path):
+        return os.path.getsize(path)
+    with open_segment(path) as f:
+        return f.seek(0, io.SEEK_END)
+
+
+class Compressor:
+    """Background thread compressing segments handed to :meth:`submit`, one at a time.
+
+    A segment some writer still has open is retried every ``retry`` seconds.
+    """
+
+    def __init__(self, level: int = 6, lock_path: str = None, retry: float = 1.0):
+        self.level = level
+        self.lock_path = lock_path
+        self.retry = retry
+        self.compressed = 0
+        self._queue = queue.Queue()
+        self._thread = threading.Thread(target=self._run, name="LogCompressor", daemon=True)
+        self._thread.start()
+
+    def submit(self, path: str):
+        self._queue.put(path)
+
+    def close(self, timeout: float = None):
+        """Finish the submitted segments within ``timeout``, then stop.
+
+        Whatever is left stays uncompressed for a later writer to pick up.
+        """
+        self._queue.put(None)
+        self._thread.join(timeout)
+
+    def _run(self):
+        deferred = []
+        while True:
+            try:
+                path = self._queue.get(timeout=self.retry if deferred else None)
+            except queue.Empty:
+                for path in deferred:
+                    self._queue.put(path)
+                deferred = []
+                continue
+            if path is None:
+                return
+            try:
+                if compress_segment(path, self.level, lock_path=self.lock_path):
+                    self.compressed += 1
+            except BlockingIOError:
+                # a writer has not noticed the rotation yet and still appends to it
+                deferred.append(path)
+            except OSError:
+                # left uncompressed; the next writer on this log picks it up again
+                continue
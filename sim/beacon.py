@@ -0,0 +1,198 @@
+"""C2-style HTTP beacon simulator.
+
+Many simulated implants check in on a jittered interval. A single scheduler
+thread keeps the next check-in of every beacon in a heap and hands due
+check-ins to a small worker pool; requests go through a keep-alive
+connection pool, so hundreds of beacons need only ``workers`` threads and
+sockets.
+
+URIs may contain ``{id}`` (beacon id) and ``{seq}`` (check-in number), e.g.
+``/api/v1/{id}/tasks?s={seq}``.
+"""
+import time
+import heapq
+import random
+import threading
+import http.client
+import urllib.parse
+from concurrent.futures import ThreadPoolExecutor
+
+from .actions import is_allowed
+from .events import Event
+from .metrics import observe
+from .stats import rate_summary
+
+DEFAULT_USER_AGENTS = (
+    "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0 Safari/537.36",
+    "Mozilla/5.0 (Windows NT 6.1; WOW64; Trident/7.0; rv:11.0) like Gecko",
+    "Microsoft-CryptoAPI/10.0",
+)
+
+
+class ConnectionPool:
+    """Keep-alive ``http.client`` connections, pooled per (scheme, host, port)."""
+
+    def __init__(self, maxsize: int = 10, timeout: float = 8):
+        self.maxsize = maxsize
+        self.timeout = timeout
+        self.created = 0
+        self._idle = {}
+        self._lock = threading.Lock()
+
+    def _get(self, key):
+        with self._lock:
+            idle = self._idle.get(key)
+            if idle:
+                return idle.pop(), True
+            self.created += 1
+        scheme, host, port = key
+        cls = http.client.HTTPSConnection if scheme == "https" else http.client.HTTPConnection
+        return cls(host, port, timeout=self.timeout), False
+
+    def _put(self, key, conn):
+        with self._lock:
+            idle = self._idle.setdefault(key, [])
+            if len(idle) < self.maxsize:
+                idle.append(conn)
+                return
+        conn.close()
+
+    def request(self, method: str, url: str, headers=None, body=None):
+        """Send one request and return ``(status, body_length)``."""
+        parts = urllib.parse.urlsplit(url)
+        key = (parts.scheme, parts.hostname, parts.port or (443 if parts.scheme == "https" else 80))
+        path = parts.path or "/"
+        if parts.query:
+            path += "?" + parts.query
+        while True:
+            conn, reused = self._get(key)
+            try:
+                conn.request(method, path, body=body, headers=headers or {})
+                resp = conn.getresponse()
+                length = len(resp.read())
+            except (http.client.HTTPException, OSError):
+                conn.close()
+                if reused:
+                    # the server may have dropped an idle keep-alive connection; retry on a fresh one
+                    continue
+                raise
+            if resp.will_close:
+                conn.close()
+            else:
+                self._put(key, conn)
+            return resp.status, length
+
+    def close(self):
+        with self._lock:
+            conns = [c for idle in self._idle.values() for c in idle]
+            self._idle.clear()
+        for c in conns:
+            c.close()
+
+
+class BeaconSimulator:
+    def __init__(self, base_url: str, beacons: int = 10, interval: float = 30.0, jitter: float = 0.2,
+                 uris=None, user_agents=None, checkins: int = None, duration: float = None,
+                 workers: int = None, timeout: float = 8, log=None, allow_external: bool = False, seed=None):
+        parts = urllib.parse.urlsplit(base_url)
+        if parts.scheme not in ("http", "https") or not parts.hostname:
+            raise ValueError(f"invalid beacon URL {base_url!r}")
+        if not is_allowed(parts.hostname, allow_external):
+            raise PermissionError(f"beacon host {parts.hostname} is external; external network not allowed")
+        if checkins is None and duration is None:
+            raise ValueError("either checkins or duration is required")
+        self.base_url = base_url.rstrip("/")
+        self.beacons = beacons
+        self.interval = interval
+        self.jitter = jitter
+        self.uris = list(uris or [parts.path or "/"])
+        self.user_agents = list(user_agents or DEFAULT_USER_AGENTS)
+        self.checkins = checkins
+        self.duration = duration
+        self.workers = workers or min(32, beacons)
+        self.log = log
+        self.pool = ConnectionPool(maxsize=self.workers, timeout=timeout)
+        self._rng = random.Random(seed)
+        self._ids = ["%08x" % self._rng.getrandbits(32) for _ in range(beacons)]
+        self._heap = []
+        self._cond = threading.Condition()
+        self._inflight = 0
+        self._stopped = False
+        self._deadline = None
+        self._latencies = []
+        self._counts = [0, 0]
+
+    def _url(self, uri: str) -> str:
+        origin = urllib.parse.urlsplit(self.base_url)
+        return f"{origin.scheme}://{origin.netloc}{uri if uri.startswith('/') else '/' + uri}"
+
+    def _next_delay(self) -> float:
+        return max(0.0, self.interval * (1 + self._rng.uniform(-self.jitter, self.jitter)))
+
+    def _checkin(self, beacon: int, seq: int):
+        bid = self._ids[beacon]
+        uri = self.uris[(beacon + seq) % len(self.uris)].replace("{id}", bid).replace("{seq}", str(seq))
+        ua = self.user_agents[self._rng.randrange(len(self.user_agents))]
+        url = self._url(uri)
+        t0 = time.perf_counter()
+        try:
+            status, length = self.pool.request("GET", url, headers={"User-Agent": ua})
+            ok = True
+            event = Event("http", "beacon", "success", f"HTTP beacon {bid} GET {url} status={status} len={length} ua={ua!r}",
+                          url=url, method="GET", status=status, length=length, user_agent=ua, beacon_id=bid, seq=seq)
+        except Exception as e:
+            ok = False
+            event = Event("http", "beacon", "failure", f"HTTP beacon {bid} GET failed {url} - {e}",
+                          url=url, method="GET", user_agent=ua, beacon_id=bid, seq=seq, error=str(e))
+        elapsed = time.perf_counter() - t0
+        observe("http.beacon", ok, elapsed)
+        if self.log:
+            self.log(event)
+        with self._cond:
+            self._inflight -= 1
+            if ok:
+                self._counts[0] += 1
+                self._latencies.append(elapsed)
+            else:
+                self._counts[1] += 1
+            more = self.checkins is None or seq + 1 < self.checkins
+            due = time.monotonic() + self._next_delay()
+            if more and (self._deadline is None or due < self._deadline):
+                heapq.heappush(self._heap, (due, beacon, seq + 1))
+            self._cond.notify()
+
+    def stop(self):
+        with self._cond:
+            self._stopped = True
+            self._cond.notify_all()
+
+    def run(self) -> dict:
+        start = time.monotonic()
+        self._deadline = start + self.duration if self.duration is not None else None
+        # spread the first check-ins over one interval instead of firing them all at once
+        first = ((start + self._rng.uniform(0, self.interval), b, 0) for b in range(self.beacons))
+        self._heap = [entry for entry in first if self._deadline is None or entry[0] < self._deadline]
+        heapq.heapify(self._heap)
+        with ThreadPoolExecutor(max_workers=self.workers) as executor:
+            with self._cond:
+                while not self._stopped:
+                    if not self._heap:
+                        if self._inflight == 0:
+                            break
+                        self._cond.wait()
+                        continue
+                    wait = self._heap[0][0] - time.monotonic()
+                    if wait > 0:
+                        self._cond.wait(wait)
+                        continue
+                    if self._inflight >= self.workers:
+                        self._cond.wait()
+                        continue
+                    _, beacon, seq = heapq.heappop(self._heap)
+                    self._inflight += 1
+                    executor.submit(self._checkin, beacon, seq)
+        self.pool.close()
+        result = rate_summary(self._counts[0], self._counts[1], time.monotonic() - start, self._latencies)
+        result["beacons"] = self.beacons
+        result["connections"] = self.pool.created
+        return result
@@ -0,0 +1,209 @@
+"""Headless benchmark suite.
+
+Every benchmark runs one simulator primitive against local targets only
+(the stubs from :mod:`sim.stubs`, a scratch folder, a scratch registry
+store and log) and reports :func:`~sim.stats.rate_summary` numbers: ops/s
+as ``rate`` and p50/p95/p99/max latency in ``latency_ms``. Results are
+plain JSON; :func:`compare` checks a run against a saved baseline::
+
+    python cli.py bench -o bench/today.json --compare bench/baseline.json
+"""
+import os
+import time
+import shutil
+import platform
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+
+from . import actions
+from .eventlog import flush_logs, safe_append_log
+from .events import Event, iso
+from .stats import rate_summary
+
+
+def measure(op, count: int, workers: int = 1, warmup: int = 0) -> dict:
+    """Call ``op(i)`` for ``i`` in ``range(count)`` over ``workers`` threads.
+
+    ``op`` returns whether the operation succeeded; only successful calls
+    contribute latencies.
+    """
+    for i in range(warmup):
+        op(count + i)
+    latencies = [[] for _ in range(workers)]
+    failed = [0] * workers
+
+    def run(w):
+        clock = time.perf_counter
+        done = latencies[w]
+        for i in range(w, count, workers):
+            t0 = clock()
+            if op(i):
+                done.append(clock() - t0)
+            else:
+                failed[w] += 1
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        list(pool.map(run, range(workers)))
+    elapsed = time.perf_counter() - start
+    done = [v for l in latencies for v in l]
+    return rate_summary(len(done), sum(failed), elapsed, done)
+
+
+def bench_dns(count, workers, scratch):
+    from .dnsburst import run_dns_burst
+    from .stubs import StubDNSServer
+
+    with StubDNSServer() as dns:
+        names = [f"bench{i}.dagger.test" for i in range(count)]
+        return run_dns_burst(names, concurrency=workers * 16, nameserver=dns.host, port=dns.port, timeout=2.0)
+
+
+def bench_tcp(count, workers, scratch):
+    from .stubs import StubTCPListener
+
+    with StubTCPListener() as listener:
+        return measure(lambda i: actions.tcp_connect(listener.host, listener.port, timeout=2)[0], count, workers,
+                       warmup=10)
+
+
+def bench_http(count, workers, scratch):
+    from .stubs import StubHTTPServer
+
+    with StubHTTPServer() as server:
+        return measure(lambda i: actions.http_get(f"{server.url}/bench/{i}", timeout=5)[0], count, workers,
+                       warmup=10)
+
+
+def bench_file(count, workers, scratch):
+    folder = os.path.join(scratch, "files")
+    content = "All of your files have been encrypted!\n" * 16
+    return measure(lambda i: actions.create_file(folder, f"bench_{i}.txt", content)[0], count, workers, warmup=10)
+
+
+def bench_hash(count, workers, scratch):
+    folder = os.path.join(scratch, "hash")
+    os.makedirs(folder, exist_ok=True)
+    block = os.urandom(64 << 10)
+    paths = []
+    for i in range(min(count, 64)):
+        path = os.path.join(folder, f"blob_{i}.bin")
+        with open(path, "wb") as f:
+            f.write(block)
+        paths.append(path)
+    return measure(lambda i: actions.hash_artifact(paths[i % len(paths)], cache=False)[0], count, workers, warmup=10)
+
+
+def bench_registry(count, workers, scratch):
+    store = os.path.join(scratch, "registry.json")
+    key = "HKCU\\Software\\Microsoft\\Windows\\CurrentVersion\\Run"
+    actions.set_registry(key, "updater", "C:\\Users\\Public\\updater.exe", store_path=store)
+    return measure(lambda i: actions.query_registry(key, "updater", store_path=store)[0], count, workers, warmup=10)
+
+
+def bench_mutex(count, workers, scratch):
+    pid = os.getpid()
+
+    def op(i):
+        token, ok, _ = actions.create_mutex(f"dagger_bench_{pid}_{i}")
+        if ok:
+            actions.release_mutex(token)
+        return ok
+
+    return measure(op, count, workers, warmup=10)
+
+
+def bench_log(count, workers, scratch):
+    path = os.path.join(scratch, "bench.log")
+    event = Event("dns", "resolve", "success", "DNS resolved bench.dagger.test -> 127.0.0.1",
+                  host="bench.dagger.test", ip="127.0.0.1")
+
+    def op(i):
+        safe_append_log(event, path)
+        return True
+
+    start = time.perf_counter()
+    result = measure(op, count, workers, warmup=100)
+    flush_logs()
+    # the rate counts until every line is on disk, the latencies are the callers' enqueue cost
+    elapsed = time.perf_counter() - start
+    result["elapsed"] = round(elapsed, 3)
+    result["rate"] = round(result["sent"] / elapsed, 1) if elapsed > 0 else 0.0
+    return result
+
+
+# name -> (function, default operation count)
+BENCHMARKS = {
+    "dns": (bench_dns, 5000),
+    "tcp": (bench_tcp, 2000),
+    "http": (bench_http, 1000),
+    "file": (bench_file, 2000),
+    "hash": (bench_hash, 2000),
+    "registry": (bench_registry, 20000),
+    "mutex": (bench_mutex, 5000),
+    "log": (bench_log, 100000),
+}
+
+
+def run_benchmarks(names=None, count: int = None, workers: int = 4, progress=None) -> dict:
+    """Run the named benchmarks (all by default); ``count`` overrides every default count."""
+    names = list(names or BENCHMARKS)
+    unknown = [n for n in names if n not in BENCHMARKS]
+    if unknown:
+        raise ValueError(f"unknown benchmark {unknown[0]!r}; expected one of {', '.join(BENCHMARKS)}")
+    started = iso(time.time())
+    scratch = tempfile.mkdtemp(prefix="dagger_bench_")
+    results = {}
+    try:
+        for name in names:
+            func, default = BENCHMARKS[name]
+            n = count or default
+            if progress:
+                progress(name, n)
+            results[name] = func(n, workers, scratch)
+            results[name]["count"] = n
+    finally:
+        shutil.rmtree(scratch, ignore_errors=True)
+    return {
+        "started": started,
+        "host": {
+            "python": platform.python_version(),
+            "implementation": platform.python_implementation(),
+            "platform": platform.platform(),
+            "machine": platform.machine(),
+            "cpus": os.cpu_count(),
+        },
+        "workers": workers,
+        "results": results,
+    }
+
+
+def compare(baseline: dict, current: dict, threshold: float = 0.2) -> list:
+    """Regressions of ``current`` against ``baseline``.
+
+    A benchmark regresses when its rate falls, or its p99 latency grows, by
+    more than ``threshold`` (a fraction), or when it starts failing
+    operations. Returns one message per regression.
+    """
+    found = []
+    for name, now in current["results"].items():
+        before = baseline.get("results", {}).get(name)
+        if not before:
+            continue
+        if before["rate"] and now["rate"] < before["rate"] * (1 - threshold):
+            found.append(f"{name}: rate {before['rate']}/s -> {now['rate']}/s")
+        p99_before, p99_now = before["latency_ms"]["p99"], now["latency_ms"]["p99"]
+        if p99_before and p99_now > p99_before * (1 + threshold):
+            found.append(f"{name}: p99 {p99_before}ms -> {p99_now}ms")
+        if now["failed"] and not before["failed"]:
+            found.append(f"{name}: {now['failed']} failed operations")
+    return found
+
+
+def format_table(report: dict) -> str:
+    lines = [f"{'benchmark':<10} {'count':>8} {'ops/s':>10} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'failed':>7}"]
+    for name, r in report["results"].items():
+        lat = r["latency_ms"]
+        lines.append(f"{name:<10} {r['count']:>8} {r['rate']:>10} {lat['p50']:>9} {lat['p95']:>9} {lat['p99']:>9} "
+                     f"{r['failed']:>7}")
+    return "\n".join(lines)
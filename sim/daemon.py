@@ -0,0 +1,264 @@
+"""Long-running job server for orchestration scripts.
+
+Starting a Python interpreter and importing the simulators costs more than
+many short jobs take to run. ``cli.py daemon`` pays that once: it warms
+up the simulator modules and then accepts jobs on a local socket (a Unix
+socket under ``logs/``, or ``127.0.0.1:47110`` where Unix sockets are not
+available). A job is a ``cli.py`` command line; ``cli.py submit`` sends one
+and relays its output and exit code::
+
+    python cli.py daemon &
+    python cli.py submit files /tmp/ioc --preset encrypted -n 500
+
+Protocol: one JSON object per line in each direction. The client sends
+``{"argv": [...]}`` (or ``{"op": "ping"}`` / ``{"op": "shutdown"}``); the
+daemon streams ``{"out": text}`` / ``{"err": text}`` frames while the job
+runs and ends with ``{"rc": code}``, sent once the job's log lines are
+flushed. Relative paths in a job resolve against the daemon's working
+directory.
+
+Jobs share the daemon's process: its log options (``--log-format``,
+rotation...), its ``--forward`` target and its metrics endpoint. A job
+may pick its own ``--log`` file, but a job asking for different
+process-wide options is refused; start another daemon for those.
+"""
+import os
+import sys
+import json
+import time
+import socket
+import threading
+
+DEFAULT_PORT = 47110
+
+# imported up front so the first job does not pay for them
+WARM_MODULES = ("sim.actions", "sim.scenario", "sim.dnsburst", "sim.sweep", "sim.beacon", "sim.filegen",
+                "sim.bigfile", "sim.hashing", "sim.registry", "sim.mutexes", "sim.replay", "sim.forward")
+
+
+def default_address() -> str:
+    if hasattr(socket, "AF_UNIX") and os.name != "nt":
+        return os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "logs", "dagger.sock")
+    return f"127.0.0.1:{DEFAULT_PORT}"
+
+
+def _parse_address(address: str):
+    """``host:port`` is TCP (loopback only), anything else a Unix socket path."""
+    host, sep, port = address.rpartition(":")
+    if sep and port.isdigit() and os.sep not in address:
+        return socket.AF_INET, (host or "127.0.0.1", int(port))
+    return socket.AF_UNIX, address
+
+
+def _connect(address: str, timeout: float = None):
+    family, addr = _parse_address(address)
+    sock = socket.socket(family, socket.SOCK_STREAM)
+    sock.settimeout(timeout)
+    try:
+        sock.connect(addr)
+    except OSError as e:
+        sock.close()
+        raise OSError(f"no DAGGER daemon at {address} ({e}); start one with 'cli.py daemon'")
+    sock.settimeout(None)
+    return sock
+
+
+def request(message: dict, address: str = None, out=None, err=None) -> dict:
+    """Send one request and return the final frame; ``out``/``err`` receive streamed output."""
+    address = address or default_address()
+    with _connect(address, timeout=5) as sock, sock.makefile("rwb") as f:
+        f.write(json.dumps(message).encode("utf-8") + b"\n")
+        f.flush()
+        for line in f:
+            frame = json.loads(line)
+            if "out" in frame:
+                (out or sys.stdout).write(frame["out"])
+            elif "err" in frame:
+                (err or sys.stderr).write(frame["err"])
+            else:
+                return frame
+    raise OSError(f"DAGGER daemon at {address} closed the connection")
+
+
+def submit(argv, address: str = None) -> int:
+    """Run a ``cli.py`` command line in the daemon; returns its exit code."""
+    frame = request({"argv": list(argv)}, address)
+    if "error" in frame:
+        raise ValueError(frame["error"])
+    return frame["rc"]
+
+
+class _Router:
+    """``sys.stdout``/``sys.stderr`` stand-in sending a job thread's output to its client."""
+
+    def __init__(self, stream, key: str):
+        self._stream = stream
+        self._key = key
+        self._local = threading.local()
+
+    def bind(self, send):
+        self._local.send = send
+
+    def unbind(self):
+        self._local.send = None
+
+    def write(self, text):
+        send = getattr(self._local, "send", None)
+        if send is None:
+            return self._stream.write(text)
+        if text:
+            send({self._key: text})
+        return len(text)
+
+    def flush(self):
+        if getattr(self._local, "send", None) is None:
+            self._stream.flush()
+
+    def __getattr__(self, name):
+        return getattr(self._stream, name)
+
+
+class JobServer:
+    """Accept jobs on ``address`` and run each with ``handler(argv) -> exit code``.
+
+    At most ``jobs`` run at once; further requests wait their turn.
+    """
+
+    def __init__(self, handler, address: str = None, jobs: int = 4, reserved=("daemon", "submit")):
+        self.handler = handler
+        self.address = address or default_address()
+        self.reserved = reserved
+        self.started = time.time()
+        self.completed = 0
+        self.active = 0
+        self._slots = threading.BoundedSemaphore(jobs)
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._out = _Router(sys.stdout, "out")
+        self._err = _Router(sys.stderr, "err")
+        family, addr = _parse_address(self.address)
+        if family == socket.AF_UNIX:
+            os.makedirs(os.path.dirname(os.path.abspath(addr)), exist_ok=True)
+            self._unlink_stale(addr)
+        self.sock = socket.socket(family, socket.SOCK_STREAM)
+        if family == socket.AF_INET:
+            if addr[0] not in ("127.0.0.1", "localhost"):
+                raise PermissionError("the daemon only listens on loopback")
+            self.sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        self.sock.bind(addr)
+        if family == socket.AF_UNIX:
+            os.chmod(addr, 0o600)
+        self.sock.listen(128)
+
+    def _unlink_stale(self, path: str):
+        if not os.path.exists(path):
+            return
+        probe = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        try:
+            probe.connect(path)
+        except OSError:
+            os.remove(path)
+        else:
+            raise OSError(f"a DAGGER daemon is already listening at {path}")
+        finally:
+            probe.close()
+
+    def warm(self, modules=WARM_MODULES):
+        import importlib
+
+        for name in modules:
+            try:
+                importlib.import_module(name)
+            except ImportError:
+                # optional dependencies only matter to the jobs that use them
+                continue
+
+    def status(self) -> dict:
+        return {"pid": os.getpid(), "address": self.address, "uptime": round(time.time() - self.started, 1),
+                "completed": self.completed, "active": self.active}
+
+    def serve_forever(self):
+        sys.stdout, sys.stderr = self._out, self._err
+        try:
+            while not self._stop.is_set():
+                try:
+                    conn, _ = self.sock.accept()
+                except OSError:
+                    break
+                threading.Thread(target=self._serve, args=(conn,), daemon=True).start()
+        finally:
+            sys.stdout, sys.stderr = self._out._stream, self._err._stream
+            self.close()
+
+    def shutdown(self):
+        self._stop.set()
+        # unblock accept()
+        try:
+            family, addr = _parse_address(self.address)
+            with socket.socket(family, socket.SOCK_STREAM) as s:
+                s.connect(addr)
+        except OSError:
+            pass
+
+    def close(self):
+        self.sock.close()
+        family, addr = _parse_address(self.address)
+        if family == socket.AF_UNIX and os.path.exists(addr):
+            os.remove(addr)
+
+    def _serve(self, conn):
+        with conn, conn.makefile("rwb") as f:
+            lock = threading.Lock()
+
+            def send(frame):
+                data = json.dumps(frame).encode("utf-8") + b"\n"
+                with lock:
+                    f.write(data)
+                    f.flush()
+
+            try:
+                line = f.readline()
+                if not line:
+                    return
+                message = json.loads(line)
+                op = message.get("op", "run")
+                if op == "ping":
+                    send(dict(self.status(), rc=0))
+                elif op == "shutdown":
+                    send(dict(self.status(), rc=0))
+                    self.shutdown()
+                elif op == "run":
+                    send({"rc": self._run(message.get("argv") or [], send)})
+                else:
+                    send({"rc": 2, "error": f"unknown op {op!r}"})
+            except (OSError, ValueError) as e:
+                # client went away or sent garbage; nothing useful to answer
+                try:
+                    send({"rc": 2, "error": str(e)})
+                except OSError:
+                    pass
+
+    def _run(self, argv, send) -> int:
+        if not argv or argv[0] in self.reserved:
+            send({"err": f"dagger: error: '{argv[0] if argv else ''}' cannot run inside the daemon\n"})
+            return 2
+        with self._slots:
+            with self._lock:
+                self.active += 1
+            self._out.bind(send)
+            self._err.bind(send)
+            try:
+                rc = self.handler(argv)
+            except SystemExit as e:
+                # argparse errors and --help exit; report them like the CLI would
+                rc = e.code if isinstance(e.code, int) else 0 if e.code is None else 2
+            except Exception as e:
+                send({"err": f"dagger: error: {e}\n"})
+                rc = 1
+            finally:
+                self._out.unbind()
+                self._err.unbind()
+                with self._lock:
+                    self.active -= 1
+                    self.completed += 1
+        return rc
@@ -0,0 +1,219 @@
+"""DNS burst mode: high-rate concurrent lookups for DGA / tunnelling detections.
+
+Names come from an explicit list or a pattern. Patterns understand ``{i}``
+(query index), ``{rand:N}`` (N random lowercase letters/digits) and
+``{hex:N}`` (N random hex digits), e.g. ``{rand:14}.badcdn.test`` or
+``{hex:32}.t.exfil.test``.
+
+With ``nameserver`` set, queries are sent as raw UDP A-record lookups to that
+server (which is how a local stub DNS server is targeted); the 16-bit query
+ID caps ``concurrency`` at :data:`MAX_CONCURRENCY` there. Without it the
+system resolver runs on a thread pool sized to ``concurrency``, since each
+blocking lookup holds one thread.
+"""
+import re
+import time
+import random
+import socket
+import string
+import struct
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+
+from .actions import is_allowed
+from .events import Event
+from .metrics import observe
+from .stats import rate_summary
+
+_TOKEN = re.compile(r"\{(i|rand|hex)(?::(\d+))?\}")
+_ALNUM = string.ascii_lowercase + string.digits
+
+# queries in flight on one UDP socket are told apart by their 16-bit ID
+MAX_CONCURRENCY = 0xFFFF
+
+
+def check_concurrency(concurrency: int) -> int:
+    if concurrency < 1:
+        raise ValueError("concurrency must be at least 1")
+    if concurrency > MAX_CONCURRENCY:
+        raise ValueError(f"concurrency must be at most {MAX_CONCURRENCY} (16-bit DNS query IDs)")
+    return concurrency
+
+
+def expand_pattern(pattern: str, count: int, seed=None):
+    rng = random.Random(seed)
+
+    def repl(m, i):
+        kind, n = m.group(1), int(m.group(2) or 12)
+        if kind == "i":
+            return str(i)
+        alphabet = _ALNUM if kind == "rand" else "0123456789abcdef"
+        return "".join(rng.choice(alphabet) for _ in range(n))
+
+    for i in range(count):
+        yield _TOKEN.sub(lambda m: repl(m, i), pattern)
+
+
+def iter_domains(domains=None, pattern=None, count=None, seed=None):
+    """Yield ``count`` names, cycling through ``domains`` or expanding ``pattern``."""
+    if pattern:
+        return expand_pattern(pattern, count or 1000, seed)
+    domains = list(domains or [])
+    if not domains:
+        raise ValueError("either domains or pattern is required")
+    count = count or len(domains)
+    return (domains[i % len(domains)] for i in range(count))
+
+
+def build_query(qid: int, name: str) -> bytes:
+    header = struct.pack("!HHHHHH", qid, 0x0100, 1, 0, 0, 0)
+    labels = name.rstrip(".").encode("idna").split(b".")
+    for label in labels:
+        if not 0 < len(label) <= 63:
+            raise ValueError(f"invalid DNS name {name!r}: labels must be 1-63 bytes")
+    qname = b"".join(bytes([len(p)]) + p for p in labels) + b"\0"
+    if len(qname) > 255:
+        raise ValueError(f"invalid DNS name {name!r}: longer than 255 bytes")
+    return header + qname + struct.pack("!HH", 1, 1)
+
+
+def _skip_name(data: bytes, off: int) -> int:
+    while True:
+        ln = data[off]
+        if ln & 0xC0 == 0xC0:
+            return off + 2
+        off += 1
+        if ln == 0:
+            return off
+        off += ln
+
+
+def parse_response(data: bytes):
+    """Return ``(qid, rcode, [ipv4, ...])`` for a DNS response."""
+    qid, flags, qd, an, _, _ = struct.unpack_from("!HHHHHH", data)
+    off = 12
+    for _ in range(qd):
+        off = _skip_name(data, off) + 4
+    ips = []
+    for _ in range(an):
+        off = _skip_name(data, off)
+        rtype, _, _, rdlen = struct.unpack_from("!HHIH", data, off)
+        off += 10
+        if rtype == 1 and rdlen == 4:
+            ips.append(socket.inet_ntoa(data[off:off + 4]))
+        off += rdlen
+    return qid, flags & 0x000F, ips
+
+
+class _UDPResolver(asyncio.DatagramProtocol):
+    def __init__(self):
+        self.transport = None
+        self.pending = {}
+        self._next_id = random.randrange(0x10000)
+
+    def connection_made(self, transport):
+        self.transport = transport
+
+    def datagram_received(self, data, addr):
+        try:
+            qid, rcode, ips = parse_response(data)
+        except (struct.error, IndexError):
+            return
+        fut = self.pending.pop(qid, None)
+        if fut is not None and not fut.done():
+            fut.set_result((rcode, ips))
+
+    def error_received(self, exc):
+        pass
+
+    def _alloc_id(self) -> int:
+        while True:
+            self._next_id = (self._next_id + 1) & 0xFFFF
+            if self._next_id not in self.pending:
+                return self._next_id
+
+    async def query(self, name: str, timeout: float):
+        qid = self._alloc_id()
+        packet = build_query(qid, name)
+        fut = asyncio.get_running_loop().create_future()
+        self.pending[qid] = fut
+        self.transport.sendto(packet)
+        try:
+            return await asyncio.wait_for(fut, timeout)
+        finally:
+            self.pending.pop(qid, None)
+
+
+RCODES = {1: "FORMERR", 2: "SERVFAIL", 3: "NXDOMAIN", 4: "NOTIMP", 5: "REFUSED"}
+
+
+async def dns_burst(names, rate: float = 0, concurrency: int = 100, nameserver=None,
+                    port: int = 53, timeout: float = 2.0, log=None, allow_external: bool = False) -> dict:
+    """Resolve ``names`` at up to ``rate`` queries/sec with ``concurrency`` (1-65535) in flight."""
+    check_concurrency(concurrency)
+    if nameserver and not is_allowed(nameserver, allow_external):
+        raise PermissionError(f"nameserver {nameserver} is external; external network not allowed")
+    loop = asyncio.get_running_loop()
+    resolver = executor = None
+    if nameserver:
+        _, resolver = await loop.create_datagram_endpoint(_UDPResolver, remote_addr=(nameserver, port))
+    else:
+        # the default executor would cap lookups in flight at min(32, cpus + 4)
+        executor = ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix="dns-burst")
+
+    sem = asyncio.Semaphore(concurrency)
+    latencies = []
+    counts = [0, 0]
+
+    async def one(name):
+        t0 = time.perf_counter()
+        try:
+            if resolver:
+                rcode, ips = await resolver.query(name, timeout)
+                if rcode:
+                    raise OSError(RCODES.get(rcode, f"rcode {rcode}"))
+                ip = ips[0] if ips else "<no A record>"
+            else:
+                lookup = loop.run_in_executor(executor, socket.getaddrinfo, name, None, socket.AF_INET)
+                infos = await asyncio.wait_for(lookup, timeout)
+                ip = infos[0][4][0]
+            latencies.append(time.perf_counter() - t0)
+            counts[0] += 1
+            observe("dns.resolve", True, latencies[-1])
+            event = Event("dns", "resolve", "success", f"DNS resolved {name} -> {ip}", host=name, ip=ip)
+        except Exception as e:
+            counts[1] += 1
+            observe("dns.resolve", False, time.perf_counter() - t0)
+            err = str(e) or type(e).__name__
+            event = Event("dns", "resolve", "failure", f"DNS resolve error for {name}: {err}", host=name, error=err)
+        finally:
+            sem.release()
+        if log:
+            log(event)
+
+    start = time.perf_counter()
+    tasks = set()
+    try:
+        for n, name in enumerate(names):
+            if rate:
+                delay = start + n / rate - time.perf_counter()
+                if delay > 0:
+                    await asyncio.sleep(delay)
+            await sem.acquire()
+            task = asyncio.ensure_future(one(name))
+            tasks.add(task)
+            task.add_done_callback(tasks.discard)
+        if tasks:
+            await asyncio.gather(*tasks)
+    finally:
+        if resolver:
+            resolver.transport.close()
+        if executor:
+            # lookups that timed out may still sit in getaddrinfo; do not wait for them
+            executor.shutdown(wait=False, cancel_futures=True)
+    return rate_summary(counts[0], counts[1], time.perf_counter() - start, latencies)
+
+
+def run_dns_burst(names, **kwargs) -> dict:
+    """Blocking wrapper around :func:`dns_burst` for threads and the CLI."""
+    return asyncio.run(dns_burst(names, **kwargs))
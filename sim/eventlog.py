@@ -0,0 +1,442 @@
+"""Event log output.
+
+All event lines go through a :class:`LogWriter`: callers only enqueue, and one
+background thread per log file batches lines into single writes, so lines
+never interleave however many simulator threads log at once.
+"""
+import os
+import re
+import glob
+import time
+import queue
+import atexit
+import datetime
+import threading
+
+from .archive import SUFFIX as ARCHIVE_SUFFIX, Compressor
+from .filelock import hold_shared, locked
+from .events import Event, classify, get_serializer, iso, parse_event
+from .logindex import IndexBuilder, build_index, index_path
+from .metrics import METRICS
+
+LOG_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "logs")
+LOG_PATH = os.path.join(LOG_DIR, "ioc_sim.log")
+
+
+def utc_now() -> str:
+    return datetime.datetime.now(datetime.timezone.utc).isoformat()
+
+
+class LogWriter:
+    """Batched, rotating writer for one log file.
+
+    ``flush_interval`` bounds how long a line may sit in memory before it is
+    flushed to the OS; with ``fsync`` every flush is also synced to disk.
+    ``max_bytes`` and/or ``rotate_interval`` (seconds) rotate the file to
+    ``<path>.<UTC timestamp>``, keeping at most ``backup_count`` old segments;
+    with ``compress="gzip"`` a background thread turns each rotated segment
+    into a seekable ``.gz`` archive (see :mod:`sim.archive`). Several
+    processes may write one log: every batch is appended, and its index
+    records written, under an ``flock`` on ``<path>.lock``, so index offsets
+    are where the lines really landed; rotation happens under the same
+    lock, and a writer whose file was rotated away by another process
+    reopens ``path`` before its next batch.
+    With ``index`` the writer maintains the ``<path>.idx`` search index
+    (see :mod:`sim.logindex`) alongside every file it writes. ``format``
+    picks the line format for :class:`~sim.events.Event` records (see
+    :mod:`sim.events`); encoding happens on the writer thread, in batches.
+
+    An ``OSError`` while writing or rotating does not stop the writer: the
+    batch is counted in ``failed``, the error kept in ``error``, and the
+    file reopened for the next batch. Should the thread die anyway,
+    :meth:`write` and :meth:`flush` raise instead of blocking.
+    """
+
+    def __init__(self, path: str, max_queue: int = 65536, batch_size: int = 4096, flush_interval: float = 0.2,
+                 fsync: bool = False, max_bytes: int = None, rotate_interval: float = None, backup_count: int = 10,
+                 index: bool = True, format: str = "text", compress: str = None):
+        if compress not in (None, "none", "gzip"):
+            raise ValueError(f"unsupported log compression {compress!r}; expected gzip or none")
+        self.path = path
+        self.index = index
+        self.serializer = get_serializer(format)
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.fsync = fsync
+        self.max_bytes = max_bytes
+        self.rotate_interval = rotate_interval
+        self.backup_count = backup_count
+        self.lock_path = path + ".lock"
+        self._compressor = Compressor(lock_path=self.lock_path) if compress == "gzip" else None
+        if self._compressor is not None:
+            # segments left uncompressed by an earlier run or an interrupted compression
+            for old in segments(path):
+                if not old.endswith(ARCHIVE_SUFFIX):
+                    self._compressor.submit(old)
+        self.written = 0
+        self.failed = 0
+        self.error = None
+        self._queue = queue.Queue(maxsize=max_queue)
+        self._closed = False
+        self._file = None
+        self._indexer = None
+        self._size = 0
+        self._opened_at = 0.0
+        self._last_flush = time.monotonic()
+        self._idle = threading.Condition()
+        self._pending = 0
+        self._thread = threading.Thread(target=self._run, name=f"LogWriter({os.path.basename(path)})", daemon=True)
+        self._thread.start()
+
+    def write(self, line, when: float = None):
+        """Queue an :class:`Event` or a plain message line; blocks while the queue is full.
+
+        Plain lines are stamped with epoch ``when`` (now by default).
+        """
+        if self._closed:
+            raise ValueError(f"log writer for {self.path} is closed")
+        if isinstance(line, Event):
+            item = (line.ts, line.type, line)
+        else:
+            item = (time.time() if when is None else when, classify(line), line)
+        self._check()
+        with self._idle:
+            self._pending += 1
+        self._put(item)
+
+    def write_encoded(self, records):
+        """Queue lines that are already encoded in this writer's format, as one unit.
+
+        ``records`` are ``(epoch, type, line)`` with ``line`` newline-terminated
+        bytes; they are indexed and rotated like any other line.
+        """
+        if self._closed:
+            raise ValueError(f"log writer for {self.path} is closed")
+        records = list(records)
+        if not records:
+            return
+        with self._idle:
+            # bound memory by lines, not queue items
+            while self._pending >= self._queue.maxsize:
+                self._check()
+                self._idle.wait(0.5)
+            self._pending += len(records)
+        self._put(records)
+
+    @property
+    def pending(self) -> int:
+        """Lines queued but not yet written."""
+        return self._pending
+
+    def _check(self):
+        if not self._thread.is_alive():
+            raise OSError(f"log writer for {self.path} has stopped: {self.error or 'writer thread exited'}")
+
+    def _put(self, item):
+        while True:
+            try:
+                self._queue.put(item, timeout=0.5)
+                return
+            except queue.Full:
+                self._check()
+
+    def _encode(self, batch) -> list:
+        serializer = self.serializer
+        if serializer.name == "text":
+            return [payload if isinstance(payload, bytes) else (f"{iso(epoch)} {payload}\n").encode("utf-8")
+                    for epoch, _, payload in batch]
+        out = []
+        for epoch, kind, payload in batch:
+            if isinstance(payload, bytes):
+                out.append(payload)
+                continue
+            if not isinstance(payload, Event):
+                payload = Event(kind, "log", "unknown", payload, ts=epoch)
+            out.append((serializer.encode(payload) + "\n").encode("utf-8"))
+        return out
+
+    def flush(self, timeout: float = None) -> bool:
+        """Wait until every queued line has been written and flushed."""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._idle:
+            while self._pending:
+                self._check()
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    return False
+                self._idle.wait(0.5 if remaining is None else min(0.5, remaining))
+            return True
+
+    def close(self, timeout: float = 10):
+        if self._closed:
+            return
+        self._closed = True
+        self._queue.put(None)
+        self._thread.join(timeout)
+        if self._compressor is not None:
+            # segments not done by then stay plain; the next writer on this log compresses them
+            self._compressor.close(timeout)
+
+    def _open(self):
+        d = os.path.dirname(self.path)
+        if d:
+            os.makedirs(d, exist_ok=True)
+        # called with the log's lock held, so nobody can rotate the file under us
+        self._file = open(self.path, "ab", buffering=1 << 20)
+        # the shared lock keeps the compressor off this file for as long as we append to it
+        hold_shared(self._file.fileno())
+        self._size = self._file.tell()
+        self._opened_at = time.time()
+        if self.index:
+            build_index(self.path)
+            self._indexer = IndexBuilder(self.path)
+
+    def _close_file(self):
+        self._sync()
+        self._file.close()
+        self._file = None
+        if self._indexer is not None:
+            self._indexer.close()
+            self._indexer = None
+
+    def _discard_file(self):
+        # after a failed write: drop the handles quietly, _run reopens them for the next batch
+        for close in (self._file and self._file.close, self._indexer and self._indexer.abandon):
+            if close:
+                try:
+                    close()
+                except OSError:
+                    pass
+        self._file = self._indexer = None
+
+    def _sync(self):
+        self._file.flush()
+        if self.fsync:
+            os.fsync(self._file.fileno())
+        self._last_flush = time.monotonic()
+
+    def _due_for_rotation(self) -> bool:
+        if self.max_bytes and self._size >= self.max_bytes:
+            return True
+        return bool(self.rotate_interval) and self._size > 0 and time.time() - self._opened_at >= self.rotate_interval
+
+    def rotated_name(self) -> str:
+        stamp = datetime.datetime.now(datetime.timezone.utc).strftime("%Y%m%dT%H%M%SZ")
+        target = f"{self.path}.{stamp}"
+        n = 1
+        while glob.glob(glob.escape(target) + "*"):
+            target = f"{self.path}.{stamp}-{n}"
+            n += 1
+        return target
+
+    def _moved(self) -> bool:
+        """Whether ``path`` no longer names the file we have open (another writer rotated it)."""
+        try:
+            return os.stat(self.path).st_ino != os.fstat(self._file.fileno()).st_ino
+        except FileNotFoundError:
+            return True
+
+    def _rotate(self):
+        # caller holds the log's lock and has just checked that the file was not rotated already
+        if self._indexer is not None:
+            # lines of other writers not indexed yet go into the segment's index too
+            self._indexer.catch_up(self._size)
+        self._close_file()
+        target = self.rotated_name()
+        os.replace(self.path, target)
+        if os.path.exists(index_path(self.path)):
+            os.replace(index_path(self.path), index_path(target))
+        self._prune()
+        if self._compressor is not None:
+            self._compressor.submit(target)
+        self._open()
+
+    def _prune(self):
+        if not self.backup_count:
+            return
+        for old in segments(self.path)[:-self.backup_count]:
+            os.remove(old)
+            if os.path.exists(index_path(old)):
+                os.remove(index_path(old))
+
+    def _run(self):
+        try:
+            self._loop()
+        finally:
+            if self._file is not None:
+                try:
+                    with locked(self.lock_path):
+                        self._close_file()
+                except OSError as e:
+                    self.error = e
+            with self._idle:
+                self._idle.notify_all()
+
+    def _loop(self):
+        stop = False
+        while not stop:
+            try:
+                first = self._queue.get(timeout=self.flush_interval or None)
+            except queue.Empty:
+                first = ""
+            batch = (list(first) if isinstance(first, list) else [first]) if first else []
+            stop = first is None
+            while not stop and len(batch) < self.batch_size:
+                try:
+                    item = self._queue.get_nowait()
+                except queue.Empty:
+                    break
+                if item is None:
+                    stop = True
+                elif isinstance(item, list):
+                    batch.extend(item)
+                else:
+                    batch.append(item)
+            try:
+                self._write_batch(batch, stop)
+            except OSError as e:
+                self.error = e
+                self.failed += len(batch)
+                self._discard_file()
+            finally:
+                if batch:
+                    with self._idle:
+                        self._pending -= len(batch)
+                        self._idle.notify_all()
+
+    def _write_batch(self, batch, stop: bool):
+        encoded = self._encode(batch) if batch else None
+        if encoded or self._file is None or self._moved() or self._due_for_rotation():
+            d = os.path.dirname(self.path)
+            if d:
+                os.makedirs(d, exist_ok=True)
+            with locked(self.lock_path):
+                if self._file is not None and self._moved():
+                    self._close_file()
+                if self._file is None:
+                    self._open()
+                # other processes append too; the file's real end is where our lines go
+                self._size = os.fstat(self._file.fileno()).st_size
+                if self._due_for_rotation():
+                    self._rotate()
+                if encoded:
+                    self._append(batch, encoded)
+        if stop or self._queue.empty() or time.monotonic() - self._last_flush >= self.flush_interval:
+            self._sync()
+
+
+    def _append(self, batch, encoded):
+        # caller holds the log's lock and has set _size to the file's current end
+        if self._indexer is not None:
+            self._indexer.catch_up(self._size)
+            offset = self._size
+            for (epoch, kind, _), raw in zip(batch, encoded):
+                self._indexer.add(epoch, kind, offset, len(raw))
+                offset += len(raw)
+        data = b"".join(encoded)
+        self._file.write(data)
+        # out of our buffer before the lock goes, so the next writer sees the true end
+        self._file.flush()
+        self._size += len(data)
+        self.written += len(batch)
+
+
+_SEGMENT_SUFFIX = re.compile(r"\.(\d{8}T\d{6}Z)(?:-(\d+))?(\.gz)?$")
+
+
+def segments(path: str) -> list:
+    """Rotated segments of ``path``, oldest first (the live file is not included).
+
+    Compressed segments are listed under their ``.gz`` name; while one is
+    being compressed only the plain copy is listed.
+    """
+    found = {}
+    for p in glob.glob(glob.escape(path) + ".*"):
+        m = _SEGMENT_SUFFIX.fullmatch(p[len(path):])
+        if m:
+            key = (m.group(1), int(m.group(2) or 0))
+            if key not in found or not m.group(3):
+                found[key] = p
+    return [found[k] for k in sorted(found)]
+
+
+_writers = {}
+_writers_lock = threading.Lock()
+_writer_options = {}
+_sinks = []
+
+
+def configure_log(**options):
+    """Set :class:`LogWriter` options used for writers created from now on."""
+    _writer_options.update(options)
+
+
+def get_writer(path: str = None) -> LogWriter:
+    path = os.path.abspath(path or LOG_PATH)
+    writer = _writers.get(path)
+    if writer is None:
+        with _writers_lock:
+            writer = _writers.get(path)
+            if writer is None:
+                writer = _writers[path] = LogWriter(path, **_writer_options)
+    return writer
+
+
+def flush_logs(timeout: float = None):
+    for writer in list(_writers.values()):
+        writer.flush(timeout)
+
+
+@atexit.register
+def close_logs():
+    with _writers_lock:
+        writers = list(_writers.values())
+        _writers.clear()
+    for writer in writers:
+        writer.close()
+
+
+@METRICS.collector
+def _log_metrics():
+    writers = list(_writers.values())
+    return [
+        ("dagger_log_lines_total", "counter", "Lines written to the event log.",
+         [({"log": w.path}, w.written) for w in writers]),
+        ("dagger_log_lines_failed_total", "counter", "Lines lost to errors writing the event log.",
+         [({"log": w.path}, w.failed) for w in writers]),
+        ("dagger_log_queue_lines", "gauge", "Lines queued for the event log but not yet written.",
+         [({"log": w.path}, w.pending) for w in writers]),
+    ]
+
+
+def add_sink(sink):
+    """Also hand every logged line/event to ``sink`` (e.g. a SIEM forwarder); must not block."""
+    _sinks.append(sink)
+
+
+def remove_sink(sink):
+    if sink in _sinks:
+        _sinks.remove(sink)
+
+
+def safe_append_log(line, path: str = None):
+    """Log an :class:`~sim.events.Event` or a plain message line."""
+    get_writer(path).write(line)
+    for sink in _sinks:
+        sink(line)
+
+
+def append_encoded(records, path: str = None):
+    """Log ``(epoch, type, line bytes)`` records already encoded in the log's format.
+
+    Sinks still receive events; they are parsed back from the lines only
+    when a sink is registered.
+    """
+    records = list(records)
+    get_writer(path).write_encoded(records)
+    if _sinks:
+        for _, _, raw in records:
+            event = parse_event(raw.decode("utf-8", "replace"))
+            if event is not None:
+                for sink in _sinks:
+                    sink(event)
@@ -0,0 +1,440 @@
+"""Structured IOC events and their wire formats.
+
+Every simulator produces :class:`Event` records; ``str(event)`` is the
+human-readable line the tabs have always shown. Serializers turn events
+into one line each:
+
+* ``text``  - ``<ISO timestamp> <message>`` (the historical log format)
+* ``jsonl`` - flat JSON object per line
+* ``ecs``   - Elastic Common Schema JSON
+* ``cef``   - ArcSight Common Event Format
+
+Serializers are stateless and build on the C JSON encoder and
+``str.translate`` escaping, so encoding a batch costs about as much as
+formatting the old string lines did. :func:`parse_record` reads any of the
+formats back; :func:`parse_event` rebuilds the full event where the format
+kept its fields.
+"""
+import re
+import json
+import time
+import datetime
+
+EVENT_TYPES = ("other", "dns", "tcp", "http", "file", "registry", "mutex")
+
+OUTCOMES = ("success", "failure", "unknown")
+
+PRODUCT_VERSION = "1.0"
+
+_UTC = datetime.timezone.utc
+
+_PREFIXES = (
+    ("DNS ", "dns"),
+    ("TCP ", "tcp"),
+    ("HTTP ", "http"),
+    ("Created file", "file"),
+    ("File ", "file"),
+    ("Hashed file", "file"),
+    ("Registry", "registry"),
+    ("Simulated registry", "registry"),
+    ("Created Windows mutex", "mutex"),
+    ("Released Windows mutex", "mutex"),
+    ("Created lockfile", "mutex"),
+    ("Removed lockfile", "mutex"),
+    ("Mutex", "mutex"),
+    ("No mutex", "mutex"),
+)
+
+
+class Event:
+    __slots__ = ("ts", "type", "action", "outcome", "message", "fields")
+
+    def __init__(self, type: str, action: str, outcome: str, message: str, ts: float = None, **fields):
+        self.ts = time.time() if ts is None else ts
+        self.type = type
+        self.action = action
+        self.outcome = outcome
+        self.message = message
+        self.fields = fields
+
+    @property
+    def ok(self) -> bool:
+        return self.outcome == "success"
+
+    def __str__(self):
+        return self.message
+
+    def __repr__(self):
+        return f"Event({self.type!r}, {self.action!r}, {self.outcome!r}, {self.message!r})"
+
+    def to_dict(self) -> dict:
+        d = {"ts": iso(self.ts), "type": self.type, "action": self.action, "outcome": self.outcome,
+             "message": self.message}
+        d.update(self.fields)
+        return d
+
+
+def note(message: str, ts: float = None) -> Event:
+    """Wrap a free-form log line (app start, run summaries...) as an event."""
+    return Event("other", "log", "unknown", message, ts=ts)
+
+
+def classify(msg: str) -> str:
+    for prefix, kind in _PREFIXES:
+        if msg.startswith(prefix):
+            return kind
+    return "other"
+
+
+def as_event(line, ts: float = None) -> Event:
+    """Return ``line`` if it already is an :class:`Event`, else wrap the plain message."""
+    if isinstance(line, Event):
+        return line
+    return Event(classify(line), "log", "unknown", line, ts=ts)
+
+
+_iso_second = (None, "")
+
+
+def iso(ts: float) -> str:
+    """ISO-8601 UTC timestamp for an epoch; the per-second prefix is cached for bulk encoding."""
+    global _iso_second
+    sec = int(ts)
+    us = int((ts - sec) * 1e6 + 0.5)
+    if sec < 0 or us >= 1000000:
+        return datetime.datetime.fromtimestamp(ts, _UTC).isoformat()
+    cached_sec, prefix = _iso_second
+    if cached_sec != sec:
+        prefix = datetime.datetime.fromtimestamp(sec, _UTC).strftime("%Y-%m-%dT%H:%M:%S")
+        _iso_second = (sec, prefix)
+    if us:
+        return f"{prefix}.{us:06d}+00:00"
+    return f"{prefix}+00:00"
+
+
+class Serializer:
+    name = None
+
+    def encode(self, event: Event) -> str:
+        raise NotImplementedError
+
+    def encode_batch(self, events) -> str:
+        """Encode events as newline-terminated lines."""
+        encode = self.encode
+        return "".join([encode(e) + "\n" for e in events])
+
+
+class TextSerializer(Serializer):
+    name = "text"
+
+    def encode(self, event: Event) -> str:
+        return f"{iso(event.ts)} {event.message}"
+
+
+_json = json.JSONEncoder(ensure_ascii=False, separators=(",", ":"), default=str).encode
+
+
+class JSONLSerializer(Serializer):
+    name = "jsonl"
+
+    def encode(self, event: Event) -> str:
+        return _json(event.to_dict())
+
+
+_ECS_CATEGORY = {
+    "dns": ["network"],
+    "tcp": ["network"],
+    "http": ["network", "web"],
+    "file": ["file"],
+    "registry": ["registry"],
+    "mutex": ["process"],
+}
+
+
+class ECSSerializer(Serializer):
+    name = "ecs"
+
+    def encode(self, event: Event) -> str:
+        f = event.fields
+        doc = {
+            "@timestamp": iso(event.ts),
+            "message": event.message,
+            "ecs": {"version": "8.11.0"},
+            "event": {
+                "kind": "event",
+                "module": "dagger",
+                "dataset": f"dagger.{event.type}",
+                "action": event.action,
+                "outcome": event.outcome,
+                "category": _ECS_CATEGORY.get(event.type, ["host"]),
+            },
+            "observer": {"vendor": "DAGGER", "product": "IOC Simulator", "version": PRODUCT_VERSION},
+        }
+        t = event.type
+        if t == "dns":
+            dns = {"question": {"name": f.get("host")}}
+            if f.get("ip"):
+                dns["resolved_ip"] = [f["ip"]]
+            doc["dns"] = dns
+        elif t == "tcp":
+            doc["destination"] = {"ip": f.get("ip"), "port": f.get("port")}
+            doc["network"] = {"transport": "tcp"}
+        elif t == "http":
+            doc["url"] = {"full": f.get("url")}
+            doc["http"] = {"request": {"method": f.get("method", "GET")}}
+            if f.get("status") is not None:
+                doc["http"]["response"] = {"status_code": f["status"], "body": {"bytes": f.get("length")}}
+            if f.get("user_agent"):
+                doc["user_agent"] = {"original": f["user_agent"]}
+        elif t == "file":
+            doc["file"] = {"path": f.get("path")}
+            hashes = {k: f[k] for k in ("md5", "sha1", "sha256") if f.get(k)}
+            if hashes:
+                doc["file"]["hash"] = hashes
+        elif t == "registry":
+            key = f.get("key")
+            doc["registry"] = {"key": key, "path": f"{key}\\{f['name']}" if f.get("name") else key}
+            if f.get("name"):
+                doc["registry"]["value"] = f["name"]
+            if f.get("value") is not None:
+                doc["registry"]["data"] = {"strings": [str(f["value"])]}
+        if f.get("error"):
+            doc["error"] = {"message": f["error"]}
+        # anything without an ECS home is kept under the vendor namespace
+        extra = {k: v for k, v in f.items() if k not in _ECS_MAPPED.get(t, ()) and k != "error"}
+        if extra:
+            doc["dagger"] = extra
+        return _json(doc)
+
+
+_ECS_MAPPED = {
+    "dns": ("host", "ip"),
+    "tcp": ("ip", "port"),
+    "http": ("url", "method", "status", "length", "user_agent"),
+    "file": ("path", "md5", "sha1", "sha256"),
+    "registry": ("key", "name", "value"),
+}
+
+_CEF_HEADER_ESCAPE = str.maketrans({"\\": "\\\\", "|": "\\|", "\n": " ", "\r": " "})
+_CEF_EXT_ESCAPE = str.maketrans({"\\": "\\\\", "=": "\\=", "\n": "\\n", "\r": "\\r"})
+
+# event field -> CEF extension key
+_CEF_KEYS = {
+    "host": "dhost",
+    "ip": "dst",
+    "port": "dpt",
+    "url": "request",
+    "method": "requestMethod",
+    "user_agent": "requestClientApplication",
+    "path": "filePath",
+    "sha256": "fileHash",
+    "error": "reason",
+}
+
+_CEF_SEVERITY = {"success": 5, "failure": 3, "unknown": 1}
+
+
+class CEFSerializer(Serializer):
+    name = "cef"
+
+    def encode(self, event: Event) -> str:
+        sig = f"{event.type}.{event.action}".translate(_CEF_HEADER_ESCAPE)
+        name = event.message.translate(_CEF_HEADER_ESCAPE)
+        ext = [f"rt={int(event.ts * 1000)}", f"cat={event.type}", f"outcome={event.outcome}"]
+        custom = 0
+        for k, v in event.fields.items():
+            if v is None:
+                continue
+            v = str(v).translate(_CEF_EXT_ESCAPE)
+            key = _CEF_KEYS.get(k)
+            if key:
+                ext.append(f"{key}={v}")
+            elif custom < 6:
+                custom += 1
+                ext.append(f"cs{custom}Label={k} cs{custom}={v}")
+        ext.append(f"msg={event.message.translate(_CEF_EXT_ESCAPE)}")
+        return (f"CEF:0|DAGGER|IOC Simulator|{PRODUCT_VERSION}|{sig}|{name}|"
+                f"{_CEF_SEVERITY.get(event.outcome, 1)}|{' '.join(ext)}")
+
+
+SERIALIZERS = {s.name: s for s in (TextSerializer(), JSONLSerializer(), ECSSerializer(), CEFSerializer())}
+
+
+def get_serializer(name: str) -> Serializer:
+    try:
+        return SERIALIZERS[name]
+    except KeyError:
+        raise ValueError(f"unknown event format {name!r}; expected one of {', '.join(SERIALIZERS)}")
+
+
+def _cef_unescape(value: str) -> str:
+    return value.replace("\\=", "=").replace("\\n", "\n").replace("\\r", "\r").replace("\\\\", "\\")
+
+
+_CEF_HEADER_FIELD = re.compile(r"((?:[^|\\]|\\.)*)\|")
+
+_CEF_EXT_KEY = re.compile(r"(?:^| )([A-Za-z0-9_]+)=")
+
+_CEF_FIELDS = {v: k for k, v in _CEF_KEYS.items()}
+
+
+def _cef_split(line: str):
+    """Split a CEF line into its seven header fields and the extension string."""
+    header, pos = [], 0
+    for _ in range(7):
+        m = _CEF_HEADER_FIELD.match(line, pos)
+        if not m:
+            return None, line
+        header.append(m.group(1).replace("\\|", "|").replace("\\\\", "\\"))
+        pos = m.end()
+    return header, line[pos:]
+
+
+def _cef_extension(ext: str) -> dict:
+    # values escape "=", so every bare "key=" starts a new pair; msg= is always last
+    fields = {}
+    head, sep, msg = ext.partition(" msg=")
+    if not sep and ext.startswith("msg="):
+        head, msg = "", ext[4:]
+    keys = list(_CEF_EXT_KEY.finditer(head))
+    for m, nxt in zip(keys, keys[1:] + [None]):
+        fields[m.group(1)] = _cef_unescape(head[m.end():nxt.start() if nxt else len(head)])
+    if sep or ext.startswith("msg="):
+        fields["msg"] = _cef_unescape(msg)
+    return fields
+
+
+def parse_record(line: str):
+    """Return ``(epoch, type, message)`` for a line in any supported format.
+
+    ``type`` is None for text lines (the caller classifies the message);
+    ``epoch`` is None when the timestamp cannot be parsed.
+    """
+    line = line.rstrip("\n")
+    if line.startswith("{"):
+        try:
+            doc = json.loads(line)
+        except ValueError:
+            return None, None, line
+        ts = doc.get("@timestamp") or doc.get("ts")
+        kind = doc.get("type")
+        if kind is None:
+            kind = doc.get("event", {}).get("dataset", "").partition(".")[2] or None
+        return _to_epoch(ts), kind, doc.get("message", "")
+    if line.startswith("CEF:"):
+        _, ext = _cef_split(line)
+        fields = _cef_extension(ext)
+        rt = fields.get("rt")
+        return (int(rt) / 1000.0 if rt and rt.isdigit() else None), fields.get("cat"), fields.get("msg", "")
+    ts, _, msg = line.partition(" ")
+    epoch = _to_epoch(ts)
+    return (epoch, None, msg) if epoch is not None else (None, None, line)
+
+
+def _ecs_fields(doc: dict, kind: str) -> dict:
+    get = lambda *path: _dig(doc, path)
+    f = {}
+    if kind == "dns":
+        f["host"] = get("dns", "question", "name")
+        f["ip"] = (get("dns", "resolved_ip") or [None])[0]
+    elif kind == "tcp":
+        f["ip"] = get("destination", "ip")
+        f["port"] = get("destination", "port")
+    elif kind == "http":
+        f["url"] = get("url", "full")
+        f["method"] = get("http", "request", "method")
+        f["status"] = get("http", "response", "status_code")
+        f["length"] = get("http", "response", "body", "bytes")
+        f["user_agent"] = get("user_agent", "original")
+    elif kind == "file":
+        f["path"] = get("file", "path")
+        f.update(get("file", "hash") or {})
+    elif kind == "registry":
+        f["key"] = get("registry", "key")
+        f["name"] = get("registry", "value")
+        f["value"] = (get("registry", "data", "strings") or [None])[0]
+    f = {k: v for k, v in f.items() if v is not None}
+    if get("error", "message"):
+        f["error"] = get("error", "message")
+    f.update(doc.get("dagger") or {})
+    return f
+
+
+def _dig(doc, path):
+    for key in path:
+        if not isinstance(doc, dict):
+            return None
+        doc = doc.get(key)
+    return doc
+
+
+def parse_event(line: str):
+    """Rebuild the :class:`Event` behind a line in any supported format, or None.
+
+    ``jsonl``, ``ecs`` and ``cef`` lines keep their fields (CEF keeps at most
+    six custom ones and drops md5/sha1); ``text`` lines only carry the message,
+    so those come back as classified ``"log"`` events without fields. Lines
+    without a readable timestamp give None rather than an event stamped now.
+    """
+    line = line.rstrip("\n")
+    if line.startswith("{"):
+        try:
+            doc = json.loads(line)
+        except ValueError:
+            return None
+        if "@timestamp" in doc:
+            ts = _to_epoch(doc["@timestamp"])
+            if ts is None:
+                return None
+            ev = doc.get("event") or {}
+            kind = ev.get("dataset", "").partition(".")[2] or classify(doc.get("message", ""))
+            return Event(kind, ev.get("action", "log"), ev.get("outcome", "unknown"), doc.get("message", ""),
+                         ts=ts, **_ecs_fields(doc, kind))
+        fields = dict(doc)
+        ts = _to_epoch(fields.pop("ts", None))
+        if ts is None:
+            return None
+        message = fields.pop("message", "")
+        kind = fields.pop("type", None) or classify(message)
+        return Event(kind, fields.pop("action", "log"), fields.pop("outcome", "unknown"), message, ts=ts,
+                     **fields)
+    if line.startswith("CEF:"):
+        header, ext = _cef_split(line)
+        if header is None:
+            return None
+        ext = _cef_extension(ext)
+        rt = ext.pop("rt", "")
+        if not rt.isdigit():
+            return None
+        message = ext.pop("msg", header[5])
+        kind = ext.pop("cat", None) or classify(message)
+        outcome = ext.pop("outcome", "unknown")
+        action = header[4].partition(".")[2] or "log"
+        fields = {}
+        for k, v in ext.items():
+            if k.startswith("cs") and k.endswith("Label"):
+                fields[v] = ext.get(k[:-5])
+            elif k in _CEF_FIELDS:
+                fields[_CEF_FIELDS[k]] = v
+        if "port" in fields and fields["port"].isdigit():
+            fields["port"] = int(fields["port"])
+        return Event(kind, action, outcome, message, ts=int(rt) / 1000.0, **fields)
+    ts, _, msg = line.partition(" ")
+    epoch = _to_epoch(ts)
+    if epoch is None:
+        return None
+    return Event(classify(msg), "log", "unknown", msg, ts=epoch)
+
+
+def _to_epoch(ts):
+    if isinstance(ts, (int, float)) and not isinstance(ts, bool):
+        return float(ts)
+    if not ts or not isinstance(ts, str):
+        return None
+    try:
+        value = datetime.datetime.fromisoformat(ts)
+    except ValueError:
+        return None
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=_UTC)
+    return value.timestamp()
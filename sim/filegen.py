@@ -0,0 +1,169 @@
+"""Bulk file-artifact generator for mass-encryption / dropper detections.
+
+File names and contents are templates. They understand ``{i}`` (file
+index), ``{rand:N}`` (N random lowercase letters/digits), ``{hex:N}`` (N
+random hex digits) and ``{choice:a|b|c}`` (one of the alternatives); content
+templates may also use ``{name}`` (the rendered file name)::
+
+    README_{i}.txt
+    invoice_{i}.{choice:docx|xlsx|pdf}.{choice:locked|crypt|wncry}
+    {choice:svchost|msupdate}{rand:6}.exe
+
+Writes are spread over a thread pool, and every file is hashed from the
+buffer being written, so nothing is read back from disk.
+"""
+import os
+import re
+import time
+import random
+import string
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from .events import Event
+from .hashing import DEFAULT_ALGORITHMS, hash_data
+from .metrics import observe
+from .stats import rate_summary
+
+_TOKEN = re.compile(r"\{(i|name|rand|hex|choice)(?::([^}]*))?\}")
+_ALNUM = string.ascii_lowercase + string.digits
+
+PRESETS = {
+    "ransom-note": ("README_TO_DECRYPT_{i}.txt",
+                    "All of your files have been encrypted!\nYour personal ID: {hex:32}\n"
+                    "Send 0.5 BTC to bc1q{rand:38} and mail your ID to restore {name}.\n"),
+    "encrypted": ("document_{i}.{choice:docx|xlsx|pdf|jpg}.{choice:locked|crypt|enc|wncry}", "{rand:256}"),
+    "dropper": ("{choice:svchost|msupdate|chrome_installer|winlogon}{rand:6}.exe", "MZ{hex:512}"),
+}
+
+
+class Template:
+    """A name/content template, parsed once and rendered per file."""
+
+    def __init__(self, text: str):
+        self.text = text
+        self._parts = []
+        pos = 0
+        for m in _TOKEN.finditer(text):
+            if m.start() > pos:
+                self._parts.append((None, text[pos:m.start()]))
+            kind, arg = m.group(1), m.group(2)
+            if kind in ("rand", "hex"):
+                arg = int(arg or 12)
+            elif kind == "choice":
+                arg = (arg or "").split("|")
+            self._parts.append((kind, arg))
+            pos = m.end()
+        if pos < len(text):
+            self._parts.append((None, text[pos:]))
+
+    def render(self, i: int, rng, name: str = "") -> str:
+        out = []
+        for kind, arg in self._parts:
+            if kind is None:
+                out.append(arg)
+            elif kind == "i":
+                out.append(str(i))
+            elif kind == "name":
+                out.append(name)
+            elif kind == "rand":
+                out.append("".join(rng.choices(_ALNUM, k=arg)))
+            elif kind == "hex":
+                out.append("%0*x" % (arg, rng.getrandbits(arg * 4)) if arg else "")
+            else:
+                out.append(rng.choice(arg))
+        return "".join(out)
+
+
+def write_file(path: str, data: bytes, algorithms=DEFAULT_ALGORITHMS) -> dict:
+    """Write ``data`` to ``path`` and return its digests, hashed from memory."""
+    with open(path, "wb") as f:
+        f.write(data)
+    return hash_data(data, algorithms)
+
+
+class FileGenerator:
+    """Create ``count`` files in ``folder`` from name/content templates.
+
+    With ``seed`` set, file ``i`` always gets the same name and content,
+    regardless of how the work was spread over the ``workers`` threads.
+    """
+
+    def __init__(self, folder: str, name_template: str, content_template: str = "", count: int = 1000,
+                 workers: int = 8, seed=None, log=None, chunk: int = 64, algorithms=DEFAULT_ALGORITHMS):
+        if not name_template:
+            raise ValueError("a file name template is required")
+        self.folder = folder
+        self.names = Template(name_template)
+        self.content = Template(content_template)
+        self.count = count
+        self.workers = workers
+        self.seed = seed
+        self.log = log
+        self.chunk = chunk
+        self.algorithms = tuple(algorithms)
+        self.bytes = 0
+        self._stopped = False
+        self._lock = threading.Lock()
+        self._latencies = []
+        self._counts = [0, 0]
+
+    def _rng(self, i: int):
+        return random.Random(f"{self.seed}:{i}") if self.seed is not None else random.Random()
+
+    def _create(self, i: int):
+        rng = self._rng(i)
+        name = self.names.render(i, rng)
+        path = os.path.join(self.folder, name)
+        data = self.content.render(i, rng, name).encode("utf-8")
+        t0 = time.perf_counter()
+        try:
+            if os.sep in name or (os.altsep and os.altsep in name):
+                os.makedirs(os.path.dirname(path), exist_ok=True)
+            digests = write_file(path, data, self.algorithms)
+            elapsed = time.perf_counter() - t0
+            observe("file.create", True, elapsed)
+            summary = " ".join(f"{k}={v}" for k, v in digests.items())
+            return True, elapsed, len(data), Event(
+                "file", "create", "success", f"Created file {path} {summary}", path=path, size=len(data), **digests)
+        except OSError as e:
+            observe("file.create", False, time.perf_counter() - t0)
+            return False, 0.0, 0, Event("file", "create", "failure", f"File create error: {e}", path=path,
+                                        error=str(e))
+
+    def _run_chunk(self, start: int, stop: int):
+        latencies = []
+        ok = failed = size = 0
+        for i in range(start, stop):
+            if self._stopped:
+                break
+            success, elapsed, n, event = self._create(i)
+            if success:
+                ok += 1
+                size += n
+                latencies.append(elapsed)
+            else:
+                failed += 1
+            if self.log:
+                self.log(event)
+        with self._lock:
+            self._counts[0] += ok
+            self._counts[1] += failed
+            self.bytes += size
+            self._latencies.extend(latencies)
+
+    def stop(self):
+        self._stopped = True
+
+    def run(self) -> dict:
+        os.makedirs(self.folder, exist_ok=True)
+        start = time.perf_counter()
+        # hand out runs of indices so pool overhead stays small next to a file write
+        with ThreadPoolExecutor(max_workers=self.workers) as pool:
+            for lo in range(0, self.count, self.chunk):
+                pool.submit(self._run_chunk, lo, min(lo + self.chunk, self.count))
+        elapsed = time.perf_counter() - start
+        result = rate_summary(self._counts[0], self._counts[1], elapsed, self._latencies)
+        result["bytes"] = self.bytes
+        result["mb_per_s"] = round(self.bytes / elapsed / 1e6, 2) if elapsed > 0 else 0.0
+        return result
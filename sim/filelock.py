@@ -0,0 +1,75 @@
+"""Advisory file locks shared by the log writer, its compressor, the registry store and the forwarder spool.
+
+``flock`` where available; on Windows ``msvcrt.locking`` on the first byte,
+which only offers exclusive locks (shared requests lock exclusively).
+"""
+import os
+import contextlib
+
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+    import msvcrt
+
+
+def lock(fd: int, shared: bool = False, blocking: bool = True):
+    """Lock open descriptor ``fd``; raises ``BlockingIOError`` if ``blocking`` is false and it is held."""
+    if fcntl is not None:
+        flags = fcntl.LOCK_SH if shared else fcntl.LOCK_EX
+        fcntl.flock(fd, flags if blocking else flags | fcntl.LOCK_NB)
+        return
+    os.lseek(fd, 0, os.SEEK_SET)
+    try:
+        msvcrt.locking(fd, msvcrt.LK_LOCK if blocking else msvcrt.LK_NBLCK, 1)
+    except OSError as e:
+        if blocking:
+            raise
+        raise BlockingIOError(str(e))
+
+
+def hold_shared(fd: int):
+    """Mark ``fd`` as in use by a writer, so :func:`lock` with ``blocking=False`` fails on it.
+
+    A no-op on Windows, where a file another handle has open cannot be
+    renamed in the first place.
+    """
+    if fcntl is not None:
+        fcntl.flock(fd, fcntl.LOCK_SH)
+
+
+def unlock(fd: int):
+    if fcntl is not None:
+        fcntl.flock(fd, fcntl.LOCK_UN)
+        return
+    os.lseek(fd, 0, os.SEEK_SET)
+    msvcrt.locking(fd, msvcrt.LK_UNLCK, 1)
+
+
+@contextlib.contextmanager
+def locked(path: str, shared: bool = False, blocking: bool = True):
+    """Hold a lock on the lockfile ``path`` (created if missing) for the ``with`` block.
+
+    With ``blocking`` false, raises ``BlockingIOError`` if the lock is held.
+    A shared lock also works where ``path`` cannot be opened for writing: an
+    existing lockfile is locked read-only, and if it cannot be created at all
+    the block runs unlocked (yielding None), since nobody can write there.
+    """
+    try:
+        fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o644)
+    except OSError:
+        if not shared:
+            raise
+        try:
+            fd = os.open(path, os.O_RDONLY)
+        except OSError:
+            yield None
+            return
+    try:
+        lock(fd, shared, blocking)
+        try:
+            yield fd
+        finally:
+            unlock(fd)
+    finally:
+        os.close(fd)
@@ -0,0 +1,351 @@
+"""Forward events straight to a SIEM.
+
+Targets are given as URLs:
+
+* ``udp://host:514``   - RFC 5424 syslog, one datagram per event
+* ``tcp://host:601``   - RFC 5424 syslog with RFC 6587 octet-counting framing
+* ``http(s)://host/path`` - bulk POST, one serialized event per line
+
+A :class:`Forwarder` is registered as a sink on the event log
+(:func:`sim.eventlog.add_sink`), so it sees exactly what ``safe_append_log``
+writes. :meth:`Forwarder.submit` never blocks: events go onto a bounded
+queue, and when that is full they are spilled to a disk spool instead.
+A sender thread batches the queue, retries failed batches with exponential
+backoff, spools batches it could not deliver, and replays the spool once the
+target accepts data again. :meth:`Forwarder.close` gives it a deadline,
+after which whatever is still queued goes to the spool; the sender closes
+the transport itself on the way out.
+
+Several processes may share one spool directory: a forwarder holds a
+shared ``flock`` on each spool file while it appends to it, and only one
+at a time replays (under ``<spool>/replay.lock``), skipping files that are
+still being written.
+"""
+import os
+import sys
+import time
+import glob
+import queue
+import socket
+import threading
+import http.client
+import urllib.parse
+
+from .actions import is_allowed
+from .events import as_event, get_serializer, iso
+from .eventlog import LOG_DIR
+from .filelock import hold_shared, lock, locked
+from .metrics import METRICS
+
+FACILITY_LOCAL0 = 16
+_SEVERITY = {"failure": 4, "success": 6, "unknown": 6}
+
+
+class UDPSyslogTransport:
+    max_datagram = 65000
+
+    def __init__(self, host, port, timeout):
+        self.addr = (host, port)
+        self.sock = socket.socket(socket.AF_INET6 if ":" in host else socket.AF_INET, socket.SOCK_DGRAM)
+
+    def send(self, messages):
+        for m in messages:
+            self.sock.sendto(m[:self.max_datagram], self.addr)
+
+    def close(self):
+        self.sock.close()
+
+
+class TCPSyslogTransport:
+    def __init__(self, host, port, timeout):
+        self.addr = (host, port)
+        self.timeout = timeout
+        self.sock = None
+
+    def send(self, messages):
+        data = b"".join(b"%d %s" % (len(m), m) for m in messages)
+        if self.sock is None:
+            self.sock = socket.create_connection(self.addr, timeout=self.timeout)
+        try:
+            self.sock.sendall(data)
+        except OSError:
+            self.close()
+            raise
+
+    def close(self):
+        if self.sock is not None:
+            self.sock.close()
+            self.sock = None
+
+
+class HTTPBulkTransport:
+    def __init__(self, url, timeout, content_type="application/x-ndjson"):
+        parts = urllib.parse.urlsplit(url)
+        cls = http.client.HTTPSConnection if parts.scheme == "https" else http.client.HTTPConnection
+        self.conn = cls(parts.hostname, parts.port, timeout=timeout)
+        self.path = (parts.path or "/") + ("?" + parts.query if parts.query else "")
+        self.content_type = content_type
+
+    def send(self, messages):
+        body = b"\n".join(messages) + b"\n"
+        try:
+            self.conn.request("POST", self.path, body=body, headers={"Content-Type": self.content_type})
+            resp = self.conn.getresponse()
+            resp.read()
+        except (http.client.HTTPException, OSError):
+            self.conn.close()
+            raise
+        if resp.status >= 300:
+            raise OSError(f"HTTP bulk endpoint returned {resp.status}")
+
+    def close(self):
+        self.conn.close()
+
+
+def open_transport(url: str, timeout: float = 5):
+    parts = urllib.parse.urlsplit(url)
+    if parts.scheme == "udp":
+        return UDPSyslogTransport(parts.hostname, parts.port or 514, timeout)
+    if parts.scheme == "tcp":
+        return TCPSyslogTransport(parts.hostname, parts.port or 601, timeout)
+    if parts.scheme in ("http", "https"):
+        return HTTPBulkTransport(url, timeout)
+    raise ValueError(f"unsupported forward target {url!r}; use udp://, tcp:// or http(s)://")
+
+
+class Forwarder:
+    def __init__(self, url: str, format: str = None, batch_size: int = 500, flush_interval: float = 0.5,
+                 max_queue: int = 100000, retries: int = 5, backoff: float = 0.5, timeout: float = 5,
+                 spool_dir: str = None, app_name: str = "dagger", allow_external: bool = False):
+        parts = urllib.parse.urlsplit(url)
+        if not parts.hostname:
+            raise ValueError(f"invalid forward target {url!r}")
+        if not is_allowed(parts.hostname, allow_external):
+            raise PermissionError(f"forward target {parts.hostname} is external; external network not allowed")
+        self.url = url
+        self.syslog = parts.scheme in ("udp", "tcp")
+        self.serializer = get_serializer(format or ("cef" if self.syslog else "jsonl"))
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.retries = retries
+        self.backoff = backoff
+        self.timeout = timeout
+        self.app_name = app_name
+        self.hostname = socket.gethostname()
+        self.spool_dir = spool_dir if spool_dir is not None else os.path.join(LOG_DIR, "spool")
+        self.transport = open_transport(url, timeout)
+        self.stats = {"submitted": 0, "sent": 0, "batches": 0, "retries": 0, "spooled": 0, "replayed": 0,
+                      "dropped": 0, "errors": 0}
+        self.error = None
+        self._queue = queue.Queue(maxsize=max_queue)
+        self._spool_lock = threading.Lock()
+        self._overflow = None
+        # spool left over from an earlier run is delivered first
+        self._spool_dirty = bool(self.spool_dir and glob.glob(os.path.join(self.spool_dir, "forward-*.spool")))
+        self._stopping = False
+        self._deadline = None
+        self._healthy = True
+        self._next_probe = 0.0
+        self._closed = False
+        self._thread = threading.Thread(target=self._run, name="Forwarder", daemon=True)
+        METRICS.collector(self._metrics)
+        self._thread.start()
+
+    def encode(self, event) -> bytes:
+        msg = self.serializer.encode(event)
+        if self.syslog:
+            pri = FACILITY_LOCAL0 * 8 + _SEVERITY.get(event.outcome, 6)
+            msg = f"<{pri}>1 {iso(event.ts)} {self.hostname} {self.app_name} {os.getpid()} {event.type} - {msg}"
+        return msg.replace("\n", " ").encode("utf-8")
+
+    def submit(self, line):
+        """Queue one event (or plain line); spills to the disk spool instead of blocking."""
+        if self._stopping:
+            return
+        event = as_event(line)
+        self.stats["submitted"] += 1
+        try:
+            self._queue.put_nowait(event)
+        except queue.Full:
+            self._spill([self.encode(event)], overflow=True)
+
+    __call__ = submit
+
+    # -- spool --------------------------------------------------------------
+
+    def _spill(self, messages, overflow=False):
+        if not self.spool_dir:
+            self.stats["dropped"] += len(messages)
+            return
+        with self._spool_lock:
+            os.makedirs(self.spool_dir, exist_ok=True)
+            data = b"".join(m + b"\n" for m in messages)
+            if overflow and not self._closed:
+                # producers spill constantly under overload; keep one open file for that
+                if self._overflow is None:
+                    self._overflow = open(self._spool_name(), "ab")
+                    # keeps other processes from replaying it while we still append
+                    hold_shared(self._overflow.fileno())
+                self._overflow.write(data)
+            else:
+                with open(self._spool_name(), "ab") as f:
+                    hold_shared(f.fileno())
+                    f.write(data)
+            self.stats["spooled"] += len(messages)
+            self._spool_dirty = True
+
+    def _spool_name(self) -> str:
+        return os.path.join(self.spool_dir, f"forward-{time.time_ns()}-{os.getpid()}.spool")
+
+    def _replay_spool(self) -> bool:
+        """Send spooled messages oldest first; stops (returning False) at the first failure."""
+        if not self.spool_dir:
+            return True
+        with self._spool_lock:
+            if self._overflow is not None:
+                self._overflow.close()
+                self._overflow = None
+            self._spool_dirty = False
+        os.makedirs(self.spool_dir, exist_ok=True)
+        try:
+            with locked(os.path.join(self.spool_dir, "replay.lock"), blocking=False):
+                # listed under the lock, so another forwarder cannot have replayed these already
+                files = sorted(glob.glob(os.path.join(self.spool_dir, "forward-*.spool")))
+                return all(self._replay_file(path) for path in files)
+        except BlockingIOError:
+            # another process is replaying the spool; look again later
+            self._spool_dirty = True
+            return True
+
+    def _replay_file(self, path: str) -> bool:
+        try:
+            f = open(path, "rb")
+        except FileNotFoundError:
+            return True
+        with f:
+            try:
+                lock(f.fileno(), blocking=False)
+            except BlockingIOError:
+                # a forwarder is still appending to it
+                self._spool_dirty = True
+                return True
+            messages = [m.rstrip(b"\n") for m in f if m.strip()]
+            for i in range(0, len(messages), self.batch_size):
+                try:
+                    if self._remaining() <= 0:
+                        raise TimeoutError("forwarder closing")
+                    self.transport.send(messages[i:i + self.batch_size])
+                except OSError:
+                    # rewrite what is left so nothing is sent twice
+                    with open(path, "wb") as out:
+                        out.write(b"".join(m + b"\n" for m in messages[i:]))
+                    self._spool_dirty = True
+                    return False
+                self.stats["replayed"] += len(messages[i:i + self.batch_size])
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+        return True
+
+    # -- sender -------------------------------------------------------------
+
+    def _remaining(self) -> float:
+        """Seconds left before the close deadline (infinite while not closing)."""
+        if self._deadline is None:
+            return float("inf")
+        return self._deadline - time.monotonic()
+
+    def _send(self, messages) -> bool:
+        delay = self.backoff
+        for attempt in range(self.retries + 1):
+            try:
+                self.transport.send(messages)
+                self.stats["sent"] += len(messages)
+                self.stats["batches"] += 1
+                return True
+            except OSError:
+                if attempt == self.retries or self._remaining() <= delay:
+                    break
+                self.stats["retries"] += 1
+                time.sleep(delay)
+                delay = min(delay * 2, 30)
+        self._spill(messages)
+        return False
+
+    def _run(self):
+        try:
+            self._loop()
+        finally:
+            with self._spool_lock:
+                self._closed = True
+                if self._overflow is not None:
+                    self._overflow.close()
+                    self._overflow = None
+            self.transport.close()
+
+    def _loop(self):
+        while not (self._stopping and self._queue.empty()):
+            try:
+                if not self._cycle():
+                    return
+            except Exception as e:
+                # one bad batch must not stop forwarding for good
+                self.error = e
+                self.stats["errors"] += 1
+                print(f"dagger: forwarder error: {e!r}", file=sys.stderr)
+                time.sleep(self.flush_interval)
+
+    def _cycle(self) -> bool:
+        """Send one batch and maybe replay the spool; False once the close deadline has passed."""
+        batch = []
+        deadline = time.monotonic() + self.flush_interval
+        while len(batch) < self.batch_size:
+            try:
+                batch.append(self._queue.get(timeout=max(0.0, deadline - time.monotonic())))
+            except queue.Empty:
+                break
+        if self._remaining() <= 0:
+            # out of time: keep the rest for the next run instead of sending it
+            while True:
+                try:
+                    batch.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+            if batch:
+                self._spill([self.encode(e) for e in batch])
+            return False
+        if batch:
+            self._healthy = self._send([self.encode(e) for e in batch])
+        if self._queue.empty() and self._spool_dirty:
+            # a failed send or replay doubles as the health probe; retry the spool periodically
+            if self._healthy or time.monotonic() >= self._next_probe:
+                self._healthy = self._replay_spool()
+                if not self._healthy:
+                    self._next_probe = time.monotonic() + 5.0
+        return True
+
+    def _metrics(self):
+        labels = {"target": self.url}
+        return [
+            ("dagger_forward_events_total", "counter", "Events handled by the SIEM forwarder, by stage.",
+             [(dict(labels, stage=k), v) for k, v in self.stats.items()]),
+            ("dagger_forward_queue_events", "gauge", "Events waiting to be forwarded.",
+             [(labels, self._queue.qsize())]),
+        ]
+
+    def close(self, timeout: float = 10):
+        """Stop accepting events and try to deliver what is queued within ``timeout``.
+
+        What is not delivered by then is spooled. A send already in flight
+        may take up to the transport timeout longer.
+        """
+        if self._stopping:
+            return
+        METRICS.remove_collector(self._metrics)
+        if timeout is not None:
+            self._deadline = time.monotonic() + timeout
+        self._stopping = True
+        self._thread.join(timeout)
+        if self._thread.is_alive():
+            self._thread.join(self.timeout)
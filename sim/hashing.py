@@ -0,0 +1,236 @@
+"""Multi-digest file hashing with a persistent cache.
+
+:func:`hash_file` reads a file once (memory-mapped when large) and feeds
+every block to all requested digests, so MD5, SHA-1 and SHA-256 cost a
+single pass over the data. ``ssdeep`` and ``imphash`` are available when the
+optional ``ssdeep``/``ppdeep`` and ``pefile`` packages are installed.
+
+:class:`HashCache` remembers digests keyed by ``(path, size, mtime, inode)``
+in a small SQLite database, so re-reporting an unchanged artifact costs one
+``stat`` call instead of a full read. Several processes may share the
+database: every write is its own short WAL transaction, and a cache that is
+locked or unwritable only costs the lookup, never the hash.
+"""
+import os
+import json
+import mmap
+import atexit
+import sqlite3
+import hashlib
+import threading
+
+from .eventlog import LOG_DIR
+
+DEFAULT_ALGORITHMS = ("md5", "sha1", "sha256")
+
+OPTIONAL_ALGORITHMS = ("ssdeep", "imphash")
+
+CACHE_PATH = os.path.join(LOG_DIR, "hash_cache.sqlite")
+
+BLOCK_SIZE = 1 << 20
+
+# below this size a buffered read is cheaper than setting up a mapping
+MMAP_THRESHOLD = 4 << 20
+
+
+def _check(algorithms):
+    for name in algorithms:
+        if name not in OPTIONAL_ALGORITHMS and name not in hashlib.algorithms_available:
+            raise ValueError(f"unknown hash algorithm {name!r}")
+
+
+def _fuzzy_module():
+    try:
+        import ssdeep
+        return ssdeep
+    except ImportError:
+        pass
+    try:
+        import ppdeep
+        return ppdeep
+    except ImportError:
+        raise ValueError("ssdeep hashing requires the ssdeep or ppdeep package (pip install ppdeep)")
+
+
+def _fuzzy(data) -> str:
+    return _fuzzy_module().hash(bytes(data))
+
+
+def _fuzzy_file(path: str) -> str:
+    # both packages stream the file themselves, so a large file is never copied into memory
+    return _fuzzy_module().hash_from_file(path)
+
+
+def _imphash(path: str = None, data=None):
+    try:
+        import pefile
+    except ImportError:
+        raise ValueError("imphash requires the pefile package (pip install pefile)")
+    if data is not None and bytes(data[:2]) != b"MZ":
+        return None
+    try:
+        pe = pefile.PE(path, fast_load=True) if data is None else pefile.PE(data=bytes(data), fast_load=True)
+        pe.parse_data_directories(directories=[pefile.DIRECTORY_ENTRY["IMAGE_DIRECTORY_ENTRY_IMPORT"]])
+        return pe.get_imphash() or None
+    except pefile.PEFormatError:
+        return None
+
+
+def hash_data(data, algorithms=DEFAULT_ALGORITHMS) -> dict:
+    """Digests of an in-memory buffer (e.g. the bytes just written to a file)."""
+    _check(algorithms)
+    out = {}
+    for name in algorithms:
+        if name == "ssdeep":
+            out[name] = _fuzzy(data)
+        elif name == "imphash":
+            out[name] = _imphash(data=data)
+        else:
+            out[name] = hashlib.new(name, data).hexdigest()
+    return out
+
+
+def hash_file(path: str, algorithms=DEFAULT_ALGORITHMS, block_size: int = BLOCK_SIZE) -> dict:
+    """Digests of a file, computed in one pass over its contents."""
+    _check(algorithms)
+    hashers = [(name, hashlib.new(name)) for name in algorithms if name not in OPTIONAL_ALGORITHMS]
+    out = {}
+    with open(path, "rb") as f:
+        size = os.fstat(f.fileno()).st_size
+        if size >= MMAP_THRESHOLD:
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                view = memoryview(mm)
+                try:
+                    # every digest walks the same block while it is still in cache
+                    for off in range(0, size, block_size):
+                        chunk = view[off:off + block_size]
+                        for _, h in hashers:
+                            h.update(chunk)
+                        chunk.release()
+                finally:
+                    view.release()
+            if "ssdeep" in algorithms:
+                out["ssdeep"] = _fuzzy_file(path)
+        else:
+            data = f.read()
+            for _, h in hashers:
+                h.update(data)
+            if "ssdeep" in algorithms:
+                out["ssdeep"] = _fuzzy(data)
+    if "imphash" in algorithms:
+        out["imphash"] = _imphash(path) if _is_pe(path) else None
+    for name, h in hashers:
+        out[name] = h.hexdigest()
+    return {name: out[name] for name in algorithms}
+
+
+def _is_pe(path: str) -> bool:
+    with open(path, "rb") as f:
+        return f.read(2) == b"MZ"
+
+
+class HashCache:
+    """Digests keyed by ``(path, size, mtime_ns, inode)``; safe to share between threads and processes.
+
+    ``timeout`` is how long a write waits for another process holding the
+    database before the entry is skipped.
+    """
+
+    def __init__(self, path: str = CACHE_PATH, timeout: float = 5.0):
+        if path != ":memory:":
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self.path = path
+        self.hits = 0
+        self.misses = 0
+        self.errors = 0
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(path, timeout=timeout, check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.execute("CREATE TABLE IF NOT EXISTS hashes (path TEXT PRIMARY KEY, size INTEGER, "
+                         "mtime_ns INTEGER, inode INTEGER, digests TEXT)")
+
+    def get(self, path: str, st=None, algorithms=DEFAULT_ALGORITHMS):
+        """Cached digests for ``path`` if it is unchanged and has all ``algorithms``, else None."""
+        path = os.path.abspath(path)
+        st = st or os.stat(path)
+        with self._lock:
+            row = self._db.execute("SELECT size, mtime_ns, inode, digests FROM hashes WHERE path = ?",
+                                   (path,)).fetchone()
+        if row is None or row[:3] != (st.st_size, st.st_mtime_ns, st.st_ino):
+            return None
+        digests = json.loads(row[3])
+        if any(name not in digests for name in algorithms):
+            return None
+        return {name: digests[name] for name in algorithms}
+
+    def put(self, path: str, st, digests: dict):
+        path = os.path.abspath(path)
+        # committed at once: an open write transaction would lock out every other process
+        with self._lock, self._db:
+            row = self._db.execute("SELECT size, mtime_ns, inode, digests FROM hashes WHERE path = ?",
+                                   (path,)).fetchone()
+            if row is not None and row[:3] == (st.st_size, st.st_mtime_ns, st.st_ino):
+                # same file content: keep digests computed for other algorithm sets
+                digests = {**json.loads(row[3]), **digests}
+            self._db.execute("INSERT OR REPLACE INTO hashes VALUES (?, ?, ?, ?, ?)",
+                             (path, st.st_size, st.st_mtime_ns, st.st_ino, json.dumps(digests)))
+
+    def hash(self, path: str, algorithms=DEFAULT_ALGORITHMS) -> dict:
+        """Digests of ``path``, from the cache when the file has not changed since it was hashed."""
+        st = os.stat(path)
+        try:
+            digests = self.get(path, st, algorithms)
+        except sqlite3.Error:
+            self.errors += 1
+            digests = None
+        if digests is not None:
+            self.hits += 1
+            return digests
+        self.misses += 1
+        digests = hash_file(path, algorithms)
+        # only trust the result if the file did not change while it was read
+        after = os.stat(path)
+        if (after.st_size, after.st_mtime_ns, after.st_ino) == (st.st_size, st.st_mtime_ns, st.st_ino):
+            try:
+                self.put(path, st, digests)
+            except sqlite3.Error:
+                # busy or read-only cache: the digests are still right, just not remembered
+                self.errors += 1
+        return digests
+
+    def prune(self) -> int:
+        """Drop entries for files that no longer exist; returns how many were removed."""
+        with self._lock:
+            paths = [p for (p,) in self._db.execute("SELECT path FROM hashes")]
+            gone = [(p,) for p in paths if not os.path.exists(p)]
+            with self._db:
+                self._db.executemany("DELETE FROM hashes WHERE path = ?", gone)
+        return len(gone)
+
+    def close(self):
+        with self._lock:
+            self._db.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+_default_cache = None
+_default_lock = threading.Lock()
+
+
+def get_cache():
+    """Process-wide cache at :data:`CACHE_PATH`, or None if it cannot be opened."""
+    global _default_cache
+    with _default_lock:
+        if _default_cache is None:
+            try:
+                _default_cache = HashCache()
+            except (OSError, sqlite3.Error):
+                return None
+            atexit.register(_default_cache.close)
+        return _default_cache
@@ -0,0 +1,213 @@
+"""End-to-end SIEM ingestion latency harness.
+
+Runs a mix of real simulator actions (network, file, registry and mutex)
+at a series of increasing target rates. Every resulting event is tagged
+with a correlation ID and its send time and handed to a
+:class:`~sim.forward.Forwarder`, exactly as ``--forward`` would. A local
+collector (syslog over UDP/TCP or HTTP bulk, from :mod:`sim.stubs`)
+timestamps what arrives, and each step reports the delivery latency
+distribution and the events lost::
+
+    python cli.py ingest -r 100 -r 1000 -r 5000 --collector tcp
+
+To measure a real pipeline, forward into its input with ``--target`` and
+point its output at the collector's ``--listen`` port.
+
+The correlation ID (``corr_id``) and the send time (``sent_ts``, epoch
+seconds) travel as event fields; the ID is also appended to the message
+as ``corr_id=<id>`` so formats that drop fields (plain text) keep it.
+"""
+import os
+import re
+import time
+import shutil
+import tempfile
+import threading
+
+from . import actions
+from .forward import Forwarder
+from .stats import latency_summary
+
+KINDS = ("tcp", "http", "dns", "file", "registry", "mutex")
+_CORR_ID = re.compile(rb"corr_id\\?=([0-9a-f]{8}-\d+)")
+
+
+def _operations(kinds, scratch, tcp, http):
+    """``{kind: op(i) -> Event}`` for the selected kinds, all against local targets."""
+    ops = {
+        "tcp": lambda i: actions.tcp_connect(tcp.host, tcp.port, timeout=2)[1],
+        "http": lambda i: actions.http_get(f"{http.url}/ingest/{i}", timeout=5)[1],
+        "dns": lambda i: actions.resolve_dns("localhost")[1],
+        "file": lambda i: actions.create_file(os.path.join(scratch, "files"), f"ingest_{i % 1000}.txt",
+                                              "All of your files have been encrypted!\n")[1],
+        "registry": lambda i: actions.set_registry("HKCU\\Software\\DAGGER\\Ingest", f"v{i % 100}", str(i),
+                                                   store_path=os.path.join(scratch, "registry.json"))[1],
+    }
+
+    def mutex(i):
+        token, ok, event = actions.create_mutex(f"dagger_ingest_{os.getpid()}_{i}")
+        if ok:
+            actions.release_mutex(token)
+        return event
+
+    ops["mutex"] = mutex
+    return [ops[k] for k in kinds]
+
+
+def _collector(protocol: str, listen: str):
+    from .stubs import StubHTTPServer, StubSyslogServer
+
+    host, _, port = (listen or "127.0.0.1:0").rpartition(":")
+    host, port = host or "127.0.0.1", int(port or 0)
+    if protocol == "http":
+        return StubHTTPServer(host, port)
+    return StubSyslogServer(host, port, protocol=protocol)
+
+
+class IngestHarness:
+    """Step through ``rates`` (events/s), ``duration`` seconds each.
+
+    After a step's generation ends the forwarder is given ``drain`` seconds
+    to deliver its queue and spool; whatever has not arrived by then counts
+    as lost. Events arriving after their step are reported as ``late``.
+    """
+
+    def __init__(self, rates=(100, 500, 1000, 2000), duration: float = 5.0, drain: float = 5.0,
+                 kinds=None, workers: int = 8, collector: str = "udp", listen: str = None, target: str = None,
+                 format: str = None, batch_size: int = 500, flush_interval: float = 0.5,
+                 allow_external: bool = False, progress=None):
+        kinds = kinds or KINDS
+        unknown = [k for k in kinds if k not in KINDS]
+        if unknown:
+            raise ValueError(f"unknown event kind {unknown[0]!r}; expected one of {', '.join(KINDS)}")
+        if collector not in ("udp", "tcp", "http"):
+            raise ValueError(f"unknown collector {collector!r}; expected udp, tcp or http")
+        if not rates or min(rates) <= 0:
+            raise ValueError("rates must be positive")
+        self.rates = list(rates)
+        self.duration = duration
+        self.drain = drain
+        self.kinds = list(kinds)
+        self.workers = workers
+        self.protocol = collector
+        self.listen = listen
+        self.target = target
+        self.format = format
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.allow_external = allow_external
+        self.progress = progress
+        self._stop = threading.Event()
+        self._seen = 0  # collector records already matched
+
+    def stop(self):
+        self._stop.set()
+
+    def run(self) -> dict:
+        from .stubs import StubHTTPServer, StubTCPListener
+
+        scratch = tempfile.mkdtemp(prefix="dagger_ingest_")
+        steps = []
+        try:
+            with _collector(self.protocol, self.listen) as collector, StubTCPListener() as tcp, \
+                    StubHTTPServer() as http:
+                url = collector.url + ("/bulk" if self.protocol == "http" else "")
+                target = self.target or url
+                ops = _operations(self.kinds, scratch, tcp, http)
+                for n, rate in enumerate(self.rates):
+                    if self._stop.is_set():
+                        break
+                    if self.progress:
+                        self.progress(n, rate)
+                    steps.append(self._step(collector, target, ops, rate, scratch))
+        finally:
+            shutil.rmtree(scratch, ignore_errors=True)
+        return {
+            "collector": url,
+            "target": target,
+            "format": self.format,
+            "kinds": self.kinds,
+            "duration": self.duration,
+            "steps": steps,
+        }
+
+    def _step(self, collector, target, ops, rate, scratch) -> dict:
+        run = os.urandom(4).hex()
+        sent = {}  # corr_id -> send time
+        failed = [0] * self.workers
+        forwarder = Forwarder(target, format=self.format, batch_size=self.batch_size,
+                              flush_interval=self.flush_interval, spool_dir=os.path.join(scratch, "spool"),
+                              allow_external=self.allow_external)
+        count = max(1, int(rate * self.duration))
+        start = time.time() + 0.05
+
+        def worker(w):
+            clock = time.time
+            for i in range(w, count, self.workers):
+                if self._stop.is_set():
+                    return
+                delay = start + i / rate - clock()
+                if delay > 0:
+                    time.sleep(delay)
+                event = ops[i % len(ops)](i)
+                if not event.ok:
+                    failed[w] += 1
+                cid = f"{run}-{i}"
+                now = clock()
+                event.fields["corr_id"] = cid
+                event.fields["sent_ts"] = round(now, 6)
+                event.message = f"{event.message} corr_id={cid}"
+                sent[cid] = now
+                forwarder.submit(event)
+
+        threads = [threading.Thread(target=worker, args=(w,), daemon=True) for w in range(self.workers)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        generated = time.time()
+        forwarder.close(timeout=self.drain)
+        # the forwarder's queue is flushed; give the collector the rest of the drain window
+        deadline = generated + self.drain
+        received = {}
+        late = 0
+        while True:
+            with collector.lock:
+                batch = collector.received[self._seen:]
+            self._seen += len(batch)
+            for when, raw in batch:
+                m = _CORR_ID.search(raw)
+                if not m:
+                    continue
+                cid = m.group(1).decode("ascii")
+                if cid in sent:
+                    received.setdefault(cid, when)
+                else:
+                    late += 1
+            if len(received) >= len(sent) or time.time() >= deadline:
+                break
+            time.sleep(0.05)
+        latencies = [when - sent[cid] for cid, when in received.items()]
+        lost = len(sent) - len(received)
+        return {
+            "rate": rate,
+            "sent": len(sent),
+            "achieved_rate": round(len(sent) / max(generated - start, 1e-9), 1),
+            "action_failures": sum(failed),
+            "received": len(received),
+            "lost": lost,
+            "loss_pct": round(100.0 * lost / len(sent), 3) if sent else 0.0,
+            "late": late,
+            "latency_ms": latency_summary(latencies),
+            "forwarder": dict(forwarder.stats),
+        }
+
+
+def format_table(report: dict) -> str:
+    lines = [f"{'rate/s':>8} {'achieved':>9} {'sent':>8} {'lost':>7} {'loss %':>7} {'p50 ms':>9} {'p95 ms':>9} "
+             f"{'p99 ms':>9} {'max ms':>9}"]
+    for s in report["steps"]:
+        lat = s["latency_ms"]
+        lines.append(f"{s['rate']:>8} {s['achieved_rate']:>9} {s['sent']:>8} {s['lost']:>7} {s['loss_pct']:>7} "
+                     f"{lat['p50']:>9} {lat['p95']:>9} {lat['p99']:>9} {lat['max']:>9}")
+    return "\n".join(lines)
@@ -0,0 +1,232 @@
+"""Sidecar index for the event log.
+
+``<log>.idx`` holds one fixed-size record per block of log lines (at most
+``block_bytes`` / ``block_lines``): the block's byte range, its min/max
+timestamp and a bitmask of the event types it contains. A query loads the
+(small) index, skips every block that cannot match, and only reads and
+filters the rest, plus whatever tail of the log is not indexed yet.
+
+The index is written by :class:`~sim.eventlog.LogWriter` as it writes lines;
+:func:`build_index` catches it up over existing log content. When several
+processes write one log, each writer calls :meth:`IndexBuilder.catch_up`
+under the log's lock before adding its own lines, so records stay in file
+order and cover every line exactly once. Offsets are
+always uncompressed offsets, so a segment's index stays valid after it is
+compressed (see :mod:`sim.archive`).
+"""
+import io
+import os
+import struct
+import datetime
+
+from .archive import open_segment, segment_size
+from .events import EVENT_TYPES, classify, parse_record
+
+TYPE_BITS = {t: 1 << i for i, t in enumerate(EVENT_TYPES)}
+
+RECORD = struct.Struct("<ddQQII")
+
+
+def index_path(log_path: str) -> str:
+    return log_path + ".idx"
+
+
+def to_epoch(value) -> float:
+    """Accept an epoch number, a datetime or an ISO-8601 string."""
+    if value is None or isinstance(value, (int, float)):
+        return value
+    if isinstance(value, str):
+        value = datetime.datetime.fromisoformat(value.strip())
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=datetime.timezone.utc)
+    return value.timestamp()
+
+
+def parse_line(raw: bytes):
+    """Return ``(epoch, type, message)`` for a log line in any event format."""
+    epoch, kind, msg = parse_record(raw.decode("utf-8", "replace"))
+    return epoch, kind or classify(msg), msg
+
+
+class IndexBuilder:
+    def __init__(self, log_path: str, block_bytes: int = 1 << 16, block_lines: int = 1024):
+        self.log_path = log_path
+        self.path = index_path(log_path)
+        self.block_bytes = block_bytes
+        self.block_lines = block_lines
+        self._file = open(self.path, "ab")
+        self.indexed_to = indexed_end(log_path)
+        # size of the index as of our last look; anything beyond was written by another writer
+        self._seen = os.fstat(self._file.fileno()).st_size
+        self._start = None
+
+    def add(self, epoch: float, kind: str, offset: int, length: int):
+        if self._start is None:
+            self._start = offset
+            self._min = self._max = epoch
+            self._mask = 0
+            self._lines = 0
+        self._min = min(self._min, epoch)
+        self._max = max(self._max, epoch)
+        self._mask |= TYPE_BITS.get(kind, 1)
+        self._lines += 1
+        self._end = offset + length
+        if self._lines >= self.block_lines or self._end - self._start >= self.block_bytes:
+            self.finish_block()
+
+    def finish_block(self):
+        if self._start is None:
+            return
+        self._file.write(RECORD.pack(self._min, self._max, self._start, self._end, self._lines, self._mask))
+        self._file.flush()
+        self._seen = os.fstat(self._file.fileno()).st_size
+        self.indexed_to = self._end
+        self._start = None
+
+    def index_lines(self, start: int, end: int = None, partial: bool = False) -> int:
+        """Index the log's lines from ``start`` up to ``end``; returns how many.
+
+        A last line without its newline is only indexed with ``partial``.
+        """
+        added = 0
+        with open_segment(self.log_path) as f:
+            f.seek(start)
+            offset = start
+            for raw in f:
+                if end is not None and offset + len(raw) > end:
+                    raw = raw[:end - offset]
+                if not raw or (not raw.endswith(b"\n") and not partial):
+                    break
+                epoch, kind, _ = parse_line(raw)
+                self.add(epoch if epoch is not None else 0.0, kind, offset, len(raw))
+                offset += len(raw)
+                added += 1
+                if end is not None and offset >= end:
+                    break
+        return added
+
+    def catch_up(self, end: int):
+        """Index what other writers appended before ``end``, the log's current size.
+
+        Call with the log's lock held, right before adding lines at ``end``.
+        """
+        size = os.fstat(self._file.fileno()).st_size
+        if size != self._seen:
+            # another writer added records; it also indexed the lines of our open block
+            self._start = None
+            self._seen = size
+            self.indexed_to = indexed_end(self.log_path)
+        elif self._start is not None:
+            if self._end == end:
+                return
+            # foreign lines follow our open block: close it so the records stay in file order
+            self.finish_block()
+        if self.indexed_to < end:
+            self.index_lines(self.indexed_to, end, partial=True)
+
+    def close(self):
+        if os.fstat(self._file.fileno()).st_size == self._seen:
+            self.finish_block()
+        # else another writer has indexed our open block already
+        self._file.close()
+
+    def abandon(self):
+        """Close without writing the open block; a later :meth:`catch_up` or :func:`build_index` covers it."""
+        self._start = None
+        self._file.close()
+
+
+def read_index(log_path: str) -> list:
+    try:
+        with open(index_path(log_path), "rb") as f:
+            data = f.read()
+    except FileNotFoundError:
+        return []
+    usable = len(data) - len(data) % RECORD.size
+    return [RECORD.unpack_from(data, off) for off in range(0, usable, RECORD.size)]
+
+
+def indexed_end(log_path: str) -> int:
+    try:
+        size = os.path.getsize(index_path(log_path))
+    except OSError:
+        return 0
+    if size < RECORD.size:
+        return 0
+    with open(index_path(log_path), "rb") as f:
+        f.seek(size - size % RECORD.size - RECORD.size)
+        return RECORD.unpack(f.read(RECORD.size))[3]
+
+
+def build_index(log_path: str) -> int:
+    """Index any log content past the end of the existing index; returns lines added."""
+    size = segment_size(log_path) if os.path.exists(log_path) else 0
+    if indexed_end(log_path) > size:
+        # the log was replaced or truncated; the old index is useless
+        os.remove(index_path(log_path))
+    builder = IndexBuilder(log_path)
+    added = 0
+    try:
+        if size > builder.indexed_to:
+            added = builder.index_lines(builder.indexed_to)
+    finally:
+        builder.close()
+    return added
+
+
+def _match(raw, types_mask, since, until, text_b):
+    if text_b is not None and text_b not in raw:
+        return None
+    epoch, kind, _ = parse_line(raw)
+    if types_mask and not TYPE_BITS.get(kind, 1) & types_mask:
+        return None
+    if since is not None and (epoch is None or epoch < since):
+        return None
+    if until is not None and (epoch is None or epoch > until):
+        return None
+    return raw.decode("utf-8", "replace")
+
+
+def search(log_path: str, types=None, since=None, until=None, text: str = None, limit: int = None):
+    """Yield log lines matching all given filters, in file order."""
+    types_mask = 0
+    for t in types or ():
+        if t not in TYPE_BITS:
+            raise ValueError(f"unknown event type {t!r}; expected one of {', '.join(EVENT_TYPES)}")
+        types_mask |= TYPE_BITS[t]
+    since, until = to_epoch(since), to_epoch(until)
+    text_b = text.encode("utf-8") if text else None
+    found = 0
+    end = 0
+    if not os.path.exists(log_path):
+        return
+    with open_segment(log_path) as f:
+        size = f.seek(0, io.SEEK_END)
+        # blocks past EOF describe lines still sitting in the writer's buffer
+        blocks = [b for b in read_index(log_path) if b[3] <= size]
+        for lo, hi, start, stop, _, mask in blocks:
+            end = stop
+            if types_mask and not mask & types_mask:
+                continue
+            if (since is not None and hi < since) or (until is not None and lo > until):
+                continue
+            f.seek(start)
+            chunk = f.read(stop - start)
+            if text_b is not None and text_b not in chunk:
+                continue
+            for raw in io.BytesIO(chunk):
+                line = _match(raw, types_mask, since, until, text_b)
+                if line is not None:
+                    yield line
+                    found += 1
+                    if limit and found >= limit:
+                        return
+        # whatever has not been indexed yet is scanned directly
+        f.seek(end)
+        for raw in f:
+            line = _match(raw, types_mask, since, until, text_b)
+            if line is not None:
+                yield line
+                found += 1
+                if limit and found >= limit:
+                    return
@@ -0,0 +1,89 @@
+import os
+import bisect
+from array import array
+
+from .archive import is_compressed, open_segment
+
+
+class LogTail:
+    """Incremental line index over a growing log file.
+
+    :meth:`refresh` only reads bytes appended since the last call. Instead of
+    remembering every line offset, a checkpoint ``(line number, byte offset)``
+    is kept roughly every ``block`` bytes, so multi-GB logs index in a few
+    hundred KB and :meth:`read_lines` never seeks further than one block
+    before the requested line. A replaced (rotated) or truncated file is
+    detected and re-indexed from the start. Compressed segments (see
+    :mod:`sim.archive`) are read in place; they never change, so they are
+    indexed once.
+    """
+
+    def __init__(self, path: str, block: int = 1 << 16):
+        self.path = path
+        self.block = block
+        self.sealed = is_compressed(path)
+        self.reset()
+
+    def reset(self):
+        self.lines = 0
+        self.offset = 0
+        self._ino = None
+        self._mark_lines = array("Q")
+        self._mark_offsets = array("Q")
+
+    def refresh(self) -> int:
+        """Index newly appended complete lines; returns how many were added."""
+        try:
+            st = os.stat(self.path)
+        except FileNotFoundError:
+            self.reset()
+            return 0
+        if self.sealed:
+            if self._ino == st.st_ino:
+                return 0
+            self.reset()
+        elif self._ino is not None and (st.st_ino != self._ino or st.st_size < self.offset):
+            self.reset()
+        self._ino = st.st_ino
+        if not self.sealed and st.st_size == self.offset:
+            return 0
+        before = self.lines
+        with open_segment(self.path) as f:
+            f.seek(self.offset)
+            pending = b""
+            while True:
+                data = f.read(self.block)
+                if not data:
+                    break
+                data = pending + data
+                end = data.rfind(b"\n") + 1
+                if not end:
+                    # a single line longer than one block; keep reading until it ends
+                    pending = data
+                    continue
+                if not self._mark_offsets or self.offset - self._mark_offsets[-1] >= self.block:
+                    self._mark_lines.append(self.lines)
+                    self._mark_offsets.append(self.offset)
+                self.lines += data.count(b"\n", 0, end)
+                self.offset += end
+                pending = data[end:]
+        return self.lines - before
+
+    def read_lines(self, start: int, count: int) -> list:
+        """Return up to ``count`` decoded lines starting at line ``start``."""
+        if count <= 0 or start >= self.lines or not self._mark_lines:
+            return []
+        start = max(0, start)
+        count = min(count, self.lines - start)
+        i = bisect.bisect_right(self._mark_lines, start) - 1
+        out = []
+        with open_segment(self.path) as f:
+            f.seek(self._mark_offsets[i])
+            for _ in range(start - self._mark_lines[i]):
+                f.readline()
+            for _ in range(count):
+                out.append(f.readline().decode("utf-8", "replace"))
+        return out
+
+    def tail(self, count: int) -> list:
+        return self.read_lines(max(0, self.lines - count), count)
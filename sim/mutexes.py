@@ -0,0 +1,253 @@
+"""Mass named-mutex simulation with lease tracking.
+
+:class:`MutexTable` holds any number of named mutexes (``CreateMutex``
+handles on Windows, ``flock``-held lockfiles elsewhere; see
+:func:`sim.actions.create_mutex`). Every mutex is a lease with an optional
+TTL. A reaper thread keeps the expiry times in a heap and releases each
+lease when it falls due, so thousands of held mutexes cost one sleeping
+thread.
+
+:func:`churn` measures create/release throughput.
+"""
+import time
+import heapq
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from . import actions
+from .events import Event
+from .stats import rate_summary
+
+# infection markers / single-instance mutexes from public malware write-ups
+KNOWN_MUTEXES = (
+    "Global\\MsWinZonesCacheCounterMutexA0",  # WannaCry
+    "DC_MUTEX-F54S21D",                        # DarkComet default
+    ")!VoqA.I4",                               # Poison Ivy default
+    "_AVIRA_21099",                            # Zeus/Zbot
+    "AsyncMutex_6SI8OkPnk",                    # AsyncRAT default
+    "QSR_MUTEX_0kBRNrRz5TDLTr0kHs",            # Quasar default
+)
+
+
+def load_names(path: str) -> list:
+    """One mutex name per line; blank lines and ``#`` comments are skipped."""
+    with open(path, "r", encoding="utf-8") as f:
+        return [line.strip() for line in f if line.strip() and not line.lstrip().startswith("#")]
+
+
+def expand_names(names, count: int = 1) -> list:
+    """Repeat each name ``count`` times, substituting ``{i}`` (names without it are used once)."""
+    out = []
+    for name in names:
+        if "{i}" in name:
+            out.extend(name.replace("{i}", str(i)) for i in range(count))
+        else:
+            out.append(name)
+    return out
+
+
+def raise_fd_limit():
+    """Every held lockfile keeps a descriptor open; lift the soft limit to the hard one."""
+    try:
+        import resource
+    except ImportError:
+        return
+    soft, hard = resource.getrlimit(resource.RLIMIT_NOFILE)
+    if soft != hard:
+        try:
+            resource.setrlimit(resource.RLIMIT_NOFILE, (hard, hard))
+        except (ValueError, OSError):
+            pass
+
+
+class Lease:
+    __slots__ = ("name", "token", "acquired", "expires")
+
+    def __init__(self, name, token, acquired, expires):
+        self.name = name
+        self.token = token
+        self.acquired = acquired
+        self.expires = expires
+
+
+class MutexTable:
+    """Named mutexes held by this process, each with an optional TTL.
+
+    ``log`` receives one event per create/release. Expired leases are
+    released by a background thread and logged like any other release.
+    """
+
+    def __init__(self, default_ttl: float = None, log=None):
+        self.default_ttl = default_ttl
+        self.log = log
+        self._leases = {}
+        self._heap = []
+        self._cond = threading.Condition()
+        self._closed = False
+        self.expired = 0
+        raise_fd_limit()
+        self._reaper = threading.Thread(target=self._reap, name="MutexReaper", daemon=True)
+        self._reaper.start()
+
+    def __len__(self):
+        return len(self._leases)
+
+    def __contains__(self, name):
+        return name in self._leases
+
+    def _emit(self, event):
+        if self.log:
+            self.log(event)
+
+    def acquire(self, name: str, ttl: float = None):
+        """Create and hold ``name``; returns ``(ok, event)``."""
+        ttl = self.default_ttl if ttl is None else ttl
+        with self._cond:
+            held = name in self._leases
+        if held:
+            event = Event("mutex", "create", "failure", f"Mutex/lock '{name}' already exists", name=name,
+                          error="already held")
+            self._emit(event)
+            return False, event
+        token, ok, event = actions.create_mutex(name)
+        if ok:
+            now = time.monotonic()
+            expires = now + ttl if ttl else None
+            with self._cond:
+                self._leases[name] = Lease(name, token, now, expires)
+                if expires is not None:
+                    heapq.heappush(self._heap, (expires, name))
+                    if self._heap[0][1] == name:
+                        self._cond.notify()
+        self._emit(event)
+        return ok, event
+
+    def acquire_many(self, names, ttl: float = None, workers: int = 4) -> dict:
+        """Acquire every name, spread over ``workers`` threads (lockfile creation is I/O bound)."""
+        names = list(names)
+        latencies = [[] for _ in range(workers)]
+        failed = [0] * workers
+
+        def run(w):
+            clock = time.perf_counter
+            for name in names[w::workers]:
+                t0 = clock()
+                if self.acquire(name, ttl)[0]:
+                    latencies[w].append(clock() - t0)
+                else:
+                    failed[w] += 1
+
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            list(pool.map(run, range(workers)))
+        done = [v for l in latencies for v in l]
+        return rate_summary(len(done), sum(failed), time.perf_counter() - start, done)
+
+    def release(self, name: str):
+        with self._cond:
+            lease = self._leases.pop(name, None)
+        if lease is None:
+            event = Event("mutex", "release", "failure", f"No mutex/lock '{name}' to release", name=name,
+                          error="nothing held")
+            self._emit(event)
+            return False, event
+        ok, event = actions.release_mutex(lease.token)
+        event.fields.setdefault("name", name)
+        self._emit(event)
+        return ok, event
+
+    def release_all(self) -> int:
+        with self._cond:
+            names = list(self._leases)
+        return sum(self.release(name)[0] for name in names)
+
+    def leases(self) -> list:
+        """``(name, held seconds, seconds left or None)`` for every held mutex."""
+        now = time.monotonic()
+        with self._cond:
+            return [(l.name, now - l.acquired, None if l.expires is None else max(0.0, l.expires - now))
+                    for l in self._leases.values()]
+
+    def _reap(self):
+        with self._cond:
+            while not self._closed:
+                if not self._heap:
+                    self._cond.wait()
+                    continue
+                expires, name = self._heap[0]
+                wait = expires - time.monotonic()
+                if wait > 0:
+                    self._cond.wait(wait)
+                    continue
+                heapq.heappop(self._heap)
+                lease = self._leases.get(name)
+                # a name released and re-acquired since leaves a stale heap entry behind
+                if lease is None or lease.expires != expires:
+                    continue
+                del self._leases[name]
+                self.expired += 1
+                self._cond.release()
+                try:
+                    ok, event = actions.release_mutex(lease.token)
+                    event.fields.setdefault("name", name)
+                    event.fields["reason"] = "lease expired"
+                    self._emit(event)
+                finally:
+                    self._cond.acquire()
+
+    def close(self):
+        """Release everything and stop the reaper."""
+        self.release_all()
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+        self._reaper.join(2)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def churn(iterations: int = 10000, workers: int = 4, prefix: str = "dagger_churn", log=None) -> dict:
+    """Create and release ``iterations`` distinct mutexes over ``workers`` threads.
+
+    Returns :func:`~sim.stats.rate_summary` style results for the create
+    and release operations separately, plus the combined ops/s.
+    """
+    create_lat = [[] for _ in range(workers)]
+    release_lat = [[] for _ in range(workers)]
+    failures = [0] * workers
+
+    def run(w):
+        clock = time.perf_counter
+        for i in range(w, iterations, workers):
+            t0 = clock()
+            token, ok, event = actions.create_mutex(f"{prefix}_{w}_{i}")
+            t1 = clock()
+            if not ok:
+                failures[w] += 1
+                continue
+            create_lat[w].append(t1 - t0)
+            _, rel = actions.release_mutex(token)
+            release_lat[w].append(clock() - t1)
+            if log:
+                log(event)
+                log(rel)
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        list(pool.map(run, range(workers)))
+    elapsed = time.perf_counter() - start
+    creates = [v for l in create_lat for v in l]
+    releases = [v for l in release_lat for v in l]
+    result = {
+        "iterations": iterations,
+        "workers": workers,
+        "elapsed": round(elapsed, 3),
+        "ops_per_s": round((len(creates) + len(releases)) / elapsed, 1) if elapsed > 0 else 0.0,
+        "create": rate_summary(len(creates), sum(failures), elapsed, creates),
+        "release": rate_summary(len(releases), 0, elapsed, releases),
+    }
+    return result
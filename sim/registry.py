@@ -0,0 +1,445 @@
+"""Simulated Windows registry for non-Windows hosts.
+
+The registry is held in memory as a tree of keys. Lookups are
+case-insensitive like the real registry, and each key indexes its subkeys
+by lower-cased name, so finding a key costs one dict lookup per path
+component. Enumerating everything under a prefix only walks that subtree.
+
+On disk the store is the original flat ``sim_registry.json`` snapshot::
+
+    {"HKCU\\Software\\Microsoft\\Windows\\CurrentVersion\\Run": {"updater": "C:\\evil.exe"}}
+
+plus ``<store>.journal``, an append-only list of JSON change records.
+Writes only append to the journal. Once the journal holds ``compact_every``
+records it is folded into a fresh snapshot. The store reloads itself when
+another process changes either file (mtime/size), so several tabs,
+scenario runs and the CLI can share one store. Appends and compaction
+hold an exclusive lock on ``<store>.lock`` and catch up with the files
+first; a reload holds it shared, so it never sees a half-done compaction.
+A store in a directory the process cannot write is still readable.
+
+String values stay plain JSON strings in the snapshot, so existing stores
+keep working. DWORD and MULTI_SZ values are stored as JSON numbers and
+lists. Any other type is stored as ``{"type": ..., "data": ...}``. Values
+a hand-edited store may hold that the registry has no type for (objects,
+floats, null) read as REG_SZ and are written back unchanged.
+"""
+import os
+import re
+import json
+import threading
+
+from .filelock import locked
+
+DEFAULT_STORE_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "sim_registry.json")
+
+HIVES = {
+    "HKEY_LOCAL_MACHINE": "HKLM",
+    "HKEY_CURRENT_USER": "HKCU",
+    "HKEY_CLASSES_ROOT": "HKCR",
+    "HKEY_USERS": "HKU",
+    "HKEY_CURRENT_CONFIG": "HKCC",
+}
+
+VALUE_TYPES = ("REG_NONE", "REG_SZ", "REG_EXPAND_SZ", "REG_BINARY", "REG_DWORD", "REG_MULTI_SZ", "REG_QWORD")
+
+_SEP = re.compile(r"[\\/]+")
+
+
+def split_key(key: str) -> list:
+    """``HKEY_CURRENT_USER\\Software\\Run`` -> ``["HKCU", "Software", "Run"]``."""
+    parts = [p for p in _SEP.split(key.strip()) if p]
+    if not parts:
+        raise ValueError("empty registry key")
+    parts[0] = HIVES.get(parts[0].upper(), parts[0].upper())
+    return parts
+
+
+def join_key(parts) -> str:
+    return "\\".join(parts)
+
+
+def infer_type(data) -> str:
+    if isinstance(data, bool) or data is None:
+        return "REG_SZ"
+    if isinstance(data, int):
+        return "REG_QWORD" if data > 0xFFFFFFFF or data < 0 else "REG_DWORD"
+    if isinstance(data, (list, tuple)):
+        return "REG_MULTI_SZ"
+    if isinstance(data, (bytes, bytearray)):
+        return "REG_BINARY"
+    return "REG_SZ"
+
+
+def _to_json(vtype: str, data):
+    if vtype == infer_type(data) and vtype in ("REG_SZ", "REG_DWORD", "REG_MULTI_SZ"):
+        if isinstance(data, dict) and "type" in data:
+            # would read back as a typed value
+            return {"type": vtype, "data": data}
+        return list(data) if vtype == "REG_MULTI_SZ" else data
+    if isinstance(data, (bytes, bytearray)):
+        data = bytes(data).hex()
+    return {"type": vtype, "data": data}
+
+
+def _from_json(value):
+    if isinstance(value, dict) and "type" in value:
+        vtype, data = value["type"], value.get("data")
+        if vtype in ("REG_BINARY", "REG_NONE") and isinstance(data, str):
+            data = bytes.fromhex(data)
+        return vtype, data
+    return infer_type(value), value
+
+
+class _Key:
+    __slots__ = ("name", "subkeys", "values")
+
+    def __init__(self, name: str):
+        self.name = name
+        self.subkeys = {}
+        self.values = {}
+
+
+class RegistryStore:
+    """Thread-safe, journaled simulated registry backed by ``path``."""
+
+    def __init__(self, path: str = DEFAULT_STORE_PATH, compact_every: int = 10000):
+        self.path = path
+        self.journal_path = path + ".journal"
+        self.lock_path = path + ".lock"
+        self.compact_every = compact_every
+        self._lock = threading.RLock()
+        self._root = _Key("")
+        self._journal = None
+        self._journal_records = 0
+        self._signature = None
+        self.reloads = 0
+        with self._lock, locked(self.lock_path, shared=True):
+            self._load()
+
+    # -- loading ------------------------------------------------------------
+
+    def _stat_signature(self):
+        sig = []
+        for p in (self.path, self.journal_path):
+            try:
+                st = os.stat(p)
+                sig.append((st.st_mtime_ns, st.st_size, st.st_ino))
+            except FileNotFoundError:
+                sig.append(None)
+        return tuple(sig)
+
+    def _load(self):
+        self._root = _Key("")
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                text = f.read()
+            snapshot = json.loads(text) if text.strip() else {}
+        except FileNotFoundError:
+            snapshot = {}
+        for key, values in snapshot.items():
+            node = self._node(split_key(key), create=True)
+            for name, value in (values or {}).items():
+                node.values[name] = _from_json(value)
+        self._journal_records = 0
+        try:
+            with open(self.journal_path, "r", encoding="utf-8") as f:
+                for line in f:
+                    try:
+                        record = json.loads(line)
+                    except ValueError:
+                        # a torn last line from a crash mid-append
+                        continue
+                    self._apply(record)
+                    self._journal_records += 1
+        except FileNotFoundError:
+            pass
+        self._signature = self._stat_signature()
+        self.reloads += 1
+
+    def _refresh(self, held: bool = False):
+        """Reload if another process changed the files; ``held`` if the caller has the file lock."""
+        if self._stat_signature() != self._signature:
+            if self._journal is not None:
+                self._journal.close()
+                self._journal = None
+            if held:
+                self._load()
+            else:
+                with locked(self.lock_path, shared=True):
+                    self._load()
+
+    # -- tree ---------------------------------------------------------------
+
+    def _node(self, parts, create=False):
+        node = self._root
+        for part in parts:
+            child = node.subkeys.get(part.lower())
+            if child is None:
+                if not create:
+                    return None
+                child = node.subkeys[part.lower()] = _Key(part)
+            node = child
+        return node
+
+    def _apply(self, record: dict):
+        op = record["op"]
+        parts = split_key(record["key"])
+        if op == "create":
+            self._node(parts, create=True)
+        elif op == "set":
+            self._node(parts, create=True).values[record["name"]] = _from_json(record["value"])
+        elif op == "delete_value":
+            node = self._node(parts)
+            if node is not None:
+                node.values.pop(record["name"], None)
+        elif op == "delete_key":
+            parent = self._node(parts[:-1])
+            if parent is not None:
+                parent.subkeys.pop(parts[-1].lower(), None)
+
+    def _log(self, records):
+        if self._journal is None:
+            self._journal = open(self.journal_path, "a", encoding="utf-8")
+        self._journal.write("".join(json.dumps(r, separators=(",", ":")) + "\n" for r in records))
+        self._journal.flush()
+        self._journal_records += len(records)
+        # we hold the file lock, so nobody else appended since the refresh in _commit
+        self._signature = self._stat_signature()
+        if self._journal_records >= self.compact_every:
+            self._compact()
+
+    def _commit(self, records):
+        with locked(self.lock_path):
+            self._refresh(held=True)
+            for r in records:
+                self._apply(r)
+            self._log(records)
+
+    # -- queries ------------------------------------------------------------
+
+    def exists(self, key: str) -> bool:
+        with self._lock:
+            self._refresh()
+            return self._node(split_key(key)) is not None
+
+    def values(self, key: str) -> dict:
+        """``{name: (type, data)}`` for ``key``; empty if the key does not exist."""
+        with self._lock:
+            self._refresh()
+            node = self._node(split_key(key))
+            return dict(node.values) if node is not None else {}
+
+    def get_value(self, key: str, name: str, default=None):
+        """Data of one value (``""`` is the default value), or ``default``."""
+        with self._lock:
+            self._refresh()
+            node = self._node(split_key(key))
+            if node is None or name not in node.values:
+                return default
+            return node.values[name][1]
+
+    def subkeys(self, key: str) -> list:
+        with self._lock:
+            self._refresh()
+            node = self._node(split_key(key))
+            return sorted(k.name for k in node.subkeys.values()) if node is not None else []
+
+    def walk(self, prefix: str = None):
+        """``[(full key, values)]`` for ``prefix`` and every key below it (all hives if None)."""
+        with self._lock:
+            self._refresh()
+            parts = split_key(prefix) if prefix else []
+            node = self._node(parts)
+            if node is None:
+                return []
+            out = []
+            stack = [(parts, node)]
+            while stack:
+                path, n = stack.pop()
+                if path:
+                    out.append((join_key(path), dict(n.values)))
+                for child in sorted(n.subkeys.values(), key=lambda k: k.name.lower(), reverse=True):
+                    stack.append((path + [child.name], child))
+            return out
+
+    def key_count(self) -> int:
+        with self._lock:
+            self._refresh()
+            count, stack = 0, [self._root]
+            while stack:
+                n = stack.pop()
+                count += len(n.subkeys)
+                stack.extend(n.subkeys.values())
+            return count
+
+    # -- writes -------------------------------------------------------------
+
+    def create_key(self, key: str):
+        with self._lock:
+            self._commit([{"op": "create", "key": join_key(split_key(key))}])
+
+    def set_value(self, key: str, name: str, data, vtype: str = None):
+        vtype = vtype or infer_type(data)
+        if vtype not in VALUE_TYPES:
+            raise ValueError(f"unknown registry value type {vtype!r}")
+        with self._lock:
+            self._commit([{"op": "set", "key": join_key(split_key(key)), "name": name,
+                           "value": _to_json(vtype, data)}])
+
+    def delete_value(self, key: str, name: str):
+        with self._lock:
+            self._commit([{"op": "delete_value", "key": join_key(split_key(key)), "name": name}])
+
+    def delete_key(self, key: str):
+        """Delete ``key`` and everything below it."""
+        with self._lock:
+            self._commit([{"op": "delete_key", "key": join_key(split_key(key))}])
+
+    def apply_many(self, records) -> int:
+        """Apply a batch of change records with a single journal write; returns how many."""
+        records = list(records)
+        with self._lock:
+            if records:
+                self._commit(records)
+            return len(records)
+
+    def import_reg(self, source: str) -> int:
+        """Bulk-load a ``.reg`` export (path or text); returns the number of changes applied."""
+        if "\n" not in source and os.path.exists(source):
+            with open(source, "rb") as f:
+                raw = f.read()
+            text = raw.decode("utf-16") if raw[:2] in (b"\xff\xfe", b"\xfe\xff") else raw.decode("utf-8-sig")
+        else:
+            text = source
+        return self.apply_many(parse_reg(text))
+
+    # -- persistence --------------------------------------------------------
+
+    def snapshot(self) -> dict:
+        """The flat ``{key: {name: value}}`` form; keys that only hold subkeys are implied by them."""
+        with self._lock:
+            self._refresh()
+            return self._snapshot()
+
+    def _snapshot(self) -> dict:
+        out = {}
+        stack = [([], self._root)]
+        while stack:
+            path, n = stack.pop()
+            if path and (n.values or not n.subkeys):
+                out[join_key(path)] = {name: _to_json(t, d) for name, (t, d) in n.values.items()}
+            stack.extend((path + [c.name], c) for c in n.subkeys.values())
+        return out
+
+    def compact(self):
+        """Fold the journal into a fresh snapshot and start an empty journal."""
+        with self._lock, locked(self.lock_path):
+            self._refresh(held=True)
+            self._compact()
+
+    def _compact(self):
+        # caller holds the file lock and has caught up with every append
+        tmp = self.path + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(self._snapshot(), f, indent=1)
+        # replay is idempotent, so crashing between these two steps only costs a longer load
+        os.replace(tmp, self.path)
+        if self._journal is not None:
+            self._journal.close()
+            self._journal = None
+        with open(self.journal_path, "w", encoding="utf-8"):
+            pass
+        self._journal_records = 0
+        self._signature = self._stat_signature()
+
+    def close(self):
+        with self._lock:
+            if self._journal is not None:
+                self._journal.close()
+                self._journal = None
+
+
+_REG_STRING = r'"((?:[^"\\]|\\.)*)"'
+_REG_VALUE = re.compile(r'^(?:@|' + _REG_STRING + r')\s*=\s*(.*)$')
+
+
+def _reg_unescape(s: str) -> str:
+    return re.sub(r"\\(.)", r"\1", s)
+
+
+def _reg_data(raw: str):
+    raw = raw.strip()
+    if raw == "-":
+        return None, None
+    if raw.startswith('"'):
+        m = re.match(_REG_STRING, raw)
+        return "REG_SZ", _reg_unescape(m.group(1)) if m else raw.strip('"')
+    kind, _, rest = raw.partition(":")
+    kind = kind.lower()
+    if kind == "dword":
+        return "REG_DWORD", int(rest, 16)
+    if kind.startswith("hex"):
+        data = bytes(int(b, 16) for b in rest.replace(" ", "").split(",") if b)
+        code = kind[4:-1] if kind.startswith("hex(") else "3"
+        if code == "2":
+            return "REG_EXPAND_SZ", data.decode("utf-16-le").rstrip("\0")
+        if code == "7":
+            return "REG_MULTI_SZ", [s for s in data.decode("utf-16-le").split("\0") if s]
+        if code == "b":
+            return "REG_QWORD", int.from_bytes(data.ljust(8, b"\0"), "little")
+        if code == "4":
+            return "REG_DWORD", int.from_bytes(data.ljust(4, b"\0"), "little")
+        if code == "0":
+            return "REG_NONE", data
+        if code == "1":
+            return "REG_SZ", data.decode("utf-16-le").rstrip("\0")
+        return "REG_BINARY", data
+    raise ValueError(f"unsupported .reg value {raw[:40]!r}")
+
+
+def parse_reg(text: str):
+    """Yield store change records for a ``regedit`` export (REGEDIT4 or version 5.00)."""
+    key = None
+    pending = ""
+    for line in text.splitlines():
+        line = pending + line.strip()
+        pending = ""
+        if line.endswith("\\") and not line.startswith("["):
+            # hex data continued on the next line
+            pending = line[:-1]
+            continue
+        if not line or line.startswith(";") or line.startswith("Windows Registry Editor") or line == "REGEDIT4":
+            continue
+        if line.startswith("[") and line.endswith("]"):
+            name = line[1:-1]
+            if name.startswith("-"):
+                key = None
+                yield {"op": "delete_key", "key": join_key(split_key(name[1:]))}
+            else:
+                key = join_key(split_key(name))
+                yield {"op": "create", "key": key}
+            continue
+        m = _REG_VALUE.match(line)
+        if not m or key is None:
+            continue
+        name = "" if line.startswith("@") else _reg_unescape(m.group(1))
+        vtype, data = _reg_data(m.group(2))
+        if vtype is None:
+            yield {"op": "delete_value", "key": key, "name": name}
+        else:
+            yield {"op": "set", "key": key, "name": name, "value": _to_json(vtype, data)}
+
+
+_stores = {}
+_stores_lock = threading.Lock()
+
+
+def open_store(path: str = None) -> RegistryStore:
+    """Shared :class:`RegistryStore` for ``path`` (one instance per file per process)."""
+    path = os.path.abspath(path or DEFAULT_STORE_PATH)
+    with _stores_lock:
+        store = _stores.get(path)
+        if store is None:
+            store = _stores[path] = RegistryStore(path)
+        return store
@@ -0,0 +1,307 @@
+"""Timing-accurate replay of recorded event logs and timed scenarios.
+
+A recorded log (any of the :mod:`sim.events` formats, rotated and
+compressed segments included) is turned back into scenario steps and
+re-executed at the original relative timestamps, optionally sped up or
+slowed down, so a SIEM correlation rule sees the same spacing between the same IOCs on every run.
+Scenario files can be replayed too: a step's ``at`` gives its offset in
+seconds from the start, and its ``count`` repetitions follow ``interval``
+seconds apart::
+
+    {"actions": [
+      {"type": "dns", "host": "c2.example.test", "at": 0},
+      {"type": "tcp", "ip": "127.0.0.1", "port": 4444, "at": 2.5},
+      {"type": "http", "url": "http://127.0.0.1:8000/b?{i}", "at": 3, "count": 100, "interval": 0.01}
+    ]}
+
+The sources are merged lazily through a heap ordered by timestamp. One
+scheduler thread sleeps until just before each due time and spins for
+the last ``spin`` seconds, then hands the action to a worker pool, so
+thousands of events due within the same millisecond go out back to back.
+The delay between an event's due time and the moment its action starts is
+reported as ``lag_ms``.
+"""
+import os
+import re
+import time
+import heapq
+import collections
+import itertools
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from .archive import open_segment, segment_size
+from .eventlog import safe_append_log
+from .events import Event, iso, parse_event
+from .scenario import ScenarioEngine, ScenarioError, load_scenario
+from .stats import latency_summary
+
+MIN_SPEED = 0.1
+MAX_SPEED = 1000.0
+
+# messages of text-format lines, for logs that kept no fields
+_TEXT_STEPS = (
+    (re.compile(r"DNS resolved (\S+) -> "), lambda m: {"type": "dns", "host": m[1]}),
+    (re.compile(r"DNS resolve error for (\S+): "), lambda m: {"type": "dns", "host": m[1]}),
+    (re.compile(r"TCP connect \w+ to (\S+):(\d+)"), lambda m: {"type": "tcp", "ip": m[1], "port": int(m[2])}),
+    (re.compile(r"HTTP (?:beacon \S+ )?GET (?:failed |blocked )?(\S+)"), lambda m: {"type": "http", "url": m[1]}),
+    (re.compile(r"Created file (.+?) (?:size|md5|sha1|sha256)="), lambda m: _file_step(m[1])),
+    (re.compile(r"Created lockfile '.*?dagger_mutex_(.+)\.lock'"), lambda m: {"type": "mutex", "name": m[1]}),
+    (re.compile(r"Created Windows mutex '(.+)'"), lambda m: {"type": "mutex", "name": m[1]}),
+    (re.compile(r"Mutex/lock '(.+)' already exists"), lambda m: {"type": "mutex", "name": m[1]}),
+    (re.compile(r"Simulated registry (.+) subkeys \("), lambda m: {"type": "registry", "key": m[1], "enum": True}),
+    (re.compile(r"Simulated registry set (.+) = (.*)"), lambda m: _registry_step(m[1], m[2])),
+    (re.compile(r"(?:Simulated registry|Registry) (.+) = (.*)"), lambda m: _registry_step(m[1], m[2], query=True)),
+)
+
+
+def _file_step(path: str) -> dict:
+    folder, name = os.path.split(path)
+    return {"type": "file", "folder": folder, "name": name}
+
+
+def _registry_step(left: str, value: str, query: bool = False) -> dict:
+    if query and value.startswith("{"):
+        # "<key> = {all values}"
+        return {"type": "registry", "key": left}
+    # key paths may contain spaces, value names usually do not
+    key, _, name = left.rpartition(" ")
+    step = {"type": "registry", "key": key or left, "name": name if key else ""}
+    if not query:
+        step["value"] = value
+    return step
+
+
+def step_for_event(event):
+    """Scenario step that reproduces ``event``, or None for events that are not replayable.
+
+    Failed attempts are replayed like successful ones: the attempt is the
+    IOC. Mutex creations are replayed as create+release.
+    """
+    f = event.fields
+    t, action = event.type, event.action
+    if action == "log" or not f:
+        for pattern, build in _TEXT_STEPS:
+            m = pattern.match(event.message)
+            if m:
+                return build(m)
+        return None
+    if t == "dns" and action == "resolve" and f.get("host"):
+        return {"type": "dns", "host": f["host"]}
+    if t == "tcp" and action == "connect" and f.get("ip") and f.get("port") is not None:
+        return {"type": "tcp", "ip": f["ip"], "port": int(f["port"])}
+    if t == "http" and action in ("get", "beacon") and f.get("url"):
+        return {"type": "http", "url": f["url"]}
+    if t == "file" and action == "create" and f.get("path"):
+        return _file_step(f["path"])
+    if t == "registry" and f.get("key"):
+        if action == "set":
+            step = {"type": "registry", "key": f["key"], "name": f.get("name") or "", "value": f.get("value", "")}
+            if f.get("value_type"):
+                step["value_type"] = f["value_type"]
+            return step
+        if action == "enum":
+            return {"type": "registry", "key": f["key"], "enum": True}
+        if action == "query":
+            return {"type": "registry", "key": f["key"], "name": f.get("name")}
+    if t == "mutex" and action == "create" and f.get("name"):
+        return {"type": "mutex", "name": f["name"]}
+    return None
+
+
+def read_log(path: str, types=None):
+    """Yield ``(epoch, step)`` for every replayable line of ``path``.
+
+    Only the bytes present when reading starts are replayed, so a log that
+    the replay itself appends to does not feed back into it.
+    """
+    end = segment_size(path)
+    with open_segment(path) as f:
+        pos = 0
+        for raw in f:
+            pos += len(raw)
+            if pos > end:
+                break
+            event = parse_event(raw.decode("utf-8", "replace"))
+            if event is None or (types and event.type not in types):
+                continue
+            step = step_for_event(event)
+            if step is not None:
+                yield event.ts, step
+
+
+def _reorder(items, window: int = 4096):
+    # writer threads can log a few events slightly out of timestamp order
+    heap = []
+    for seq, (ts, step) in enumerate(items):
+        heapq.heappush(heap, (ts, seq, step))
+        if len(heap) > window:
+            ts, _, step = heapq.heappop(heap)
+            yield ts, step
+    while heap:
+        ts, _, step = heapq.heappop(heap)
+        yield ts, step
+
+
+def scenario_timeline(scenario: dict, types=None) -> list:
+    """``(offset, step, i)`` for every repetition of every step, in time order.
+
+    A step without ``at`` starts where the previous one did.
+    """
+    timeline = []
+    at = 0.0
+    for step in scenario["actions"]:
+        at = float(step.get("at", at))
+        if types and step["type"] not in types:
+            continue
+        interval = float(step.get("interval", 0))
+        for i in range(int(step.get("count", 1))):
+            timeline.append((at + i * interval, step, i))
+    timeline.sort(key=lambda item: item[0])
+    return timeline
+
+
+def _is_scenario(path: str) -> bool:
+    return path.lower().endswith((".json", ".yaml", ".yml"))
+
+
+class Replayer:
+    """Replay ``sources`` (log files and/or scenario files) at ``speed`` times real time.
+
+    ``speed`` is 0.1 to 1000. With ``dry_run`` nothing is executed; the
+    schedule is only walked, which measures the scheduler's own drift.
+    """
+
+    def __init__(self, sources, speed: float = 1.0, workers: int = 16, log=None, allow_external: bool = False,
+                 store_path: str = None, types=None, dry_run: bool = False, spin: float = 0.001,
+                 lead: float = 0.05, prefetch: int = 65536):
+        if not MIN_SPEED <= speed <= MAX_SPEED:
+            raise ValueError(f"speed must be between {MIN_SPEED:g}x and {MAX_SPEED:g}x")
+        if isinstance(sources, str):
+            sources = [sources]
+        self.sources = list(sources)
+        if not self.sources:
+            raise ValueError("nothing to replay")
+        self.speed = speed
+        self.workers = workers
+        self.log = log or safe_append_log
+        self.types = set(types) if types else None
+        self.dry_run = dry_run
+        self.spin = spin
+        self.lead = lead
+        self.prefetch = prefetch
+        self.engine = ScenarioEngine({"actions": []}, log=self.log, workers=workers, allow_external=allow_external,
+                                     store_path=store_path)
+        self.ok = 0
+        self.failed = 0
+        self._lags = []
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+
+    def stop(self):
+        self._stop.set()
+
+    def _timeline(self):
+        logs, scenarios = [], []
+        for path in self.sources:
+            if _is_scenario(path):
+                try:
+                    scenarios.append(scenario_timeline(load_scenario(path), self.types))
+                    continue
+                except (ScenarioError, ValueError):
+                    # a .json that is not a scenario is read as a JSON lines log
+                    pass
+            logs.append(_reorder(read_log(path, self.types)))
+        streams = []
+        base = None
+        for stream in logs:
+            first = next(stream, None)
+            if first is not None:
+                base = first[0] if base is None else min(base, first[0])
+                streams.append((ts, ts, step, 0) for ts, step in itertools.chain([first], stream))
+        # scenario offsets count from the first logged event when both are replayed together
+        base = base or 0.0
+        for timeline in scenarios:
+            streams.append((base + t, None, step, i) for t, step, i in timeline)
+        return heapq.merge(*streams, key=lambda item: item[0])
+
+    def _fire(self, due: float, original, step: dict, i: int, n: int):
+        lag = time.perf_counter() - due
+        try:
+            ok, event = self.engine.execute(step, i, n)
+        except Exception as e:
+            ok, event = False, Event(step["type"], "replay", "failure", f"Replay error for {step['type']} step: {e}",
+                                     error=str(e))
+        if original is not None:
+            event.fields["replay_of"] = iso(original)
+        self.log(event)
+        with self._lock:
+            self._lags.append(lag)
+            if ok:
+                self.ok += 1
+            else:
+                self.failed += 1
+
+    def run(self) -> dict:
+        clock = time.perf_counter
+        spin = self.spin
+        speed = self.speed
+        wait = self._stop.wait
+        lags = self._lags
+        slots = threading.BoundedSemaphore(self.workers * 4)
+        self.log(f"Replay started: {', '.join(self.sources)} at {speed:g}x")
+        events = 0
+        t0 = start = None
+        last = 0.0
+        timeline = self._timeline()
+        ahead = collections.deque()
+        with ThreadPoolExecutor(max_workers=self.workers) as pool:
+            while True:
+                if not ahead:
+                    item = next(timeline, None)
+                    if item is None:
+                        break
+                    ahead.append(item)
+                t, original, step, i = ahead.popleft()
+                if start is None:
+                    t0, start = t, clock() + self.lead
+                due = start + (t - t0) / speed
+                if due - clock() > spin:
+                    # parse upcoming lines while there is time to spare, not when a burst is due
+                    while len(ahead) < self.prefetch and due - clock() > spin:
+                        item = next(timeline, None)
+                        if item is None:
+                            break
+                        ahead.append(item)
+                    remaining = due - clock()
+                    if remaining > spin and wait(remaining - spin):
+                        break
+                while clock() < due:
+                    # yields the GIL to the workers while spinning
+                    time.sleep(0)
+                if self._stop.is_set():
+                    break
+                last = t
+                n = events
+                events += 1
+                if self.dry_run:
+                    lags.append(clock() - due)
+                    continue
+                slots.acquire()
+                fut = pool.submit(self._fire, due, original, step, i, n)
+                fut.add_done_callback(lambda _: slots.release())
+        self.engine.release_held()
+        elapsed = clock() - start if start is not None else 0.0
+        summary = {
+            "events": events,
+            "ok": self.ok,
+            "failed": self.failed,
+            "speed": speed,
+            "span": round(last - t0, 3) if t0 is not None else 0.0,
+            "elapsed": round(elapsed, 3),
+            "dry_run": self.dry_run,
+            "lag_ms": latency_summary(lags),
+        }
+        self.log(f"Replay finished: {events} events ok={self.ok} failed={self.failed} elapsed={summary['elapsed']}s "
+                 f"lag p99={summary['lag_ms']['p99']}ms")
+        return summary
@@ -0,0 +1,206 @@
+"""Headless scenario engine.
+
+A scenario is a JSON or YAML document listing IOC actions::
+
+    {
+      "allow_external": false,
+      "workers": 16,
+      "actions": [
+        {"type": "dns", "host": "c2-{i}.example.test", "count": 5000},
+        {"type": "tcp", "ip": "127.0.0.1", "port": 4444, "timeout": 1},
+        {"type": "http", "url": "http://127.0.0.1:8000/beacon?id={i}"},
+        {"type": "file", "folder": "/tmp/ioc", "name": "README_{i}.txt", "content": "pay up"},
+        {"type": "registry", "key": "HKCU\\\\Software\\\\Run", "name": "updater"},
+        {"type": "registry", "key": "HKCU\\\\Software\\\\Run", "name": "upd{i}", "value": "C:\\\\u{i}.exe", "count": 1000},
+        {"type": "mutex", "name": "Global\\\\evil_{i}", "hold": false}
+      ]
+    }
+
+A registry step with a ``value`` writes it to the simulated registry (see
+:mod:`sim.registry`); with ``"enum": true`` it lists the key's subkeys.
+
+Steps run in order; the ``count`` repetitions of one step are spread across
+the worker pool. String fields are formatted with ``{i}`` (repetition index)
+and ``{n}`` (global event number).
+"""
+import os
+import json
+import time
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from . import actions
+from .eventlog import safe_append_log
+from .events import Event
+from .registry import DEFAULT_STORE_PATH
+
+ACTION_TYPES = ("dns", "tcp", "http", "file", "registry", "mutex")
+REQUIRED_FIELDS = {
+    "dns": ("host",),
+    "tcp": ("ip", "port"),
+    "http": ("url",),
+    "file": ("name",),
+    "registry": ("key",),
+    "mutex": ("name",),
+}
+
+
+class ScenarioError(ValueError):
+    pass
+
+
+def load_scenario(path: str) -> dict:
+    with open(path, "r", encoding="utf-8") as f:
+        text = f.read()
+    if path.lower().endswith((".yaml", ".yml")):
+        try:
+            import yaml
+        except ImportError:
+            raise ScenarioError("PyYAML is required for YAML scenarios (pip install pyyaml)")
+        data = yaml.safe_load(text)
+    else:
+        data = json.loads(text)
+    if isinstance(data, list):
+        data = {"actions": data}
+    validate_scenario(data)
+    return data
+
+
+def validate_scenario(data: dict):
+    if not isinstance(data, dict) or not isinstance(data.get("actions"), list):
+        raise ScenarioError("scenario must contain an 'actions' list")
+    for i, step in enumerate(data["actions"]):
+        if not isinstance(step, dict):
+            raise ScenarioError(f"action #{i} is not a mapping")
+        t = step.get("type")
+        if t not in ACTION_TYPES:
+            raise ScenarioError(f"action #{i} has unknown type {t!r}")
+        for key in REQUIRED_FIELDS[t]:
+            if step.get(key) in (None, ""):
+                raise ScenarioError(f"action #{i} ({t}) is missing {key!r}")
+        try:
+            count = int(step.get("count", 1))
+            port = step.get("port")
+            if t == "tcp" and not (isinstance(port, str) and "{" in port):
+                int(port)
+        except (TypeError, ValueError):
+            raise ScenarioError(f"action #{i} ({t}) has a non-integer count or port")
+        if count < 0:
+            raise ScenarioError(f"action #{i} ({t}) has a negative count")
+
+
+def _fmt(value, i, n):
+    if isinstance(value, str):
+        return value.replace("{i}", str(i)).replace("{n}", str(n))
+    return value
+
+
+class ScenarioEngine:
+    def __init__(self, scenario: dict, log=None, workers: int = None, allow_external: bool = None,
+                 store_path: str = None):
+        validate_scenario(scenario)
+        self.scenario = scenario
+        self.log = log or safe_append_log
+        self.workers = workers or scenario.get("workers", 8)
+        if allow_external is None:
+            allow_external = bool(scenario.get("allow_external", False))
+        self.allow_external = allow_external
+        self.store_path = store_path or scenario.get("store_path") or DEFAULT_STORE_PATH
+        self._held = []
+        self._held_lock = threading.Lock()
+        self._counter = 0
+        self.ok = 0
+        self.failed = 0
+
+    def execute(self, step: dict, i: int = 0, n: int = 0):
+        """Run one repetition of ``step``; returns ``(ok, event)`` without logging the event."""
+        t = step["type"]
+        get = lambda k, d=None: _fmt(step.get(k, d), i, n)
+        if t == "dns":
+            return actions.resolve_dns(get("host"))
+        if t == "tcp":
+            return actions.tcp_connect(get("ip"), int(get("port")), timeout=step.get("timeout", 5),
+                                       allow_external=self.allow_external)
+        if t == "http":
+            return actions.http_get(get("url"), timeout=step.get("timeout", 8),
+                                    allow_external=self.allow_external)
+        if t == "file":
+            folder = get("folder") or os.path.join(os.path.expanduser("~"), "temp_ioc")
+            return actions.create_file(folder, get("name"), get("content", ""))
+        if t == "registry":
+            if "value" in step:
+                return actions.set_registry(get("key"), get("name", ""), get("value"), step.get("value_type"),
+                                            store_path=self.store_path)
+            if step.get("enum"):
+                return actions.enum_registry(get("key"), step.get("recursive", False), store_path=self.store_path)
+            return actions.query_registry(get("key"), get("name"), store_path=self.store_path)
+        if t == "mutex":
+            token, ok, event = actions.create_mutex(get("name"))
+            if ok:
+                if step.get("hold"):
+                    with self._held_lock:
+                        self._held.append(token)
+                else:
+                    self.log(event)
+                    return actions.release_mutex(token)
+            return ok, event
+        raise ScenarioError(f"unknown action type {t!r}")
+
+    def attempt(self, step: dict, i: int = 0, n: int = 0):
+        """Like :meth:`execute`, but a step that raises becomes a failure event."""
+        try:
+            return self.execute(step, i, n)
+        except Exception as e:
+            t = step.get("type")
+            return False, Event(t, "execute", "failure", f"Scenario {t} step #{i} error: {e}", error=str(e))
+
+    def _run_one(self, step, i, n):
+        ok, event = self.attempt(step, i, n)
+        self.log(event)
+        return ok
+
+    def release_held(self):
+        """Release the mutexes of ``"hold": true`` steps."""
+        with self._held_lock:
+            held, self._held = self._held, []
+        for token in held:
+            ok, event = actions.release_mutex(token)
+            self.log(event)
+
+    def run(self) -> dict:
+        start = time.perf_counter()
+        self.log(f"Scenario started: {len(self.scenario['actions'])} steps, {self.workers} workers")
+        with ThreadPoolExecutor(max_workers=self.workers) as pool:
+            for step in self.scenario["actions"]:
+                count = int(step.get("count", 1))
+                # bound in-flight work so huge counts do not queue millions of futures
+                slots = threading.BoundedSemaphore(self.workers * 4)
+                done = []
+
+                def finished(fut):
+                    slots.release()
+                    # only logging can still raise here; count the repetition as failed
+                    done.append(not fut.exception() and fut.result())
+
+                for i in range(count):
+                    slots.acquire()
+                    n = self._counter
+                    self._counter += 1
+                    pool.submit(self._run_one, step, i, n).add_done_callback(finished)
+                for _ in range(self.workers * 4):
+                    slots.acquire()
+                self.ok += sum(done)
+                self.failed += len(done) - sum(done)
+        self.release_held()
+        elapsed = time.perf_counter() - start
+        total = self.ok + self.failed
+        summary = {
+            "events": total,
+            "ok": self.ok,
+            "failed": self.failed,
+            "elapsed": round(elapsed, 3),
+            "rate": round(total / elapsed, 1) if elapsed > 0 else 0.0,
+        }
+        self.log(f"Scenario finished: {total} events ok={self.ok} failed={self.failed} "
+                 f"elapsed={summary['elapsed']}s rate={summary['rate']}/s")
+        return summary
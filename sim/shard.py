@@ -0,0 +1,217 @@
+"""Multi-process sharded scenario runs.
+
+One Python process tops out well below what a SIEM pipeline can ingest,
+because every action, event and log line competes for the same GIL.
+:class:`ShardedRunner` splits the repetitions of every scenario step over
+a pool of processes: shard ``k`` of ``P`` runs repetitions ``k, k+P, k+2P...``
+with the usual worker threads, so ``{i}``/``{n}`` expand exactly as in a
+single-process run. Each process encodes its events into its own shard
+file in the log format; once all shards finish, a heap merge combines them
+into one timestamp-ordered stream that is appended to the event log
+(indexed and rotated as usual).
+
+Steps still run in order within each shard, but shards do not wait for
+each other between steps.
+"""
+import os
+import time
+import heapq
+import shutil
+import struct
+import tempfile
+import functools
+import threading
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+from .eventlog import LOG_DIR, append_encoded, flush_logs, safe_append_log
+from .events import as_event, get_serializer
+from .scenario import ScenarioEngine, validate_scenario
+
+# shard record header: epoch, type length, line length; the type and the encoded line follow
+RECORD = struct.Struct("<dBI")
+
+
+class ShardLog:
+    """Event buffer of one shard process, spilled to its shard file in batches.
+
+    Each record is a :data:`RECORD` header followed by the event type and
+    the encoded log line, so the merge never has to parse the event and
+    the line may hold any bytes, newlines included.
+    """
+
+    def __init__(self, path: str, format: str = "text", batch: int = 4096):
+        self.encode = get_serializer(format).encode
+        self.batch = batch
+        self.count = 0
+        self._buf = []
+        self._lock = threading.Lock()
+        self._write_lock = threading.Lock()
+        self._file = open(path, "wb", buffering=1 << 20)
+
+    def __call__(self, line):
+        with self._lock:
+            self._buf.append(as_event(line))
+            full = len(self._buf) >= self.batch
+        if full:
+            self.flush()
+
+    def flush(self):
+        with self._lock:
+            buf, self._buf = self._buf, []
+        if not buf:
+            return
+        encode, pack = self.encode, RECORD.pack
+        parts = []
+        for e in buf:
+            kind = e.type.encode("utf-8")
+            line = (encode(e) + "\n").encode("utf-8")
+            parts += (pack(e.ts, len(kind), len(line)), kind, line)
+        data = b"".join(parts)
+        with self._write_lock:
+            self._file.write(data)
+            self.count += len(buf)
+
+    def close(self):
+        self.flush()
+        self._file.close()
+
+
+def _run_chunk(engine, log, step, indices, base):
+    ok = 0
+    for i in indices:
+        success, event = engine.attempt(step, i, base + i)
+        log(event)
+        ok += success
+    return ok, len(indices)
+
+
+def run_shard(scenario: dict, shard: int, shards: int, path: str, workers: int = 8, format: str = "text",
+              allow_external: bool = None, store_path: str = None, chunk: int = 64) -> dict:
+    """Run shard ``shard`` of ``shards`` of ``scenario``, writing its events to ``path``."""
+    log = ShardLog(path, format)
+    engine = ScenarioEngine(scenario, log=log, workers=workers, allow_external=allow_external,
+                            store_path=store_path)
+    ok = total = 0
+    start = time.perf_counter()
+    base = 0
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        for step in scenario["actions"]:
+            count = int(step.get("count", 1))
+            mine = range(shard, count, shards)
+            run = functools.partial(_run_chunk, engine, log, step, base=base)
+            for done, n in pool.map(run, [mine[j:j + chunk] for j in range(0, len(mine), chunk)]):
+                ok += done
+                total += n
+            base += count
+    engine.release_held()
+    log.close()
+    elapsed = time.perf_counter() - start
+    return {"shard": shard, "events": total, "ok": ok, "failed": total - ok, "lines": log.count,
+            "elapsed": round(elapsed, 3), "rate": round(total / elapsed, 1) if elapsed > 0 else 0.0}
+
+
+def _read_shard(path: str, window: int = 16384):
+    # batches from different threads of one shard may land slightly out of order
+    heap = []
+    size, unpack = RECORD.size, RECORD.unpack
+    with open(path, "rb", buffering=1 << 20) as f:
+        read = f.read
+        seq = 0
+        while True:
+            header = read(size)
+            if len(header) < size:
+                break
+            ts, kind_len, line_len = unpack(header)
+            kind = read(kind_len)
+            heapq.heappush(heap, (ts, seq, kind, read(line_len)))
+            seq += 1
+            if len(heap) > window:
+                ts, _, kind, line = heapq.heappop(heap)
+                yield ts, kind.decode("utf-8"), line
+    while heap:
+        ts, _, kind, line = heapq.heappop(heap)
+        yield ts, kind.decode("utf-8"), line
+
+
+def merge_shards(paths):
+    """Yield ``(epoch, type, line bytes)`` from all shard files in timestamp order."""
+    return heapq.merge(*(_read_shard(p) for p in paths), key=lambda r: r[0])
+
+
+class ShardedRunner:
+    """Run ``scenario`` over ``processes`` processes (default: one per CPU).
+
+    ``workers`` threads run inside every process. Merged events go to the
+    event log at ``log_path`` in ``format``, which must match the format the
+    log is written in.
+    """
+
+    def __init__(self, scenario: dict, processes: int = None, workers: int = None, log_path: str = None,
+                 format: str = "text", allow_external: bool = None, store_path: str = None, shard_dir: str = None,
+                 batch: int = 4096):
+        validate_scenario(scenario)
+        get_serializer(format)
+        self.scenario = scenario
+        self.processes = processes or os.cpu_count() or 1
+        self.workers = workers or scenario.get("workers", 8)
+        self.log_path = log_path
+        self.format = format
+        self.allow_external = allow_external
+        self.store_path = store_path
+        self.shard_dir = shard_dir
+        self.batch = batch
+
+    def _log(self, msg: str):
+        safe_append_log(msg, self.log_path)
+
+    def run(self) -> dict:
+        start = time.perf_counter()
+        self._log(f"Scenario started: {len(self.scenario['actions'])} steps, {self.processes} processes x "
+                  f"{self.workers} workers")
+        shard_dir = self.shard_dir or os.path.join(LOG_DIR, "shards")
+        os.makedirs(shard_dir, exist_ok=True)
+        tmp = tempfile.mkdtemp(prefix="run_", dir=shard_dir)
+        paths = [os.path.join(tmp, f"shard{k}.tsv") for k in range(self.processes)]
+        try:
+            # spawn, not fork: the parent has logger and forwarder threads running
+            ctx = multiprocessing.get_context("spawn")
+            with ProcessPoolExecutor(max_workers=self.processes, mp_context=ctx) as pool:
+                futures = [pool.submit(run_shard, self.scenario, k, self.processes, paths[k], self.workers,
+                                       self.format, self.allow_external, self.store_path)
+                           for k in range(self.processes)]
+                shards = [f.result() for f in futures]
+            generated = time.perf_counter() - start
+            merged = 0
+            batch = []
+            for record in merge_shards(paths):
+                batch.append(record)
+                if len(batch) >= self.batch:
+                    append_encoded(batch, self.log_path)
+                    merged += len(batch)
+                    batch = []
+            if batch:
+                append_encoded(batch, self.log_path)
+                merged += len(batch)
+            flush_logs()
+        finally:
+            shutil.rmtree(tmp, ignore_errors=True)
+        elapsed = time.perf_counter() - start
+        ok = sum(s["ok"] for s in shards)
+        failed = sum(s["failed"] for s in shards)
+        total = ok + failed
+        summary = {
+            "events": total,
+            "ok": ok,
+            "failed": failed,
+            "processes": self.processes,
+            "lines": merged,
+            "generate_elapsed": round(generated, 3),
+            "merge_elapsed": round(elapsed - generated, 3),
+            "elapsed": round(elapsed, 3),
+            "rate": round(total / elapsed, 1) if elapsed > 0 else 0.0,
+            "shards": shards,
+        }
+        self._log(f"Scenario finished: {total} events ok={ok} failed={failed} elapsed={summary['elapsed']}s "
+                  f"rate={summary['rate']}/s ({self.processes} processes)")
+        return summary
@@ -0,0 +1,31 @@
+def percentile(sorted_values, pct: float) -> float:
+    if not sorted_values:
+        return 0.0
+    k = (len(sorted_values) - 1) * pct / 100.0
+    lo = int(k)
+    hi = min(lo + 1, len(sorted_values) - 1)
+    return sorted_values[lo] + (sorted_values[hi] - sorted_values[lo]) * (k - lo)
+
+
+def latency_summary(latencies) -> dict:
+    """Summarise latencies given in seconds as milliseconds."""
+    values = sorted(latencies)
+    ms = lambda v: round(v * 1000.0, 3)
+    return {
+        "p50": ms(percentile(values, 50)),
+        "p95": ms(percentile(values, 95)),
+        "p99": ms(percentile(values, 99)),
+        "max": ms(values[-1]) if values else 0.0,
+    }
+
+
+def rate_summary(ok: int, failed: int, elapsed: float, latencies) -> dict:
+    total = ok + failed
+    return {
+        "sent": total,
+        "ok": ok,
+        "failed": failed,
+        "elapsed": round(elapsed, 3),
+        "rate": round(total / elapsed, 1) if elapsed > 0 else 0.0,
+        "latency_ms": latency_summary(latencies),
+    }
@@ -0,0 +1,228 @@
+"""Local stand-in servers for exercising the simulators without a real network.
+
+Each stub binds to 127.0.0.1 on an ephemeral port by default, runs in a
+daemon thread and can be used as a context manager::
+
+    with StubDNSServer() as dns:
+        run_dns_burst(names, nameserver=dns.host, port=dns.port)
+"""
+import time
+import struct
+import socket
+import threading
+import socketserver
+import http.server
+
+
+class _StubServer:
+    server_class = None
+    handler_class = None
+
+    def __init__(self, host: str = "127.0.0.1", port: int = 0):
+        self.server = self.server_class((host, port), self.handler_class)
+        self.server.stub = self
+        self.server.daemon_threads = True
+        self._thread = None
+
+    @property
+    def host(self) -> str:
+        return self.server.server_address[0]
+
+    @property
+    def port(self) -> int:
+        return self.server.server_address[1]
+
+    def start(self):
+        self._thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+
+class _DNSHandler(socketserver.BaseRequestHandler):
+    def handle(self):
+        data, sock = self.request
+        stub = self.server.stub
+        stub.queries += 1
+        try:
+            qid, flags = struct.unpack_from("!HH", data)
+            off = 12
+            labels = []
+            while data[off]:
+                labels.append(data[off + 1:off + 1 + data[off]].decode("ascii", "replace"))
+                off += data[off] + 1
+            question = data[12:off + 5]
+        except (struct.error, IndexError):
+            return
+        name = ".".join(labels)
+        if any(name.endswith(s) for s in stub.nxdomain_suffixes):
+            sock.sendto(struct.pack("!HHHHHH", qid, 0x8183, 1, 0, 0, 0) + question, self.client_address)
+            return
+        answer = b"\xc0\x0c" + struct.pack("!HHIH", 1, 1, 60, 4) + socket.inet_aton(stub.answer)
+        sock.sendto(struct.pack("!HHHHHH", qid, 0x8180, 1, 1, 0, 0) + question + answer, self.client_address)
+
+
+class StubDNSServer(_StubServer):
+    """Answers every A query with ``answer``; NXDOMAIN for ``nxdomain_suffixes``."""
+
+    server_class = socketserver.UDPServer
+    handler_class = _DNSHandler
+
+    def __init__(self, host: str = "127.0.0.1", port: int = 0, answer: str = "127.0.0.1",
+                 nxdomain_suffixes=()):
+        super().__init__(host, port)
+        self.answer = answer
+        self.nxdomain_suffixes = tuple(nxdomain_suffixes)
+        self.queries = 0
+
+
+class _TCPHandler(socketserver.BaseRequestHandler):
+    def handle(self):
+        self.server.stub.accepted += 1
+
+
+class _TCPServer(socketserver.TCPServer):
+    allow_reuse_address = True
+    request_queue_size = 1024
+
+
+class StubTCPListener(_StubServer):
+    """Accepts and immediately closes TCP connections, counting them."""
+
+    server_class = _TCPServer
+    handler_class = _TCPHandler
+
+    def __init__(self, host: str = "127.0.0.1", port: int = 0):
+        super().__init__(host, port)
+        self.accepted = 0
+
+
+class _HTTPHandler(http.server.BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def setup(self):
+        super().setup()
+        with self.server.stub.lock:
+            self.server.stub.connections += 1
+
+    def do_GET(self):
+        stub = self.server.stub
+        with stub.lock:
+            stub.requests += 1
+        body = stub.body
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_POST(self):
+        stub = self.server.stub
+        body = self.rfile.read(int(self.headers.get("Content-Length") or 0))
+        now = time.time()
+        with stub.lock:
+            stub.received.extend((now, line) for line in body.splitlines() if line)
+        self.do_GET()
+
+    def log_message(self, format, *args):
+        pass
+
+
+class _HTTPServer(http.server.ThreadingHTTPServer):
+    request_queue_size = 1024
+
+
+class StubHTTPServer(_StubServer):
+    """HTTP/1.1 keep-alive server answering every request with ``body``."""
+
+    server_class = _HTTPServer
+    handler_class = _HTTPHandler
+
+    def __init__(self, host: str = "127.0.0.1", port: int = 0, body: bytes = b"ok"):
+        super().__init__(host, port)
+        self.body = body
+        self.lock = threading.Lock()
+        self.requests = 0
+        self.connections = 0
+        self.received = []  # (receive time, line) for every line POSTed
+
+    @property
+    def url(self) -> str:
+        return f"http://{self.host}:{self.port}"
+
+
+class _SyslogUDPHandler(socketserver.BaseRequestHandler):
+    def handle(self):
+        self.server.stub._record([self.request[0]])
+
+
+class _SyslogTCPHandler(socketserver.StreamRequestHandler):
+    def handle(self):
+        # RFC 6587: octet-counted frames, falling back to newline-delimited
+        rfile = self.rfile
+        while True:
+            head = b""
+            while True:
+                c = rfile.read(1)
+                if not c:
+                    return
+                if c == b" " and head.isdigit():
+                    self.server.stub._record([rfile.read(int(head))])
+                    break
+                if c == b"\n":
+                    if head:
+                        self.server.stub._record([head])
+                    break
+                head += c
+                if not head.isdigit():
+                    self.server.stub._record([head + rfile.readline().rstrip(b"\n")])
+                    break
+
+
+class _SyslogUDPServer(socketserver.UDPServer):
+    max_packet_size = 65535
+
+    def server_bind(self):
+        # bursts arrive faster than one handler thread drains them
+        self.socket.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, 8 << 20)
+        super().server_bind()
+
+
+class _ThreadingTCPServer(socketserver.ThreadingMixIn, _TCPServer):
+    pass
+
+
+class StubSyslogServer(_StubServer):
+    """Syslog collector over UDP or TCP; keeps ``(receive time, message)`` in ``received``."""
+
+    handler_class = _SyslogUDPHandler
+
+    def __init__(self, host: str = "127.0.0.1", port: int = 0, protocol: str = "udp"):
+        if protocol == "tcp":
+            self.server_class, self.handler_class = _ThreadingTCPServer, _SyslogTCPHandler
+        elif protocol == "udp":
+            self.server_class = _SyslogUDPServer
+        else:
+            raise ValueError(f"unknown syslog protocol {protocol!r}")
+        self.protocol = protocol
+        self.lock = threading.Lock()
+        self.received = []
+        super().__init__(host, port)
+
+    def _record(self, messages):
+        now = time.time()
+        with self.lock:
+            self.received.extend((now, m) for m in messages)
+
+    @property
+    def url(self) -> str:
+        return f"{self.protocol}://{self.host}:{self.port}"
@@ -0,0 +1,121 @@
+"""TCP connect sweep: port-scan / lateral-movement IOCs at volume.
+
+All attempts run on one asyncio loop, so thread count stays at one no matter
+how many targets are swept; ``concurrency`` caps the sockets in flight and
+``rate`` caps new attempts per second.
+"""
+import time
+import asyncio
+import ipaddress
+
+from .actions import is_allowed
+from .events import Event
+from .metrics import observe
+from .stats import rate_summary
+
+
+def parse_ports(spec) -> list:
+    """Parse ``"22,80,8000-8010"`` (or an iterable of ints/strings) into ports."""
+    if isinstance(spec, int):
+        return [spec]
+    if isinstance(spec, str):
+        spec = spec.split(",")
+    ports = []
+    for part in spec:
+        part = str(part).strip()
+        if not part:
+            continue
+        if "-" in part:
+            lo, hi = part.split("-", 1)
+            ports.extend(range(int(lo), int(hi) + 1))
+        else:
+            ports.append(int(part))
+    for p in ports:
+        if not 0 < p < 65536:
+            raise ValueError(f"invalid port {p}")
+    return ports
+
+
+def parse_targets(specs, allow_external: bool = False) -> list:
+    """Expand IPs and CIDR ranges (``"127.0.0.0/28"``) into networks, enforcing the external gate."""
+    if isinstance(specs, str):
+        specs = specs.replace(",", " ").split()
+    nets = []
+    for spec in specs:
+        net = ipaddress.ip_network(str(spec).strip(), strict=False)
+        if not allow_external and not net.is_loopback:
+            raise PermissionError(f"target {spec} is external; external network not allowed")
+        nets.append(net)
+    return nets
+
+
+def iter_endpoints(nets, ports):
+    for net in nets:
+        hosts = [net.network_address] if net.num_addresses == 1 else net.hosts()
+        for addr in hosts:
+            for port in ports:
+                yield str(addr), port
+
+
+async def tcp_sweep(targets, ports, concurrency: int = 200, timeout: float = 1.0, rate: float = 0,
+                    log=None, allow_external: bool = False) -> dict:
+    if concurrency < 1:
+        raise ValueError("concurrency must be at least 1")
+    nets = parse_targets(targets, allow_external)
+    ports = parse_ports(ports)
+    sem = asyncio.Semaphore(concurrency)
+    latencies = []
+    outcome = {"open": 0, "refused": 0, "timeout": 0, "error": 0}
+
+    async def one(ip, port):
+        t0 = time.perf_counter()
+        err = None
+        try:
+            if not is_allowed(ip, allow_external):
+                raise PermissionError("external network not allowed")
+            _, writer = await asyncio.wait_for(asyncio.open_connection(ip, port), timeout)
+            latencies.append(time.perf_counter() - t0)
+            writer.close()
+            outcome["open"] += 1
+        except asyncio.TimeoutError:
+            outcome["timeout"] += 1
+            err = "timed out"
+        except ConnectionRefusedError as e:
+            latencies.append(time.perf_counter() - t0)
+            outcome["refused"] += 1
+            err = str(e)
+        except Exception as e:
+            outcome["error"] += 1
+            err = str(e)
+        finally:
+            sem.release()
+        observe("tcp.connect", err is None, time.perf_counter() - t0)
+        if log:
+            if err is None:
+                log(Event("tcp", "connect", "success", f"TCP connect success to {ip}:{port}", ip=ip, port=port))
+            else:
+                log(Event("tcp", "connect", "failure", f"TCP connect failed to {ip}:{port} - {err}",
+                          ip=ip, port=port, error=err))
+
+    start = time.perf_counter()
+    tasks = set()
+    for n, (ip, port) in enumerate(iter_endpoints(nets, ports)):
+        if rate:
+            delay = start + n / rate - time.perf_counter()
+            if delay > 0:
+                await asyncio.sleep(delay)
+        await sem.acquire()
+        task = asyncio.ensure_future(one(ip, port))
+        tasks.add(task)
+        task.add_done_callback(tasks.discard)
+    if tasks:
+        await asyncio.gather(*tasks)
+    failed = outcome["refused"] + outcome["timeout"] + outcome["error"]
+    result = rate_summary(outcome["open"], failed, time.perf_counter() - start, latencies)
+    result.update(outcome)
+    return result
+
+
+def run_tcp_sweep(targets, ports, **kwargs) -> dict:
+    """Blocking wrapper around :func:`tcp_sweep` for threads and the CLI."""
+    return asyncio.run(tcp_sweep(targets, ports, **kwargs))
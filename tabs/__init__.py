@@ -1,7 +1,31 @@
-from .network_tab import NetworkTab
-from .registry_tab import RegistryTab
-from .files_tab import FilesTab
-from .mutex_tab import MutexTab
-from .logs_tab import LogsTab
+"""Tk frames of the GUI.
 
-__all__ = ["NetworkTab", "RegistryTab", "FilesTab", "MutexTab", "LogsTab"]
+The tab classes are imported on first use, so importing one tab module (or
+the package) does not load every other tab and its dependencies.
+"""
+import importlib
+
+_EXPORTS = {
+    "NetworkTab": ".network_tab",
+    "RegistryTab": ".registry_tab",
+    "FilesTab": ".files_tab",
+    "MutexTab": ".mutex_tab",
+    "LogsTab": ".logs_tab",
+    "StatsTab": ".stats_tab",
+    "UIEventBus": ".ui_bus",
+}
+
+__all__ = list(_EXPORTS)
+
+
+def __getattr__(name):
+    module = _EXPORTS.get(name)
+    if module is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(module, __name__), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(__all__))
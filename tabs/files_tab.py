@@ -1,9 +1,11 @@
 import os
-import hashlib
+import threading
 import datetime
 import tkinter as tk
 from tkinter import ttk, messagebox, filedialog
 
+from sim import actions, bigfile, filegen
+
 
 class FilesTab(ttk.Frame):
     def __init__(self, parent, app):
@@ -34,10 +36,59 @@ class FilesTab(ttk.Frame):
 
         btn_create = ttk.Button(frm, text="Create file", command=self._create_file)
         btn_create.grid(row=3, column=1, sticky=tk.W, pady=6)
+        btn_hash = ttk.Button(frm, text="Hash file...", command=self._hash_file)
+        btn_hash.grid(row=3, column=2, padx=6)
+
+        # bulk creation
+        bulk = ttk.LabelFrame(self, text="Bulk files (uses Folder and Content above)")
+        bulk.pack(fill=tk.X, padx=8, pady=2)
+        ttk.Label(bulk, text="Preset:").grid(row=0, column=0, sticky=tk.W)
+        self.bulk_preset = ttk.Combobox(bulk, values=list(filegen.PRESETS), state="readonly", width=14)
+        self.bulk_preset.grid(row=0, column=1, sticky=tk.W)
+        self.bulk_preset.bind("<<ComboboxSelected>>", self._apply_preset)
+        ttk.Label(bulk, text="Name template:").grid(row=0, column=2, sticky=tk.W)
+        self.bulk_name_entry = ttk.Entry(bulk, width=44)
+        self.bulk_name_entry.insert(0, "README_{i}.txt")
+        self.bulk_name_entry.grid(row=0, column=3, columnspan=3, sticky=tk.W)
+        ttk.Label(bulk, text="Count:").grid(row=1, column=0, sticky=tk.W)
+        self.bulk_count_entry = ttk.Entry(bulk, width=8)
+        self.bulk_count_entry.insert(0, "1000")
+        self.bulk_count_entry.grid(row=1, column=1, sticky=tk.W)
+        ttk.Label(bulk, text="Workers:").grid(row=1, column=2, sticky=tk.W)
+        self.bulk_workers_entry = ttk.Entry(bulk, width=6)
+        self.bulk_workers_entry.insert(0, "8")
+        self.bulk_workers_entry.grid(row=1, column=3, sticky=tk.W)
+        btn_bulk = ttk.Button(bulk, text="Create files", command=self._start_bulk)
+        btn_bulk.grid(row=0, column=6, padx=6)
+        btn_bulk_stop = ttk.Button(bulk, text="Stop", command=self._stop_bulk)
+        btn_bulk_stop.grid(row=1, column=6, padx=6)
+        self._generator = None
+
+        # large / high-entropy file
+        large = ttk.LabelFrame(self, text="Large file (uses Folder above)")
+        large.pack(fill=tk.X, padx=8, pady=2)
+        ttk.Label(large, text="Filename:").grid(row=0, column=0, sticky=tk.W)
+        self.large_name_entry = ttk.Entry(large, width=30)
+        self.large_name_entry.insert(0, "backup_staging.7z")
+        self.large_name_entry.grid(row=0, column=1, sticky=tk.W)
+        ttk.Label(large, text="Size:").grid(row=0, column=2, sticky=tk.W)
+        self.large_size_entry = ttk.Entry(large, width=8)
+        self.large_size_entry.insert(0, "512M")
+        self.large_size_entry.grid(row=0, column=3, sticky=tk.W)
+        ttk.Label(large, text="Profile:").grid(row=0, column=4, sticky=tk.W)
+        self.large_profile = ttk.Combobox(large, values=list(bigfile.PROFILES), state="readonly", width=10)
+        self.large_profile.set("encrypted")
+        self.large_profile.grid(row=0, column=5, sticky=tk.W)
+        btn_large = ttk.Button(large, text="Write file", command=self._start_large)
+        btn_large.grid(row=0, column=6, padx=6)
+        btn_large_stop = ttk.Button(large, text="Stop", command=self._stop_large)
+        btn_large_stop.grid(row=0, column=7, padx=6)
+        self._large_writer = None
 
         # output
         self.out = tk.Text(self, height=14, wrap=tk.NONE)
         self.out.pack(fill=tk.BOTH, expand=True, padx=8, pady=8)
+        self.app.ui.register(self.out)
 
     def _browse(self):
         d = filedialog.askdirectory()
@@ -47,8 +98,7 @@ class FilesTab(ttk.Frame):
 
     def _append(self, line: str):
         ts = datetime.datetime.now(datetime.timezone.utc).isoformat()
-        self.out.insert(tk.END, f"{ts} {line}\n")
-        self.out.see(tk.END)
+        self.app.ui.post(self.out, f"{ts} {line}\n")
 
     def _create_file(self):
         folder = self.folder_entry.get().strip() or os.path.join(os.path.expanduser("~"), "temp_ioc")
@@ -56,26 +106,101 @@ class FilesTab(ttk.Frame):
         if not name:
             messagebox.showinfo("Input required", "Please enter a filename.")
             return
-        os.makedirs(folder, exist_ok=True)
-        path = os.path.join(folder, name)
         content = self.content_text.get("1.0", tk.END)
 
+        _, msg = actions.create_file(folder, name, content)
+        self._append(msg)
+        self.app._log(msg)
+
+    def _apply_preset(self, _event=None):
+        name, content = filegen.PRESETS[self.bulk_preset.get()]
+        self.bulk_name_entry.delete(0, tk.END)
+        self.bulk_name_entry.insert(0, name)
+        self.content_text.delete("1.0", tk.END)
+        self.content_text.insert("1.0", content)
+
+    def _start_bulk(self):
+        if self._generator is not None:
+            messagebox.showinfo("Running", "Bulk creation is already running. Stop it first.")
+            return
+        folder = self.folder_entry.get().strip() or os.path.join(os.path.expanduser("~"), "temp_ioc")
         try:
-            with open(path, "w", encoding="utf-8") as f:
-                f.write(content)
-            sha256 = self._sha256(path)
-            msg = f"Created file {path} sha256={sha256}"
+            gen = filegen.FileGenerator(
+                folder,
+                self.bulk_name_entry.get().strip(),
+                self.content_text.get("1.0", "end-1c"),
+                count=int(self.bulk_count_entry.get()),
+                workers=int(self.bulk_workers_entry.get()),
+                log=self.app._log,
+            )
+        except ValueError as e:
+            messagebox.showerror("Invalid input", f"Please check the bulk settings: {e}")
+            return
+        self._generator = gen
+
+        def worker():
+            self.app._log(f"Bulk file creation started: {gen.count} files in {folder} workers={gen.workers}")
+            try:
+                result = gen.run()
+                msg = (f"Bulk file creation done: created={result['ok']} failed={result['failed']} "
+                       f"files/s={result['rate']} MB/s={result['mb_per_s']} p95={result['latency_ms']['p95']}ms")
+            except Exception as e:
+                msg = f"Bulk file creation error: {e}"
+            self._generator = None
             self._append(msg)
             self.app._log(msg)
-        except Exception as e:
-            msg = f"File create error: {e}"
+
+        threading.Thread(target=worker, daemon=True).start()
+
+    def _stop_bulk(self):
+        if self._generator is not None:
+            self._generator.stop()
+
+    def _start_large(self):
+        if self._large_writer is not None:
+            messagebox.showinfo("Running", "A large file is already being written. Stop it first.")
+            return
+        folder = self.folder_entry.get().strip() or os.path.join(os.path.expanduser("~"), "temp_ioc")
+        name = self.large_name_entry.get().strip()
+        if not name:
+            messagebox.showinfo("Input required", "Please enter a filename.")
+            return
+
+        def progress(written, total):
+            self._append(f"Writing {name}: {written >> 20}/{total >> 20} MiB")
+
+        try:
+            writer = bigfile.LargeFileWriter(os.path.join(folder, name), self.large_size_entry.get(),
+                                             profile=self.large_profile.get(), progress=progress)
+        except ValueError as e:
+            messagebox.showerror("Invalid input", f"Please check the large file settings: {e}")
+            return
+        self._large_writer = writer
+
+        def worker():
+            ok, event, result = writer.run()
+            if ok:
+                self._append(f"{event} MB/s={result['mb_per_s']}")
+            else:
+                self._append(event)
+            self._large_writer = None
+            self.app._log(event)
+
+        threading.Thread(target=worker, daemon=True).start()
+
+    def _stop_large(self):
+        if self._large_writer is not None:
+            self._large_writer.stop()
+
+    def _hash_file(self):
+        path = filedialog.askopenfilename()
+        if not path:
+            return
+
+        def worker():
+            # md5/sha1/sha256 in one pass; unchanged files come from the hash cache
+            _, msg = actions.hash_artifact(path)
             self._append(msg)
             self.app._log(msg)
 
-    @staticmethod
-    def _sha256(path: str) -> str:
-        h = hashlib.sha256()
-        with open(path, "rb") as f:
-            for chunk in iter(lambda: f.read(8192), b""):
-                h.update(chunk)
-        return h.hexdigest()
+        threading.Thread(target=worker, daemon=True).start()
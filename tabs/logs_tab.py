@@ -1,14 +1,42 @@
 import os
-import datetime
+import shutil
+import threading
 import tkinter as tk
+import tkinter.font as tkfont
 from tkinter import ttk, filedialog, messagebox
 
+from sim.archive import open_segment
+from sim.eventlog import flush_logs
+from sim.logindex import EVENT_TYPES, search
+from sim.logtail import LogTail
+from sim.replay import MAX_SPEED, MIN_SPEED, Replayer
+
 
 class LogsTab(ttk.Frame):
+    """Virtualized log viewer.
+
+    The tab tails the log file from the last indexed byte offset and only
+    ever holds one screen of lines in the Text widget; scrolling pages lines
+    in from disk. Rotated segments, compressed or not, can be opened in
+    place of the live log and are read without unpacking them.
+    """
+
+    POLL_MS = 1000
+    POLL_DIRTY_MS = 250
+    MAX_RESULTS = 5000
+
     def __init__(self, parent, app, log_path=None):
         super().__init__(parent)
         self.app = app
+        self._live_path = log_path
         self._log_path = log_path
+        self._tail = LogTail(log_path) if log_path else None
+        self._first = 0
+        self._page = 28
+        self._dirty = False
+        self._results = False
+        self._replayer = None
+        self.follow = tk.BooleanVar(value=True)
         self._build()
 
     def _build(self):
@@ -19,29 +47,241 @@ class LogsTab(ttk.Frame):
         btn_reload.pack(side=tk.LEFT)
         btn_save = ttk.Button(frm, text="Save As...", command=self._save_as)
         btn_save.pack(side=tk.LEFT, padx=6)
+        chk_follow = ttk.Checkbutton(frm, text="Follow", variable=self.follow, command=self._render)
+        chk_follow.pack(side=tk.LEFT, padx=6)
+        btn_segment = ttk.Button(frm, text="Open Segment...", command=self._open_segment)
+        btn_segment.pack(side=tk.LEFT)
+        btn_live = ttk.Button(frm, text="Live Log", command=lambda: self._view(self._live_path))
+        btn_live.pack(side=tk.LEFT, padx=6)
+        btn_replay = ttk.Button(frm, text="Replay...", command=self._replay)
+        btn_replay.pack(side=tk.LEFT, padx=(18, 0))
+        ttk.Label(frm, text="x").pack(side=tk.LEFT, padx=(4, 0))
+        self.speed_entry = ttk.Entry(frm, width=6)
+        self.speed_entry.insert(0, "1")
+        self.speed_entry.pack(side=tk.LEFT)
+        btn_stop = ttk.Button(frm, text="Stop Replay", command=self._stop_replay)
+        btn_stop.pack(side=tk.LEFT, padx=6)
+        self.status = ttk.Label(frm, text="")
+        self.status.pack(side=tk.RIGHT)
+
+        flt = ttk.Frame(self)
+        flt.pack(fill=tk.X, padx=8)
+        ttk.Label(flt, text="Type:").pack(side=tk.LEFT)
+        self.type_combo = ttk.Combobox(flt, values=("any",) + EVENT_TYPES, width=9, state="readonly")
+        self.type_combo.set("any")
+        self.type_combo.pack(side=tk.LEFT, padx=(0, 6))
+        ttk.Label(flt, text="Since:").pack(side=tk.LEFT)
+        self.since_entry = ttk.Entry(flt, width=20)
+        self.since_entry.pack(side=tk.LEFT, padx=(0, 6))
+        ttk.Label(flt, text="Until:").pack(side=tk.LEFT)
+        self.until_entry = ttk.Entry(flt, width=20)
+        self.until_entry.pack(side=tk.LEFT, padx=(0, 6))
+        ttk.Label(flt, text="Contains:").pack(side=tk.LEFT)
+        self.text_entry = ttk.Entry(flt, width=24)
+        self.text_entry.pack(side=tk.LEFT, padx=(0, 6))
+        btn_search = ttk.Button(flt, text="Search", command=self._search)
+        btn_search.pack(side=tk.LEFT)
+        btn_clear = ttk.Button(flt, text="Clear", command=self._clear_search)
+        btn_clear.pack(side=tk.LEFT, padx=6)
+
+        body = ttk.Frame(self)
+        body.pack(fill=tk.BOTH, expand=True, padx=8, pady=8)
+        self.scroll = ttk.Scrollbar(body, orient=tk.VERTICAL, command=self._on_scrollbar)
+        self.scroll.pack(side=tk.RIGHT, fill=tk.Y)
+        self.out = tk.Text(body, height=28, wrap=tk.NONE)
+        self.out.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
+        self._linespace = tkfont.Font(font=self.out.cget("font")).metrics("linespace")
 
-        self.out = tk.Text(self, height=28, wrap=tk.NONE)
-        self.out.pack(fill=tk.BOTH, expand=True, padx=8, pady=8)
+        self.out.bind("<Configure>", self._on_resize)
+        self.out.bind("<MouseWheel>", lambda e: self._scroll_lines(-3 if e.delta > 0 else 3))
+        self.out.bind("<Button-4>", lambda e: self._scroll_lines(-3))
+        self.out.bind("<Button-5>", lambda e: self._scroll_lines(3))
+        self.out.bind("<Prior>", lambda e: self._scroll_lines(-self._page))
+        self.out.bind("<Next>", lambda e: self._scroll_lines(self._page))
         self._reload()
+        self.after(self.POLL_MS, self._poll)
 
     def append(self, msg: str):
-        self.out.insert(tk.END, msg + "\n")
-        self.out.see(tk.END)
+        # the view tails the log file itself; just make the next poll come sooner
+        self._dirty = True
+
+    def _poll(self):
+        if self._tail is not None and self._tail.refresh():
+            self._render()
+        delay = self.POLL_DIRTY_MS if self._dirty else self.POLL_MS
+        self._dirty = False
+        self.after(delay, self._poll)
 
     def _reload(self):
+        if self._results:
+            self._clear_search()
         self.out.delete("1.0", tk.END)
         if not self._log_path:
             self.out.insert(tk.END, "<no log path provided>\n")
             return
-        try:
-            with open(self._log_path, "r", encoding="utf-8") as f:
-                self.out.insert(tk.END, f.read())
-        except FileNotFoundError:
+        self._tail.reset()
+        self._tail.refresh()
+        if not self._tail.lines:
             self.out.insert(tk.END, "<no log found>\n")
+            return
+        self._render()
+
+    def _open_segment(self):
+        if not self._live_path:
+            return
+        p = filedialog.askopenfilename(initialdir=os.path.dirname(self._live_path), title="Open log segment",
+                                       filetypes=[("Log segments", "*.log *.log.* *.gz"), ("All files", "*")])
+        if p:
+            self._view(p)
+
+    def _view(self, path):
+        if not path or path == self._log_path:
+            return
+        self._log_path = path
+        self._tail = LogTail(path)
+        self._first = 0
+        self.follow.set(True)
+        self._reload()
+
+    def _render(self):
+        if self._results or self._tail is None or not self._tail.lines:
+            return
+        total = self._tail.lines
+        if self.follow.get():
+            self._first = max(0, total - self._page)
+        self._first = max(0, min(self._first, total - 1))
+        lines = self._tail.read_lines(self._first, self._page)
+        self.out.delete("1.0", tk.END)
+        self.out.insert(tk.END, "".join(lines))
+        self.scroll.set(self._first / total, min(1.0, (self._first + len(lines)) / total))
+        self._update_status()
+
+    def _update_status(self):
+        if self._results:
+            return
+        total = self._tail.lines
+        last = min(total, self._first + self._page)
+        where = "" if self._log_path == self._live_path else f"{os.path.basename(self._log_path)}: "
+        self.status.config(text=f"{where}lines {self._first + 1 if total else 0}-{last} of {total}")
+
+    def _scroll_lines(self, delta: int):
+        if self._results:
+            # search results are a plain (bounded) Text; let it scroll natively
+            self.out.yview_scroll(delta, "units")
+            return "break"
+        if self._tail is None or not self._tail.lines:
+            return "break"
+        self._first = max(0, min(self._first + delta, self._tail.lines - self._page))
+        # scrolling away from the end stops following; scrolling back to it resumes
+        self.follow.set(self._first + self._page >= self._tail.lines)
+        self._render()
+        return "break"
+
+    def _on_scrollbar(self, action, *args):
+        if self._results:
+            self.out.yview(action, *args)
+            return
+        if self._tail is None or not self._tail.lines:
+            return
+        if action == "moveto":
+            target = int(float(args[0]) * self._tail.lines)
+            self._scroll_lines(target - self._first)
+        elif action == "scroll":
+            step = int(args[0]) * (self._page if args[1] == "pages" else 1)
+            self._scroll_lines(step)
+
+    def _on_resize(self, event):
+        page = max(1, event.height // max(1, self._linespace))
+        if page != self._page:
+            self._page = page
+            self._render()
+
+    def _search(self):
+        if not self._log_path:
+            return
+        kind = self.type_combo.get()
+        types = None if kind == "any" else [kind]
+        since = self.since_entry.get().strip() or None
+        until = self.until_entry.get().strip() or None
+        text = self.text_entry.get() or None
+        if not (types or since or until or text):
+            self._clear_search()
+            return
+
+        def worker():
+            try:
+                flush_logs()
+                lines = list(search(self._log_path, types=types, since=since, until=until, text=text,
+                                    limit=self.MAX_RESULTS))
+                self.app.ui.call(self._show_results, lines)
+            except ValueError as e:
+                self.app.ui.call(messagebox.showerror, "Invalid filter", f"Please check the filter: {e}")
+
+        threading.Thread(target=worker, daemon=True).start()
+
+    def _show_results(self, lines):
+        self._results = True
+        self.follow.set(False)
+        self.out.delete("1.0", tk.END)
+        self.out.insert(tk.END, "".join(lines) or "<no matching events>\n")
+        self.out.configure(yscrollcommand=self.scroll.set)
+        more = " (limit reached)" if len(lines) >= self.MAX_RESULTS else ""
+        self.status.config(text=f"{len(lines)} matching events{more}")
+
+    def _clear_search(self):
+        self._results = False
+        self.out.configure(yscrollcommand="")
+        self.follow.set(True)
+        self._render()
+
+    def _replay(self):
+        if self._replayer is not None:
+            messagebox.showinfo("Replay running", "Stop the running replay first.")
+            return
+        try:
+            speed = float(self.speed_entry.get())
+        except ValueError:
+            speed = 0.0
+        if not MIN_SPEED <= speed <= MAX_SPEED:
+            messagebox.showerror("Invalid input", f"Speed must be between {MIN_SPEED:g} and {MAX_SPEED:g}.")
+            return
+        initial = os.path.dirname(self._log_path) if self._log_path else None
+        p = filedialog.askopenfilename(initialdir=initial, title="Replay log or timed scenario",
+                                       filetypes=[("Logs and scenarios", "*.log *.log.* *.gz *.jsonl *.json *.yaml *.yml"),
+                                                  ("All files", "*")])
+        if not p:
+            return
+        self._replayer = Replayer(p, speed=speed, log=self.app._log,
+                                  allow_external=self.app.allow_external.get())
+
+        def worker():
+            try:
+                flush_logs()
+                self._replayer.run()
+            except Exception as e:
+                self.app.ui.call(messagebox.showerror, "Replay failed", f"Could not replay {p}: {e}")
+            finally:
+                self._replayer = None
+
+        threading.Thread(target=worker, daemon=True).start()
+
+    def _stop_replay(self):
+        if self._replayer is not None:
+            self._replayer.stop()
 
     def _save_as(self):
         p = filedialog.asksaveasfilename(defaultextension=".log", filetypes=[("Log files", "*.log"), ("All files", "*")])
-        if p:
-            with open(p, "w", encoding="utf-8") as f:
-                f.write(self.out.get("1.0", tk.END))
-            messagebox.showinfo("Saved", f"Log saved to {p}")
+        if not p or not self._log_path:
+            return
+
+        def worker():
+            try:
+                flush_logs()
+                # stream file to file (inflating archives); never goes through the widget
+                with open_segment(self._log_path) as src, open(p, "wb") as dst:
+                    shutil.copyfileobj(src, dst, 1 << 20)
+                self.app.ui.call(messagebox.showinfo, "Saved", f"Log saved to {p}")
+            except Exception as e:
+                self.app.ui.call(messagebox.showerror, "Save failed", f"Could not save log: {e}")
+
+        threading.Thread(target=worker, daemon=True).start()
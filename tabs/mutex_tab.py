@@ -1,17 +1,17 @@
-import os
+import threading
 import datetime
 import tkinter as tk
-from tkinter import ttk, messagebox
+from tkinter import ttk, messagebox, filedialog
 
-IS_WINDOWS = os.name == 'nt'
+from sim import mutexes
 
 
 class MutexTab(ttk.Frame):
     def __init__(self, parent, app):
         super().__init__(parent)
         self.app = app
-        self._lockfile = None
-        self._mutex_handle = None
+        self.table = mutexes.MutexTable(log=self.app._log)
+        self._last = None
         self._build()
 
     def _build(self):
@@ -28,13 +28,44 @@ class MutexTab(ttk.Frame):
         btn_release = ttk.Button(frm, text="Release Mutex", command=self._release_mutex)
         btn_release.grid(row=0, column=3, padx=6)
 
+        # many mutexes at once, each with an optional lease
+        mass = ttk.LabelFrame(self, text="Mass mutexes (one name per line, {i} = index)")
+        mass.pack(fill=tk.X, padx=8, pady=2)
+        self.names_text = tk.Text(mass, height=5, width=60)
+        self.names_text.grid(row=0, column=0, rowspan=3, columnspan=6, sticky=tk.W)
+        btn_known = ttk.Button(mass, text="Known malware names", command=self._fill_known)
+        btn_known.grid(row=0, column=6, padx=6, sticky=tk.EW)
+        btn_load = ttk.Button(mass, text="Load list...", command=self._load_names)
+        btn_load.grid(row=1, column=6, padx=6, sticky=tk.EW)
+        ttk.Label(mass, text="Count per {i} name:").grid(row=3, column=0, sticky=tk.W)
+        self.mass_count_entry = ttk.Entry(mass, width=8)
+        self.mass_count_entry.insert(0, "100")
+        self.mass_count_entry.grid(row=3, column=1, sticky=tk.W)
+        ttk.Label(mass, text="TTL (s, blank = hold):").grid(row=3, column=2, sticky=tk.W)
+        self.mass_ttl_entry = ttk.Entry(mass, width=8)
+        self.mass_ttl_entry.grid(row=3, column=3, sticky=tk.W)
+        btn_hold = ttk.Button(mass, text="Create all", command=self._acquire_all)
+        btn_hold.grid(row=3, column=4, padx=6)
+        btn_release_all = ttk.Button(mass, text="Release all", command=self._release_all)
+        btn_release_all.grid(row=3, column=5, padx=6)
+        btn_churn = ttk.Button(mass, text="Churn benchmark", command=self._churn)
+        btn_churn.grid(row=3, column=6, padx=6, sticky=tk.EW)
+        self.held_label = ttk.Label(mass, text="Held: 0")
+        self.held_label.grid(row=2, column=6, padx=6, sticky=tk.W)
+
         self.out = tk.Text(self, height=16, wrap=tk.NONE)
         self.out.pack(fill=tk.BOTH, expand=True, padx=8, pady=8)
+        self.app.ui.register(self.out)
+        self._update_held()
 
     def _append(self, line: str):
         ts = datetime.datetime.now(datetime.timezone.utc).isoformat()
-        self.out.insert(tk.END, f"{ts} {line}\n")
-        self.out.see(tk.END)
+        self.app.ui.post(self.out, f"{ts} {line}\n")
+
+    def _update_held(self):
+        # leases expire in the background, so poll the count
+        self.held_label.config(text=f"Held: {len(self.table)}")
+        self.after(1000, self._update_held)
 
     def _create_mutex(self):
         name = self.name_entry.get().strip()
@@ -42,57 +73,73 @@ class MutexTab(ttk.Frame):
             messagebox.showinfo("Input required", "Please enter a mutex/lock name.")
             return
 
+        ok, msg = self.table.acquire(name)
+        if ok:
+            self._last = name
+        self._append(msg)
+
+    def _release_mutex(self):
+        name = self.name_entry.get().strip()
+        if name not in self.table and self._last is not None:
+            name = self._last
+        _, msg = self.table.release(name)
+        if name == self._last:
+            self._last = None
+        self._append(msg)
+
+    def _fill_known(self):
+        self.names_text.delete("1.0", tk.END)
+        self.names_text.insert("1.0", "\n".join(mutexes.KNOWN_MUTEXES))
+
+    def _load_names(self):
+        path = filedialog.askopenfilename(filetypes=[("Text files", "*.txt"), ("All files", "*.*")])
+        if not path:
+            return
         try:
-            if IS_WINDOWS:
-                import ctypes
-                from ctypes import wintypes
-
-                kernel32 = ctypes.WinDLL('kernel32', use_last_error=True)
-                CreateMutex = kernel32.CreateMutexW
-                CreateMutex.argtypes = [wintypes.LPVOID, wintypes.BOOL, wintypes.LPCWSTR]
-                CreateMutex.restype = wintypes.HANDLE
-                handle = CreateMutex(None, False, name)
-                if not handle:
-                    raise OSError("CreateMutex failed")
-                self._mutex_handle = handle
-                msg = f"Created Windows mutex '{name}'"
-            else:
-                lockpath = os.path.join('/tmp', f"dagger_mutex_{name}.lock")
-                fd = os.open(lockpath, os.O_WRONLY | os.O_CREAT | os.O_EXCL)
-                os.write(fd, str(os.getpid()).encode())
-                os.close(fd)
-                self._lockfile = lockpath
-                msg = f"Created lockfile '{lockpath}'"
+            names = mutexes.load_names(path)
+        except OSError as e:
+            messagebox.showerror("Load failed", str(e))
+            return
+        self.names_text.delete("1.0", tk.END)
+        self.names_text.insert("1.0", "\n".join(names))
 
-            self._append(msg)
-            self.app._log(msg)
-        except FileExistsError:
-            msg = f"Mutex/lock '{name}' already exists"
-            self._append(msg)
-            self.app._log(msg)
-        except Exception as e:
-            msg = f"Mutex create error: {e}"
+    def _acquire_all(self):
+        lines = [l.strip() for l in self.names_text.get("1.0", tk.END).splitlines() if l.strip()]
+        if not lines:
+            messagebox.showinfo("Input required", "Please enter mutex names, one per line.")
+            return
+        try:
+            count = int(self.mass_count_entry.get() or 1)
+            ttl = float(self.mass_ttl_entry.get()) if self.mass_ttl_entry.get().strip() else None
+        except ValueError:
+            messagebox.showerror("Invalid input", "Count and TTL must be numeric.")
+            return
+        names = mutexes.expand_names(lines, count)
+
+        def worker():
+            result = self.table.acquire_many(names, ttl)
+            msg = (f"Mutex mass create: created={result['ok']} failed={result['failed']} "
+                   f"rate={result['rate']}/s held={len(self.table)}" + (f" ttl={ttl}s" if ttl else ""))
             self._append(msg)
             self.app._log(msg)
 
-    def _release_mutex(self):
-        try:
-            if IS_WINDOWS and self._mutex_handle:
-                import ctypes
-                kernel32 = ctypes.WinDLL('kernel32', use_last_error=True)
-                kernel32.CloseHandle(self._mutex_handle)
-                self._mutex_handle = None
-                msg = "Released Windows mutex"
-            elif self._lockfile:
-                os.remove(self._lockfile)
-                msg = f"Removed lockfile {self._lockfile}"
-                self._lockfile = None
-            else:
-                msg = "No mutex/lock to release"
+        threading.Thread(target=worker, daemon=True).start()
 
+    def _release_all(self):
+        def worker():
+            released = self.table.release_all()
+            msg = f"Mutex mass release: released={released}"
             self._append(msg)
             self.app._log(msg)
-        except Exception as e:
-            msg = f"Mutex release error: {e}"
+
+        threading.Thread(target=worker, daemon=True).start()
+
+    def _churn(self):
+        def worker():
+            result = mutexes.churn(10000, workers=4)
+            msg = (f"Mutex churn: {result['iterations']} create+release in {result['elapsed']}s "
+                   f"ops/s={result['ops_per_s']} create p99={result['create']['latency_ms']['p99']}ms")
             self._append(msg)
             self.app._log(msg)
+
+        threading.Thread(target=worker, daemon=True).start()
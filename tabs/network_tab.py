@@ -1,10 +1,11 @@
-import socket
 import threading
 import datetime
-import urllib.request
+import urllib.parse
 import tkinter as tk
 from tkinter import ttk, messagebox
 
+from sim import actions, beacon, dnsburst, sweep
+
 
 class NetworkTab(ttk.Frame):
     def __init__(self, parent, app):
@@ -44,14 +45,98 @@ class NetworkTab(ttk.Frame):
         btn_http = ttk.Button(frm, text="HTTP GET", command=self._http_get)
         btn_http.grid(row=2, column=4)
 
+        # DNS burst
+        burst = ttk.LabelFrame(self, text="DNS burst")
+        burst.pack(fill=tk.X, padx=8, pady=2)
+        ttk.Label(burst, text="Domains / pattern:").grid(row=0, column=0, sticky=tk.W)
+        self.burst_entry = ttk.Entry(burst, width=50)
+        self.burst_entry.insert(0, "{rand:14}.dga.example.test")
+        self.burst_entry.grid(row=0, column=1, columnspan=5, sticky=tk.W)
+        ttk.Label(burst, text="Nameserver:").grid(row=0, column=6, sticky=tk.W)
+        self.burst_ns_entry = ttk.Entry(burst, width=16)
+        self.burst_ns_entry.grid(row=0, column=7, sticky=tk.W)
+        ttk.Label(burst, text="Count:").grid(row=1, column=0, sticky=tk.W)
+        self.burst_count_entry = ttk.Entry(burst, width=8)
+        self.burst_count_entry.insert(0, "1000")
+        self.burst_count_entry.grid(row=1, column=1, sticky=tk.W)
+        ttk.Label(burst, text="Rate (q/s, 0=max):").grid(row=1, column=2, sticky=tk.W)
+        self.burst_rate_entry = ttk.Entry(burst, width=8)
+        self.burst_rate_entry.insert(0, "200")
+        self.burst_rate_entry.grid(row=1, column=3, sticky=tk.W)
+        ttk.Label(burst, text="Concurrency:").grid(row=1, column=4, sticky=tk.W)
+        self.burst_conc_entry = ttk.Entry(burst, width=6)
+        self.burst_conc_entry.insert(0, "50")
+        self.burst_conc_entry.grid(row=1, column=5, sticky=tk.W)
+        btn_burst = ttk.Button(burst, text="Run DNS burst", command=self._dns_burst)
+        btn_burst.grid(row=1, column=7, padx=6)
+
+        # TCP sweep
+        sweep_frm = ttk.LabelFrame(self, text="TCP sweep")
+        sweep_frm.pack(fill=tk.X, padx=8, pady=2)
+        ttk.Label(sweep_frm, text="Targets (IP/CIDR):").grid(row=0, column=0, sticky=tk.W)
+        self.sweep_targets_entry = ttk.Entry(sweep_frm, width=30)
+        self.sweep_targets_entry.insert(0, "127.0.0.0/28")
+        self.sweep_targets_entry.grid(row=0, column=1, columnspan=3, sticky=tk.W)
+        ttk.Label(sweep_frm, text="Ports:").grid(row=0, column=4, sticky=tk.W)
+        self.sweep_ports_entry = ttk.Entry(sweep_frm, width=24)
+        self.sweep_ports_entry.insert(0, "22,80,135,139,445,3389")
+        self.sweep_ports_entry.grid(row=0, column=5, columnspan=3, sticky=tk.W)
+        ttk.Label(sweep_frm, text="Concurrency:").grid(row=1, column=0, sticky=tk.W)
+        self.sweep_conc_entry = ttk.Entry(sweep_frm, width=8)
+        self.sweep_conc_entry.insert(0, "200")
+        self.sweep_conc_entry.grid(row=1, column=1, sticky=tk.W)
+        ttk.Label(sweep_frm, text="Timeout (s):").grid(row=1, column=2, sticky=tk.W)
+        self.sweep_timeout_entry = ttk.Entry(sweep_frm, width=6)
+        self.sweep_timeout_entry.insert(0, "1")
+        self.sweep_timeout_entry.grid(row=1, column=3, sticky=tk.W)
+        ttk.Label(sweep_frm, text="Rate (conn/s, 0=max):").grid(row=1, column=4, sticky=tk.W)
+        self.sweep_rate_entry = ttk.Entry(sweep_frm, width=8)
+        self.sweep_rate_entry.insert(0, "500")
+        self.sweep_rate_entry.grid(row=1, column=5, sticky=tk.W)
+        btn_sweep = ttk.Button(sweep_frm, text="Run TCP sweep", command=self._tcp_sweep)
+        btn_sweep.grid(row=1, column=7, padx=6)
+
+        # HTTP beacons
+        beacon_frm = ttk.LabelFrame(self, text="HTTP beacons")
+        beacon_frm.pack(fill=tk.X, padx=8, pady=2)
+        ttk.Label(beacon_frm, text="C2 URL:").grid(row=0, column=0, sticky=tk.W)
+        self.beacon_url_entry = ttk.Entry(beacon_frm, width=40)
+        self.beacon_url_entry.insert(0, "http://127.0.0.1:8080/")
+        self.beacon_url_entry.grid(row=0, column=1, columnspan=3, sticky=tk.W)
+        ttk.Label(beacon_frm, text="URIs (comma sep):").grid(row=0, column=4, sticky=tk.W)
+        self.beacon_uris_entry = ttk.Entry(beacon_frm, width=30)
+        self.beacon_uris_entry.insert(0, "/api/{id}/tasks,/jquery-3.3.1.min.js")
+        self.beacon_uris_entry.grid(row=0, column=5, columnspan=3, sticky=tk.W)
+        ttk.Label(beacon_frm, text="Beacons:").grid(row=1, column=0, sticky=tk.W)
+        self.beacon_count_entry = ttk.Entry(beacon_frm, width=8)
+        self.beacon_count_entry.insert(0, "50")
+        self.beacon_count_entry.grid(row=1, column=1, sticky=tk.W)
+        ttk.Label(beacon_frm, text="Interval (s):").grid(row=1, column=2, sticky=tk.W)
+        self.beacon_interval_entry = ttk.Entry(beacon_frm, width=6)
+        self.beacon_interval_entry.insert(0, "10")
+        self.beacon_interval_entry.grid(row=1, column=3, sticky=tk.W)
+        ttk.Label(beacon_frm, text="Jitter (0-1):").grid(row=1, column=4, sticky=tk.W)
+        self.beacon_jitter_entry = ttk.Entry(beacon_frm, width=6)
+        self.beacon_jitter_entry.insert(0, "0.3")
+        self.beacon_jitter_entry.grid(row=1, column=5, sticky=tk.W)
+        ttk.Label(beacon_frm, text="Check-ins each:").grid(row=1, column=6, sticky=tk.W)
+        self.beacon_checkins_entry = ttk.Entry(beacon_frm, width=6)
+        self.beacon_checkins_entry.insert(0, "10")
+        self.beacon_checkins_entry.grid(row=1, column=7, sticky=tk.W)
+        btn_beacon = ttk.Button(beacon_frm, text="Start beacons", command=self._start_beacons)
+        btn_beacon.grid(row=0, column=8, padx=6)
+        btn_beacon_stop = ttk.Button(beacon_frm, text="Stop", command=self._stop_beacons)
+        btn_beacon_stop.grid(row=1, column=8, padx=6)
+        self._beacon_sim = None
+
         # Log output
         self.out = tk.Text(self, height=18, wrap=tk.NONE)
         self.out.pack(fill=tk.BOTH, expand=True, padx=8, pady=8)
+        self.app.ui.register(self.out)
 
     def _append(self, line: str):
         ts = datetime.datetime.now(datetime.timezone.utc).isoformat()
-        self.out.insert(tk.END, f"{ts} {line}\n")
-        self.out.see(tk.END)
+        self.app.ui.post(self.out, f"{ts} {line}\n")
 
     def _resolve(self):
         host = self.domain_entry.get().strip()
@@ -60,15 +145,51 @@ class NetworkTab(ttk.Frame):
             return
 
         def worker():
+            _, msg = actions.resolve_dns(host)
+            self._append(msg)
+            self.app._log(msg)
+
+        threading.Thread(target=worker, daemon=True).start()
+
+    def _dns_burst(self):
+        spec = self.burst_entry.get().strip()
+        nameserver = self.burst_ns_entry.get().strip() or None
+        if not spec:
+            messagebox.showinfo("Input required", "Please enter domains (comma separated) or a pattern.")
+            return
+        try:
+            count = int(self.burst_count_entry.get())
+            rate = float(self.burst_rate_entry.get() or 0)
+            concurrency = int(self.burst_conc_entry.get())
+        except ValueError:
+            messagebox.showerror("Invalid input", "Count, rate and concurrency must be numeric.")
+            return
+        try:
+            dnsburst.check_concurrency(concurrency)
+        except ValueError as e:
+            messagebox.showerror("Invalid input", str(e).capitalize() + ".")
+            return
+        allow_external = self.app.allow_external.get()
+        if nameserver and not actions.is_allowed(nameserver, allow_external):
+            messagebox.showwarning("Blocked", "External nameservers are blocked. Check the allow external option to enable.")
+            return
+        if "{" in spec:
+            names = dnsburst.iter_domains(pattern=spec, count=count)
+        else:
+            names = dnsburst.iter_domains(domains=[d.strip() for d in spec.split(",") if d.strip()], count=count)
+
+        def worker():
+            self.app._log(f"DNS burst started: {count} queries rate={rate or 'max'} concurrency={concurrency}")
             try:
-                ip = socket.gethostbyname(host)
-                msg = f"DNS resolved {host} -> {ip}"
-                self._append(msg)
-                self.app._log(msg)
+                result = dnsburst.run_dns_burst(names, rate=rate, concurrency=concurrency, nameserver=nameserver,
+                                                log=self.app._log, allow_external=allow_external)
+                lat = result["latency_ms"]
+                msg = (f"DNS burst done: sent={result['sent']} ok={result['ok']} failed={result['failed']} "
+                       f"qps={result['rate']} p50={lat['p50']}ms p95={lat['p95']}ms p99={lat['p99']}ms")
             except Exception as e:
-                msg = f"DNS resolve error for {host}: {e}"
-                self._append(msg)
-                self.app._log(msg)
+                msg = f"DNS burst error: {e}"
+            self._append(msg)
+            self.app._log(msg)
 
         threading.Thread(target=worker, daemon=True).start()
 
@@ -84,23 +205,92 @@ class NetworkTab(ttk.Frame):
             messagebox.showerror("Invalid port", "Please enter a valid numeric port.")
             return
 
-        if not self.app.allow_external and not ip.startswith("127.") and ip != "localhost":
+        allow_external = self.app.allow_external.get()
+        if not actions.is_allowed(ip, allow_external):
             messagebox.showwarning("Blocked", "External network connections are blocked. Check the allow external option to enable.")
             return
 
         def worker():
+            _, msg = actions.tcp_connect(ip, port, timeout=5, allow_external=allow_external)
+            self._append(msg)
+            self.app._log(msg)
+
+        threading.Thread(target=worker, daemon=True).start()
+
+    def _tcp_sweep(self):
+        allow_external = self.app.allow_external.get()
+        try:
+            nets = sweep.parse_targets(self.sweep_targets_entry.get(), allow_external)
+            ports = sweep.parse_ports(self.sweep_ports_entry.get())
+            concurrency = int(self.sweep_conc_entry.get())
+            timeout = float(self.sweep_timeout_entry.get())
+            rate = float(self.sweep_rate_entry.get() or 0)
+        except PermissionError:
+            messagebox.showwarning("Blocked", "External network connections are blocked. Check the allow external option to enable.")
+            return
+        except ValueError as e:
+            messagebox.showerror("Invalid input", f"Please check the sweep settings: {e}")
+            return
+        if not nets or not ports:
+            messagebox.showinfo("Input required", "Please enter targets and ports.")
+            return
+
+        def worker():
+            self.app._log(f"TCP sweep started: {len(nets)} ranges x {len(ports)} ports concurrency={concurrency}")
+            try:
+                result = sweep.run_tcp_sweep(nets, ports, concurrency=concurrency, timeout=timeout, rate=rate,
+                                             log=self.app._log, allow_external=allow_external)
+                msg = (f"TCP sweep done: attempts={result['sent']} open={result['open']} refused={result['refused']} "
+                       f"timeout={result['timeout']} rate={result['rate']}/s p95={result['latency_ms']['p95']}ms")
+            except Exception as e:
+                msg = f"TCP sweep error: {e}"
+            self._append(msg)
+            self.app._log(msg)
+
+        threading.Thread(target=worker, daemon=True).start()
+
+    def _start_beacons(self):
+        if self._beacon_sim is not None:
+            messagebox.showinfo("Running", "Beacons are already running. Stop them first.")
+            return
+        uris = [u.strip() for u in self.beacon_uris_entry.get().split(",") if u.strip()]
+        try:
+            sim = beacon.BeaconSimulator(
+                self.beacon_url_entry.get().strip(),
+                beacons=int(self.beacon_count_entry.get()),
+                interval=float(self.beacon_interval_entry.get()),
+                jitter=float(self.beacon_jitter_entry.get()),
+                checkins=int(self.beacon_checkins_entry.get()),
+                uris=uris or None,
+                log=self.app._log,
+                allow_external=self.app.allow_external.get(),
+            )
+        except PermissionError:
+            messagebox.showwarning("Blocked", "External HTTP requests are blocked by default.")
+            return
+        except ValueError as e:
+            messagebox.showerror("Invalid input", f"Please check the beacon settings: {e}")
+            return
+        self._beacon_sim = sim
+
+        def worker():
+            self.app._log(f"HTTP beacons started: {sim.beacons} beacons to {sim.base_url} interval={sim.interval}s jitter={sim.jitter}")
             try:
-                with socket.create_connection((ip, port), timeout=5) as s:
-                    msg = f"TCP connect success to {ip}:{port}"
-                    self._append(msg)
-                    self.app._log(msg)
+                result = sim.run()
+                msg = (f"HTTP beacons done: requests={result['sent']} ok={result['ok']} failed={result['failed']} "
+                       f"connections={result['connections']} p95={result['latency_ms']['p95']}ms")
             except Exception as e:
-                msg = f"TCP connect failed to {ip}:{port} - {e}"
-                self._append(msg)
-                self.app._log(msg)
+                msg = f"HTTP beacon error: {e}"
+            self._beacon_sim = None
+            self._append(msg)
+            self.app._log(msg)
 
         threading.Thread(target=worker, daemon=True).start()
 
+    def _stop_beacons(self):
+        if self._beacon_sim is not None:
+            self._beacon_sim.stop()
+
     def _http_get(self):
         url = self.url_entry.get().strip()
         if not url:
@@ -108,23 +298,15 @@ class NetworkTab(ttk.Frame):
             return
 
         # very conservative: block external unless allowed
-        if not self.app.allow_external:
-            parsed = urllib.request.urlparse(url)
-            host = parsed.hostname
-            if host and host not in ("localhost", "127.0.0.1"):
-                messagebox.showwarning("Blocked", "External HTTP requests are blocked by default.")
-                return
+        allow_external = self.app.allow_external.get()
+        host = urllib.parse.urlparse(url).hostname
+        if host and not actions.is_allowed(host, allow_external):
+            messagebox.showwarning("Blocked", "External HTTP requests are blocked by default.")
+            return
 
         def worker():
-            try:
-                with urllib.request.urlopen(url, timeout=8) as r:
-                    info = r.read(512)
-                    msg = f"HTTP GET {url} status={r.status} len={len(info)}"
-                    self._append(msg)
-                    self.app._log(msg)
-            except Exception as e:
-                msg = f"HTTP GET failed {url} - {e}"
-                self._append(msg)
-                self.app._log(msg)
+            _, msg = actions.http_get(url, timeout=8, allow_external=allow_external)
+            self._append(msg)
+            self.app._log(msg)
 
         threading.Thread(target=worker, daemon=True).start()
@@ -3,7 +3,10 @@ import json
 import threading
 import datetime
 import tkinter as tk
-from tkinter import ttk, messagebox
+from tkinter import ttk, messagebox, filedialog
+
+from sim import actions
+from sim.registry import VALUE_TYPES, open_store
 
 IS_WINDOWS = os.name == 'nt'
 
@@ -36,15 +39,30 @@ class RegistryTab(ttk.Frame):
         name_label.grid(row=1, column=0, sticky=tk.W)
         self.value_entry = ttk.Entry(frm, width=40)
         self.value_entry.grid(row=1, column=1, sticky=tk.W)
+        btn_enum = ttk.Button(frm, text="Subkeys", command=self._enumerate)
+        btn_enum.grid(row=1, column=2, padx=6)
+
+        # writes always go to the simulated store, never to the real registry
+        data_label = ttk.Label(frm, text="Value data (simulated):")
+        data_label.grid(row=2, column=0, sticky=tk.W)
+        self.data_entry = ttk.Entry(frm, width=40)
+        self.data_entry.grid(row=2, column=1, sticky=tk.W)
+        self.type_combo = ttk.Combobox(frm, values=VALUE_TYPES, state="readonly", width=14)
+        self.type_combo.set("REG_SZ")
+        self.type_combo.grid(row=2, column=1, sticky=tk.E)
+        btn_set = ttk.Button(frm, text="Set value", command=self._set_value)
+        btn_set.grid(row=2, column=2, padx=6)
+        btn_import = ttk.Button(frm, text="Import .reg...", command=self._import_reg)
+        btn_import.grid(row=2, column=3, padx=6)
 
         # output
         self.out = tk.Text(self, height=18, wrap=tk.NONE)
         self.out.pack(fill=tk.BOTH, expand=True, padx=8, pady=8)
+        self.app.ui.register(self.out)
 
     def _append(self, line: str):
         ts = datetime.datetime.now(datetime.timezone.utc).isoformat()
-        self.out.insert(tk.END, f"{ts} {line}\n")
-        self.out.see(tk.END)
+        self.app.ui.post(self.out, f"{ts} {line}\n")
 
     def _query(self):
         key = self.key_entry.get().strip()
@@ -53,45 +71,66 @@ class RegistryTab(ttk.Frame):
             messagebox.showinfo("Input required", "Please enter a registry path or simulated key.")
             return
 
+        def worker():
+            _, msg = actions.query_registry(key, name, store_path=self._store_path)
+            self._append(msg)
+            self.app._log(msg)
+
+        threading.Thread(target=worker, daemon=True).start()
+
+    def _enumerate(self):
+        key = self.key_entry.get().strip()
+        if not key:
+            messagebox.showinfo("Input required", "Please enter a simulated key.")
+            return
+
+        def worker():
+            _, msg = actions.enum_registry(key, store_path=self._store_path)
+            self._append(msg)
+            self.app._log(msg)
+
+        threading.Thread(target=worker, daemon=True).start()
+
+    def _set_value(self):
+        key = self.key_entry.get().strip()
+        name = self.value_entry.get().strip()
+        raw = self.data_entry.get()
+        vtype = self.type_combo.get()
+        if not key:
+            messagebox.showinfo("Input required", "Please enter a simulated key.")
+            return
+        try:
+            if vtype in ("REG_DWORD", "REG_QWORD"):
+                data = int(raw, 0)
+            elif vtype == "REG_MULTI_SZ":
+                data = [p for p in raw.split(";") if p]
+            elif vtype in ("REG_BINARY", "REG_NONE"):
+                data = bytes.fromhex(raw.replace(",", " "))
+            else:
+                data = raw
+        except ValueError:
+            messagebox.showerror("Invalid data", f"Value data is not valid for {vtype}.")
+            return
+
+        def worker():
+            _, msg = actions.set_registry(key, name, data, vtype, store_path=self._store_path)
+            self._append(msg)
+            self.app._log(msg)
+
+        threading.Thread(target=worker, daemon=True).start()
+
+    def _import_reg(self):
+        path = filedialog.askopenfilename(filetypes=[("Registry files", "*.reg"), ("All files", "*.*")])
+        if not path:
+            return
+
         def worker():
             try:
-                if IS_WINDOWS:
-                    import winreg
-
-                    parts = key.split("\\\\", 1)
-                    hive_name = parts[0]
-                    sub = parts[1] if len(parts) > 1 else ""
-                    hive = getattr(winreg, hive_name)
-                    with winreg.OpenKey(hive, sub) as k:
-                        if name:
-                            val, _ = winreg.QueryValueEx(k, name)
-                            msg = f"Registry {key} {name} = {val}"
-                        else:
-                            vals = []
-                            try:
-                                i = 0
-                                while True:
-                                    v = winreg.EnumValue(k, i)
-                                    vals.append(f"{v[0]}={v[1]}")
-                                    i += 1
-                            except OSError:
-                                pass
-                            msg = f"Registry {key} values: {';'.join(vals)}"
-                else:
-                    with open(self._store_path, "r", encoding="utf-8") as f:
-                        store = json.load(f)
-                    entry = store.get(key, {})
-                    if name:
-                        v = entry.get(name, "<not present>")
-                        msg = f"Simulated registry {key} {name} = {v}"
-                    else:
-                        msg = f"Simulated registry {key} = {json.dumps(entry)}"
-
-                self._append(msg)
-                self.app._log(msg)
+                count = open_store(self._store_path).import_reg(path)
+                msg = f"Simulated registry imported {count} changes from {path}"
             except Exception as e:
-                msg = f"Registry query error: {e}"
-                self._append(msg)
-                self.app._log(msg)
+                msg = f"Registry import error: {e}"
+            self._append(msg)
+            self.app._log(msg)
 
         threading.Thread(target=worker, daemon=True).start()
@@ -0,0 +1,95 @@
+import time
+import tkinter as tk
+from tkinter import ttk, messagebox
+
+from sim import metrics
+
+
+class StatsTab(ttk.Frame):
+    """Live per-operation counters and latency percentiles from :mod:`sim.metrics`."""
+
+    REFRESH_MS = 1000
+    COLUMNS = (
+        ("op", "Operation", 140),
+        ("ok", "OK", 80),
+        ("failed", "Failed", 70),
+        ("rate", "Rate/s", 80),
+        ("errors", "Err %", 60),
+        ("mean", "Mean ms", 80),
+        ("p50", "p50 ms", 80),
+        ("p95", "p95 ms", 80),
+        ("p99", "p99 ms", 80),
+    )
+
+    def __init__(self, parent, app):
+        super().__init__(parent)
+        self.app = app
+        self.server = None
+        self._last = {}
+        self._last_time = time.monotonic()
+        self._build()
+
+    def _build(self):
+        frm = ttk.Frame(self)
+        frm.pack(fill=tk.X, padx=8, pady=6)
+        ttk.Label(frm, text="Prometheus port:").pack(side=tk.LEFT)
+        self.port_entry = ttk.Entry(frm, width=7)
+        self.port_entry.insert(0, "9464")
+        self.port_entry.pack(side=tk.LEFT, padx=(0, 6))
+        self.btn_serve = ttk.Button(frm, text="Serve /metrics", command=self._toggle_server)
+        self.btn_serve.pack(side=tk.LEFT)
+        self.url_label = ttk.Label(frm, text="")
+        self.url_label.pack(side=tk.LEFT, padx=6)
+        self.total_label = ttk.Label(frm, text="")
+        self.total_label.pack(side=tk.RIGHT)
+
+        body = ttk.Frame(self)
+        body.pack(fill=tk.BOTH, expand=True, padx=8, pady=8)
+        self.tree = ttk.Treeview(body, columns=[c[0] for c in self.COLUMNS], show="headings")
+        for name, title, width in self.COLUMNS:
+            self.tree.heading(name, text=title)
+            self.tree.column(name, width=width, anchor=tk.W if name == "op" else tk.E)
+        scroll = ttk.Scrollbar(body, orient=tk.VERTICAL, command=self.tree.yview)
+        self.tree.configure(yscrollcommand=scroll.set)
+        scroll.pack(side=tk.RIGHT, fill=tk.Y)
+        self.tree.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
+        self.after(self.REFRESH_MS, self._refresh)
+
+    def _refresh(self):
+        now = time.monotonic()
+        dt = max(now - self._last_time, 1e-6)
+        snap = metrics.METRICS.snapshot()
+        total_rate = 0.0
+        for op in sorted(snap):
+            stats = snap[op]
+            s = metrics.summary(stats)
+            done = s["ok"] + s["failed"]
+            rate = (done - self._last.get(op, 0)) / dt
+            total_rate += rate
+            self._last[op] = done
+            values = (op, s["ok"], s["failed"], f"{rate:.1f}",
+                      f"{100.0 * s['failed'] / done:.1f}" if done else "0.0",
+                      s["mean_ms"], s["p50_ms"], s["p95_ms"], s["p99_ms"])
+            if self.tree.exists(op):
+                self.tree.item(op, values=values)
+            else:
+                self.tree.insert("", tk.END, iid=op, values=values)
+        self._last_time = now
+        self.total_label.config(text=f"Total: {total_rate:.1f} ops/s")
+        self.after(self.REFRESH_MS, self._refresh)
+
+    def _toggle_server(self):
+        if self.server is not None:
+            self.server.stop()
+            self.server = None
+            self.btn_serve.config(text="Serve /metrics")
+            self.url_label.config(text="")
+            return
+        try:
+            self.server = metrics.MetricsServer(port=int(self.port_entry.get())).start()
+        except (ValueError, OSError) as e:
+            messagebox.showerror("Metrics endpoint", f"Could not serve metrics: {e}")
+            return
+        self.btn_serve.config(text="Stop serving")
+        self.url_label.config(text=self.server.url)
+        self.app._log(f"Serving Prometheus metrics on {self.server.url}")
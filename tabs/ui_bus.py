@@ -0,0 +1,66 @@
+import collections
+import tkinter as tk
+
+
+class UIEventBus:
+    """Thread-safe hand-off of output lines from worker threads to Tk widgets.
+
+    Workers call :meth:`post` (a lock-free deque append); the Tk main loop
+    drains the queue every ``interval_ms`` and inserts each widget's lines as
+    one block, scrolling once per frame. Widgets keep at most ``max_lines``.
+    """
+
+    def __init__(self, root, interval_ms: int = 50, max_batch: int = 5000, max_lines: int = 5000):
+        self.root = root
+        self.interval_ms = interval_ms
+        self.max_batch = max_batch
+        self.max_lines = max_lines
+        self._limits = {}
+        self._events = collections.deque()
+        self._calls = collections.deque()
+        self.dropped = 0
+        self.root.after(self.interval_ms, self._drain)
+
+    def register(self, widget, max_lines: int = None):
+        self._limits[widget] = max_lines or self.max_lines
+
+    def post(self, widget, text: str):
+        self._events.append((widget, text))
+
+    def call(self, fn, *args):
+        """Run ``fn(*args)`` on the Tk main loop (e.g. message boxes from workers)."""
+        self._calls.append((fn, args))
+
+    def _drain(self):
+        try:
+            while self._calls:
+                fn, args = self._calls.popleft()
+                fn(*args)
+            pending = {}
+            for _ in range(min(len(self._events), self.max_batch)):
+                widget, text = self._events.popleft()
+                pending.setdefault(widget, []).append(text)
+            for widget, chunks in pending.items():
+                self._insert(widget, chunks)
+            # under sustained overload keep only what the widgets could show anyway
+            backlog = len(self._events) - self.max_batch * 4
+            for _ in range(max(0, backlog)):
+                self._events.popleft()
+                self.dropped += 1
+        finally:
+            self.root.after(self.interval_ms, self._drain)
+
+    def _insert(self, widget, chunks):
+        limit = self._limits.get(widget, self.max_lines)
+        if len(chunks) > limit:
+            chunks = chunks[-limit:]
+        try:
+            widget.insert(tk.END, "".join(chunks))
+            # "end-1c" sits on the empty line after the final newline
+            lines = int(widget.index("end-1c").split(".")[0]) - 1
+            if lines > limit:
+                widget.delete("1.0", f"{lines - limit + 1}.0")
+            widget.see(tk.END)
+        except tk.TclError:
+            # widget destroyed while lines were queued
+            self._limits.pop(widget, None)
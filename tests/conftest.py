@@ -0,0 +1,5 @@
+import os
+import sys
+
+# the sim package lives at the repository root, which is not installed
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
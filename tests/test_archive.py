@@ -0,0 +1,155 @@
+import gzip
+import os
+import random
+import shutil
+import threading
+import subprocess
+
+import pytest
+
+import sim.archive
+from sim.archive import BlockGzipReader, compress_segment, open_segment, segment_size
+from sim.filelock import locked
+from sim.eventlog import LogWriter, segments
+from sim.logindex import build_index, index_path, read_index, search
+from sim.logtail import LogTail
+
+
+def _write_lines(path, n, long_every=0):
+    rng = random.Random(n)
+    with open(path, "wb") as f:
+        for i in range(n):
+            tail = "x" * rng.randrange(3000, 9000) if long_every and i % long_every == 0 else ""
+            f.write(f"2026-01-01T00:00:{i % 60:02d}+00:00 DNS resolved h{i}.test -> 127.0.0.1 {tail}\n".encode())
+    with open(path, "rb") as f:
+        return f.read()
+
+
+def test_round_trip_random_seeks(tmp_path):
+    path = str(tmp_path / "seg.log")
+    # lines longer than a block end up in oversized blocks
+    plain = _write_lines(path, 5000, long_every=97)
+    target = compress_segment(path, block=4096)
+    assert target == path + ".gz"
+    assert not os.path.exists(path)
+    with BlockGzipReader(target) as reader:
+        assert reader.size == len(plain)
+        assert len(reader._starts) > 10
+    assert segment_size(target) == len(plain)
+    rng = random.Random(1)
+    with open_segment(target) as f:
+        assert f.read() == plain
+        for _ in range(500):
+            start = rng.randrange(len(plain) + 10)
+            n = rng.randrange(1, 20000)
+            f.seek(start)
+            assert f.read(n) == plain[start:start + n]
+        f.seek(-100, os.SEEK_END)
+        assert f.read() == plain[-100:]
+
+
+def test_plain_gzip_compatible(tmp_path):
+    path = str(tmp_path / "seg.log")
+    plain = _write_lines(path, 3000)
+    target = compress_segment(path, block=2048)
+    with gzip.open(target, "rb") as f:
+        assert f.read() == plain
+    zcat = shutil.which("zcat") or shutil.which("gzip")
+    if zcat:
+        args = [zcat] if zcat.endswith("zcat") else [zcat, "-dc"]
+        assert subprocess.run(args + [target], capture_output=True, check=True).stdout == plain
+
+
+def test_foreign_gzip_still_readable(tmp_path):
+    path = str(tmp_path / "other.log.gz")
+    with gzip.open(path, "wb") as f:
+        f.write(b"one\ntwo\n")
+    with pytest.raises(ValueError):
+        BlockGzipReader(path)
+    with open_segment(path) as f:
+        assert f.read() == b"one\ntwo\n"
+
+
+def test_segments_prefers_plain_while_compressing(tmp_path):
+    log = str(tmp_path / "ioc.log")
+    seg = log + ".20260101T000000Z"
+    later = log + ".20260102T000000Z-1"
+    for p in (log, seg, later):
+        _write_lines(p, 10)
+    shutil.copyfile(seg, seg + ".gz")
+    open(seg + ".gz.k3x9q1.tmp", "wb").close()
+    assert segments(log) == [seg, later]
+    os.remove(seg)
+    assert segments(log) == [seg + ".gz", later]
+
+
+def test_logtail_reads_compressed_segment(tmp_path):
+    path = str(tmp_path / "seg.log")
+    plain = _write_lines(path, 4000)
+    lines = plain.decode().splitlines(keepends=True)
+    target = compress_segment(path, block=4096)
+    tail = LogTail(target, block=8192)
+    assert tail.refresh() == len(lines)
+    assert tail.refresh() == 0
+    assert tail.read_lines(1234, 3) == lines[1234:1237]
+    assert tail.tail(2) == lines[-2:]
+
+
+def test_index_offsets_survive_compression(tmp_path):
+    log = str(tmp_path / "ioc.log")
+    writer = LogWriter(log, max_bytes=64 << 10, backup_count=0)
+    for i in range(6000):
+        writer.write(f"DNS resolved h{i}.test -> 127.0.0.1")
+    writer.close()
+    seg = segments(log)[0]
+    with open(seg, "rb") as f:
+        plain = f.read()
+    blocks = read_index(seg)
+    assert blocks
+    target = compress_segment(seg, block=4096)
+    assert os.path.exists(index_path(target)) and not os.path.exists(index_path(seg))
+    assert read_index(target) == blocks
+    assert build_index(target) == 0
+    with open_segment(target) as f:
+        for _, _, start, stop, count, _ in blocks:
+            f.seek(start)
+            chunk = f.read(stop - start)
+            assert chunk == plain[start:stop]
+            assert chunk.count(b"\n") == count
+    assert [line for line in search(target, text="h42.test ")] == [
+        line for line in plain.decode().splitlines(keepends=True) if "h42.test " in line]
+
+
+def test_segment_stays_locked_until_swapped(tmp_path):
+    path = str(tmp_path / "seg.log")
+    plain = _write_lines(path, 2000)
+    lock_path = str(tmp_path / "rotate.lock")
+    result = []
+    with locked(lock_path):
+        first = threading.Thread(target=lambda: result.append(compress_segment(path, lock_path=lock_path)))
+        first.start()
+        first.join(0.5)
+        # waiting for the rotation lock, still holding the segment
+        assert first.is_alive()
+        with pytest.raises(BlockingIOError):
+            compress_segment(path, lock_path=lock_path)
+    first.join()
+    assert result == [path + ".gz"]
+    assert sorted(os.listdir(tmp_path)) == ["rotate.lock", "seg.log.gz"]
+    with open_segment(path + ".gz") as f:
+        assert f.read() == plain
+
+
+def test_failed_compression_leaves_no_temp_file(tmp_path, monkeypatch):
+    path = str(tmp_path / "seg.log")
+    plain = _write_lines(path, 2000)
+
+    def broken(data, level):
+        raise OSError("disk full")
+
+    monkeypatch.setattr(sim.archive, "_member", broken)
+    with pytest.raises(OSError):
+        compress_segment(path)
+    assert os.listdir(tmp_path) == ["seg.log"]
+    with open(path, "rb") as f:
+        assert f.read() == plain
@@ -0,0 +1,31 @@
+import time
+
+from sim.beacon import BeaconSimulator
+from sim.stubs import StubHTTPServer
+
+
+def test_checkins_reuse_keep_alive_connections():
+    events = []
+    with StubHTTPServer() as http:
+        sim = BeaconSimulator(http.url + "/api/{id}?s={seq}", beacons=40, interval=0.2, jitter=0.1,
+                              checkins=3, workers=4, log=events.append, seed=7)
+        result = sim.run()
+    assert (result["ok"], result["failed"]) == (120, 0)
+    assert http.requests == 120
+    assert result["connections"] <= 4
+    assert http.connections == result["connections"]
+    assert {e.fields["seq"] for e in events} == {0, 1, 2}
+
+
+def test_duration_shorter_than_interval():
+    # only the beacons whose first check-in falls inside the duration may fire at all
+    events = []
+    with StubHTTPServer() as http:
+        sim = BeaconSimulator(http.url, beacons=50, interval=2.0, duration=0.5, log=events.append, seed=3)
+        start = time.time()
+        result = sim.run()
+    assert 0 < http.requests < 50
+    assert result["ok"] == http.requests
+    assert all(e.fields["seq"] == 0 for e in events)
+    assert max(e.ts for e in events) < start + 0.5 + 0.25
+    assert result["elapsed"] < 1.0
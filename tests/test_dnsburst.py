@@ -0,0 +1,40 @@
+import pytest
+
+from sim.dnsburst import build_query, run_dns_burst
+from sim.stubs import StubDNSServer
+
+
+def test_burst_against_stub_server():
+    events = []
+    with StubDNSServer(answer="127.0.0.9", nxdomain_suffixes=(".nx.test",)) as dns:
+        names = ["ok.test", "gone.nx.test"] * 200
+        result = run_dns_burst(names, concurrency=50, nameserver=dns.host, port=dns.port, log=events.append)
+    assert dns.queries == 400
+    assert (result["ok"], result["failed"]) == (200, 200)
+    assert {e.fields["ip"] for e in events if e.outcome == "success"} == {"127.0.0.9"}
+    assert all("NXDOMAIN" in e.fields["error"] for e in events if e.outcome == "failure")
+
+
+@pytest.mark.parametrize("concurrency", [0, -1, 65536])
+def test_concurrency_out_of_range(concurrency):
+    with StubDNSServer() as dns:
+        with pytest.raises(ValueError, match="concurrency"):
+            run_dns_burst(["a.test"], concurrency=concurrency, nameserver=dns.host, port=dns.port)
+    assert dns.queries == 0
+
+
+def test_invalid_names_fail_without_a_query():
+    assert build_query(1, "a" * 63 + ".test")
+    with pytest.raises(ValueError):
+        build_query(1, "a" * 64 + ".test")
+    with pytest.raises(ValueError):
+        build_query(1, "a..test")
+    with pytest.raises(ValueError):
+        build_query(1, ".".join(["a" * 60] * 5))
+    events = []
+    with StubDNSServer() as dns:
+        result = run_dns_burst(["x" * 64 + ".test", "ok.test"], nameserver=dns.host, port=dns.port,
+                               log=events.append)
+    assert dns.queries == 1
+    assert (result["ok"], result["failed"]) == (1, 1)
+    assert [e.outcome for e in events if e.fields["host"].startswith("x")] == ["failure"]
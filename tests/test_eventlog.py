@@ -0,0 +1,55 @@
+import threading
+
+from sim.archive import open_segment, segment_size
+from sim.eventlog import LogWriter, segments
+from sim.logindex import read_index, search
+
+
+def _write_concurrently(log, writers=2, lines=3000, **options):
+    # separate LogWriters lock the log through separate descriptors, exactly like separate processes
+    def run(k):
+        writer = LogWriter(log, batch_size=37, flush_interval=0.01, **options)
+        for i in range(lines):
+            if i % 2:
+                writer.write(f"DNS resolved w{k}-{i}.test -> 127.0.0.1")
+            else:
+                writer.write(f"Created file /tmp/w{k}-{i}.txt")
+        writer.close()
+
+    threads = [threading.Thread(target=run, args=(k,)) for k in range(writers)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+
+def _check_index(path):
+    blocks = read_index(path)
+    with open_segment(path) as f:
+        count = sum(1 for _ in f)
+    pos = 0
+    for _, _, start, stop, _, _ in blocks:
+        assert start == pos
+        pos = stop
+    assert pos == segment_size(path)
+    assert sum(b[4] for b in blocks) == count
+    return count
+
+
+def test_two_writers_share_one_index(tmp_path):
+    log = str(tmp_path / "ioc.log")
+    _write_concurrently(log)
+    assert _check_index(log) == 6000
+    assert sum(1 for _ in search(log, types=["dns"])) == 3000
+    assert sum(1 for _ in search(log)) == 6000
+    assert [line.split(" ", 1)[1] for line in search(log, text="w1-2999.test ")] == [
+        "DNS resolved w1-2999.test -> 127.0.0.1\n"]
+
+
+def test_two_writers_rotating(tmp_path):
+    log = str(tmp_path / "ioc.log")
+    _write_concurrently(log, lines=5000, max_bytes=64 << 10, backup_count=0)
+    files = segments(log) + [log]
+    assert len(files) > 3
+    assert sum(_check_index(p) for p in files) == 10000
+    assert sum(1 for p in files for _ in search(p, types=["dns"])) == 5000
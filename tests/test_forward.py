@@ -0,0 +1,104 @@
+import os
+import glob
+import time
+
+from sim.events import Event
+from sim.forward import Forwarder
+from sim.stubs import StubSyslogServer
+
+
+def _wait_for(collector, count, timeout=10.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        with collector.lock:
+            if len(collector.received) >= count:
+                break
+        time.sleep(0.05)
+    # anything sent twice would show up right behind the expected messages
+    time.sleep(0.3)
+    with collector.lock:
+        return [raw for _, raw in collector.received]
+
+
+def _spool_lines(spool):
+    lines = []
+    for path in glob.glob(os.path.join(spool, "forward-*.spool")):
+        with open(path, "rb") as f:
+            lines.extend(f.read().splitlines())
+    return lines
+
+
+def _dead_target():
+    with StubSyslogServer(protocol="tcp") as probe:
+        return probe.url
+
+
+def test_spool_is_replayed_when_target_accepts_again(tmp_path):
+    spool = str(tmp_path / "spool")
+    down = Forwarder(_dead_target(), retries=0, flush_interval=0.05, spool_dir=spool)
+    for i in range(300):
+        down.submit(Event("dns", "resolve", "success", f"spooled-{i:04d} end"))
+    down.close(timeout=5)
+    assert down.stats["spooled"] == 300
+    assert len(_spool_lines(spool)) == 300
+
+    with StubSyslogServer(protocol="tcp") as collector:
+        up = Forwarder(collector.url, flush_interval=0.05, spool_dir=spool)
+        for i in range(50):
+            up.submit(Event("dns", "resolve", "success", f"live-{i:04d} end"))
+        received = _wait_for(collector, 350)
+        up.close(timeout=5)
+    assert up.stats["replayed"] == 300
+    assert len(received) == 350
+    for prefix, n in ((b"spooled-", 300), (b"live-", 50)):
+        ids = [r.split(prefix, 1)[1][:4] for r in received if prefix in r]
+        assert len(ids) == len(set(ids)) == n
+    assert _spool_lines(spool) == []
+
+
+def test_shared_spool_is_replayed_once(tmp_path):
+    spool = str(tmp_path / "spool")
+    os.makedirs(spool)
+    expected = []
+    for k in range(40):
+        lines = [f"file{k:02d}-msg{i:03d}".encode() for i in range(100)]
+        expected.extend(lines)
+        with open(os.path.join(spool, f"forward-{1000 + k}-1.spool"), "wb") as f:
+            f.write(b"".join(m + b"\n" for m in lines))
+
+    with StubSyslogServer(protocol="tcp") as collector:
+        forwarders = [Forwarder(collector.url, flush_interval=0.01, batch_size=50, spool_dir=spool)
+                      for _ in range(2)]
+        received = _wait_for(collector, len(expected))
+        assert sorted(received) == sorted(expected)
+        assert sum(f.stats["replayed"] for f in forwarders) == len(expected)
+        # both senders are still alive and delivering
+        for n, f in enumerate(forwarders):
+            assert f._thread.is_alive() and f.stats["errors"] == 0
+            f.submit(Event("dns", "resolve", "success", f"after-{n} end"))
+        received = _wait_for(collector, len(expected) + 2)
+        for f in forwarders:
+            f.close(timeout=5)
+    assert sum(b"after-" in r for r in received) == 2
+    assert _spool_lines(spool) == []
+
+
+def test_sender_survives_unexpected_errors(tmp_path):
+    with StubSyslogServer(protocol="tcp") as collector:
+        forwarder = Forwarder(collector.url, flush_interval=0.05, spool_dir=str(tmp_path / "spool"))
+        encode = forwarder.encode
+
+        def flaky(event):
+            if event.message == "boom":
+                raise RuntimeError("serializer bug")
+            return encode(event)
+
+        forwarder.encode = flaky
+        forwarder.submit(Event("dns", "resolve", "success", "boom"))
+        time.sleep(0.3)
+        forwarder.submit(Event("dns", "resolve", "success", "after the error"))
+        received = _wait_for(collector, 1)
+        forwarder.close(timeout=5)
+    assert forwarder.stats["errors"] == 1
+    assert isinstance(forwarder.error, RuntimeError)
+    assert any(b"after the error" in r for r in received)
@@ -0,0 +1,46 @@
+import sqlite3
+import hashlib
+
+from sim.actions import hash_artifact
+from sim.hashing import HashCache
+
+
+def _files(tmp_path, n):
+    paths = []
+    for i in range(n):
+        path = tmp_path / f"f{i}.bin"
+        path.write_bytes(b"payload %d" % i)
+        paths.append(str(path))
+    return paths
+
+
+def test_caches_share_one_database(tmp_path):
+    # two connections behave like two processes sharing the cache
+    db = str(tmp_path / "cache.sqlite")
+    paths = _files(tmp_path, 20)
+    with HashCache(db, timeout=0.5) as a, HashCache(db, timeout=0.5) as b:
+        for i, path in enumerate(paths):
+            (a if i % 2 else b).hash(path)
+        for path in paths:
+            assert a.hash(path) == b.hash(path)
+        assert a.errors == b.errors == 0
+        assert a.hits == b.hits == 20
+
+
+def test_locked_cache_still_hashes(tmp_path):
+    db = str(tmp_path / "cache.sqlite")
+    (path,) = _files(tmp_path, 1)
+    with HashCache(db, timeout=0.1) as cache:
+        holder = sqlite3.connect(db)
+        holder.execute("BEGIN EXCLUSIVE")
+        try:
+            ok, event = hash_artifact(path, ("sha256",), cache)
+        finally:
+            holder.rollback()
+            holder.close()
+        assert ok
+        assert event.fields["sha256"] == hashlib.sha256(b"payload 0").hexdigest()
+        assert cache.errors >= 1
+        # the next call caches it normally
+        cache.hash(path, ("sha256",))
+        assert cache.get(path, algorithms=("sha256",)) is not None
@@ -0,0 +1,30 @@
+import pytest
+
+from sim.events import SERIALIZERS, Event
+from sim.forward import Forwarder
+from sim.ingest import _CORR_ID, IngestHarness
+from sim.stubs import StubSyslogServer
+
+
+@pytest.mark.parametrize("collector", ["tcp", "http"])
+def test_every_event_correlated(collector):
+    harness = IngestHarness(rates=[200, 400], duration=0.5, drain=5, kinds=("tcp", "http", "file", "registry"),
+                            workers=4, collector=collector, flush_interval=0.05)
+    report = harness.run()
+    assert [s["rate"] for s in report["steps"]] == [200, 400]
+    for step in report["steps"]:
+        assert step["sent"] == step["rate"] // 2
+        assert (step["received"], step["lost"], step["late"]) == (step["sent"], 0, 0)
+        assert step["action_failures"] == 0
+        assert 0 < step["latency_ms"]["p50"] <= step["latency_ms"]["max"] < 5000
+
+
+@pytest.mark.parametrize("format", sorted(SERIALIZERS))
+def test_corr_id_survives_every_format(format):
+    event = Event("dns", "resolve", "success", "DNS resolved a.test -> 127.0.0.1 corr_id=0a1b2c3d-42",
+                  host="a.test", corr_id="0a1b2c3d-42", sent_ts=1.5)
+    with StubSyslogServer() as probe:
+        forwarder = Forwarder(probe.url, format=format, flush_interval=0.01, spool_dir=None)
+        raw = forwarder.encode(event)
+        forwarder.close(timeout=1)
+    assert _CORR_ID.search(raw).group(1) == b"0a1b2c3d-42"
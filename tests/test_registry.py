@@ -0,0 +1,49 @@
+import os
+import json
+
+import sim.filelock
+from sim.registry import RegistryStore
+
+LEGACY = {"HKCU\\Software\\Legacy": {"obj": {"a": 1}, "ratio": 1.5, "unset": None, "name": "x", "n": 7}}
+
+
+def _read_only_open(monkeypatch):
+    real_open = os.open
+
+    def open_(path, flags, *args):
+        if flags & (os.O_RDWR | os.O_WRONLY | os.O_CREAT):
+            raise PermissionError(13, "Permission denied", path)
+        return real_open(path, flags, *args)
+
+    monkeypatch.setattr(sim.filelock.os, "open", open_)
+
+
+def _write_legacy(tmp_path):
+    path = str(tmp_path / "reg.json")
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(LEGACY, f)
+    return path
+
+
+def test_compaction_keeps_legacy_values(tmp_path):
+    path = _write_legacy(tmp_path)
+    store = RegistryStore(path)
+    assert store.get_value("HKCU\\Software\\Legacy", "obj") == {"a": 1}
+    store.set_value("HKCU\\Software\\Legacy", "added", "y")
+    store.compact()
+    store.close()
+    with open(path, encoding="utf-8") as f:
+        snapshot = json.load(f)
+    assert snapshot["HKCU\\Software\\Legacy"] == dict(LEGACY["HKCU\\Software\\Legacy"], added="y")
+
+
+def test_read_only_store(tmp_path, monkeypatch):
+    path = _write_legacy(tmp_path)
+    _read_only_open(monkeypatch)
+    # no lockfile and none can be created
+    assert RegistryStore(path).get_value("HKEY_CURRENT_USER\\Software\\Legacy", "n") == 7
+    monkeypatch.undo()
+    RegistryStore(path).create_key("HKCU\\Software\\Other")
+    _read_only_open(monkeypatch)
+    # an existing lockfile is locked read-only
+    assert RegistryStore(path).subkeys("HKCU\\Software") == ["Legacy", "Other"]
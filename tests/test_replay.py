@@ -0,0 +1,49 @@
+from sim.events import Event, get_serializer
+from sim.replay import Replayer, scenario_timeline
+from sim.stubs import StubTCPListener
+
+
+def _record(path, port, times):
+    jsonl = get_serializer("jsonl")
+    with open(path, "w", encoding="utf-8") as f:
+        for ts in times:
+            event = Event("tcp", "connect", "success", f"TCP connect success to 127.0.0.1:{port}", ts=ts,
+                          ip="127.0.0.1", port=port)
+            f.write(jsonl.encode(event) + "\n")
+        # not replayable, skipped
+        f.write(jsonl.encode(Event("app", "log", "success", "Scenario started", ts=times[-1])) + "\n")
+
+
+def test_log_replayed_at_speed(tmp_path):
+    log = str(tmp_path / "recorded.jsonl")
+    events = []
+    with StubTCPListener() as tcp:
+        _record(log, tcp.port, [1000.0 + 0.5 * k for k in range(5)])
+        summary = Replayer(log, speed=4, workers=2, log=events.append).run()
+    assert (summary["events"], summary["ok"], summary["failed"]) == (5, 5, 0)
+    assert tcp.accepted == 5
+    assert summary["span"] == 2.0
+    # 2 s of recorded time at 4x
+    assert 0.45 <= summary["elapsed"] < 1.5
+    replayed = [e for e in events if isinstance(e, Event) and e.type == "tcp"]
+    assert len({e.fields["replay_of"] for e in replayed}) == 5
+
+
+def test_scenario_timeline_order():
+    scenario = {"actions": [
+        {"type": "http", "url": "http://127.0.0.1/", "at": 1, "count": 3, "interval": 0.5},
+        {"type": "dns", "host": "a.test"},
+        {"type": "tcp", "ip": "127.0.0.1", "port": 1, "at": 0.2},
+    ]}
+    timeline = scenario_timeline(scenario)
+    assert [(t, s["type"], i) for t, s, i in timeline] == [
+        (0.2, "tcp", 0), (1.0, "http", 0), (1.0, "dns", 0), (1.5, "http", 1), (2.0, "http", 2)]
+    assert [s["type"] for _, s, _ in scenario_timeline(scenario, types={"dns"})] == ["dns"]
+
+
+def test_dry_run_keeps_pace(tmp_path):
+    log = str(tmp_path / "recorded.jsonl")
+    _record(log, 9, [2000.0 + k / 1000 for k in range(2000)])
+    summary = Replayer(log, speed=2, dry_run=True, log=lambda line: None).run()
+    assert summary["events"] == 2000 and summary["ok"] == 0
+    assert summary["lag_ms"]["p99"] < 50
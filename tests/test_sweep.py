@@ -0,0 +1,33 @@
+import socket
+
+import pytest
+
+from sim.stubs import StubTCPListener
+from sim.sweep import parse_ports, parse_targets, run_tcp_sweep
+
+
+def _closed_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def test_sweep_open_and_refused():
+    events = []
+    closed = _closed_port()
+    with StubTCPListener() as tcp:
+        result = run_tcp_sweep(["127.0.0.1"], [tcp.port, closed] * 100, concurrency=20, log=events.append)
+    assert (result["open"], result["refused"], result["timeout"], result["error"]) == (100, 100, 0, 0)
+    assert result["sent"] == 200
+    assert {e.fields["port"] for e in events if e.outcome == "success"} == {tcp.port}
+    assert {e.fields["port"] for e in events if e.outcome == "failure"} == {closed}
+
+
+def test_sweep_input_checks():
+    assert parse_ports("22,80,8000-8002") == [22, 80, 8000, 8001, 8002]
+    with pytest.raises(ValueError):
+        parse_ports("0")
+    with pytest.raises(PermissionError):
+        parse_targets("10.0.0.0/30")
+    with pytest.raises(ValueError, match="concurrency"):
+        run_tcp_sweep(["127.0.0.1"], [1], concurrency=0)